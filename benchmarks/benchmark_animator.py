@@ -0,0 +1,158 @@
+"""Benchmarks of rendering frames of synthetic responses (asv style).
+
+Each benchmark is parametrized by the resolution of the response grid and of
+the rendered frames, and reports the time per frame of
+
+* render: `_update_frame` and rasterizing the frame,
+* savefig: `_encode_frame`, i.e., `savefig` of the figure to png (which
+  rasterizes it again) or encoding the pixels of the raster animator,
+* encode: encoding the pixels of an already rendered frame to png,
+
+as well as the total throughput in frames per second of `animate`.
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+from PIL import Image
+from xarray import DataArray
+
+from omnisuite_viz.animator import (
+    OmniSuiteWorldMapAnimator, PlateCarreeRasterAnimator)
+from omnisuite_viz.animator_config import (
+    NetcdfAnimatorConfig, OmniSuiteAnimatorConfig)
+from omnisuite_viz.grid import WorldMapNetcdfGrid
+from omnisuite_viz.writer import encode_frame
+
+# (number of longitudes, number of latitudes) of the response
+GRIDS = {
+    "2deg": (180, 90),
+    "0.25deg": (1440, 720),  # about ICON R2B7
+    "0.1deg": (3600, 1800),
+}
+RESOLUTIONS = ["2048x1024", "4096x2048"]
+NUM_FRAMES = 4
+
+
+def make_synthetic_grid(
+        num_longitude_points: int,
+        num_latitude_points: int,
+        num_frames: int = NUM_FRAMES) -> WorldMapNetcdfGrid:
+    """Grid of a smooth wave travelling eastward with small scale noise."""
+    longitude = np.linspace(-180, 180, num_longitude_points)
+    latitude = np.linspace(-90, 90, num_latitude_points)
+    longitude_mesh, latitude_mesh = np.meshgrid(
+        np.deg2rad(longitude), np.deg2rad(latitude))
+    noise = np.random.default_rng(0).normal(
+        scale=0.1, size=longitude_mesh.shape)
+    response = np.stack([
+        np.sin(4*longitude_mesh - 0.5*frame) * np.cos(latitude_mesh) + noise
+        for frame in range(num_frames)]).astype(np.float32)
+    response = DataArray(
+        response,
+        dims=("time", "lat", "lon"),
+        coords={"lat": latitude, "lon": longitude})
+    return WorldMapNetcdfGrid(response, latitude, longitude)
+
+
+class SyntheticResponseAnimator(OmniSuiteWorldMapAnimator):
+    """Draw the response with `pcolormesh` like the ICON example."""
+
+    def _plot_initial_frame(self):
+        self._mesh = self._ax.pcolormesh(
+            self._grid.longitude,
+            self._grid.latitude,
+            np.asarray(self._grid.response[0]),
+            transform=self._config.transform,
+            cmap="bwr",
+            alpha=0.3)
+        return
+
+    def _get_animated_artists(self):
+        return [self._mesh]
+
+    def _update_frame(self, frame: int):
+        self._mesh.set_array(np.asarray(self._grid.response[frame]).ravel())
+        return
+
+
+class _AnimatorBenchmark:
+    params = (list(GRIDS), RESOLUTIONS)
+    param_names = ["grid", "resolution"]
+    timeout = 600
+
+    def setup(self, grid: str, resolution: str):
+        self.temp_dir = TemporaryDirectory()
+        self.grid = make_synthetic_grid(*GRIDS[grid])
+        width, height = (int(size) for size in resolution.split("x"))
+        self.config_kwargs = dict(
+            save_animation=False,
+            output_dir=self.temp_dir.name,
+            num_frames_in_animation=NUM_FRAMES,
+            plot_width_in_pixels=width,
+            plot_height_in_pixels=height)
+        self.frame_path = join(self.temp_dir.name, "frame_0.png")
+
+        self.animator = self.make_animator()
+        self.animator._configure_initial_frame()
+        self.animator._plot_initial_frame()
+        self.animator._update_frame(0)
+        self.pixels = np.array(self.animator._draw_frame())
+        return
+
+    def teardown(self, grid: str, resolution: str):
+        self.animator._close_figure()
+        self.temp_dir.cleanup()
+        return
+
+    def make_animator(self) -> OmniSuiteWorldMapAnimator:
+        raise NotImplementedError
+
+    def time_render_frame(self, grid: str, resolution: str):
+        self.animator._update_frame(1)
+        self.animator._draw_frame()
+        return
+
+    def time_savefig_frame(self, grid: str, resolution: str):
+        self.animator._update_frame(1)
+        self.animator._encode_frame(self.frame_path)
+        return
+
+    def time_encode_frame(self, grid: str, resolution: str):
+        encode_frame(self.frame_path, self.pixels)
+        return
+
+    def track_frames_per_second(self, grid: str, resolution: str) -> float:
+        animator = self.make_animator()
+        start = perf_counter()
+        animator.animate()
+        return NUM_FRAMES / (perf_counter() - start)
+
+    track_frames_per_second.unit = "frames/s"
+
+
+class MatplotlibAnimatorSuite(_AnimatorBenchmark):
+    """`pcolormesh` of the response drawn by matplotlib and cartopy."""
+
+    def make_animator(self) -> OmniSuiteWorldMapAnimator:
+        config = OmniSuiteAnimatorConfig(**self.config_kwargs)
+        return SyntheticResponseAnimator(self.grid, config)
+
+
+class RasterAnimatorSuite(_AnimatorBenchmark):
+    """Response resampled and blended over a background with NumPy."""
+
+    def make_animator(self) -> OmniSuiteWorldMapAnimator:
+        # the config only checks that these files exist
+        response_path = join(self.temp_dir.name, "response.nc")
+        background_path = join(self.temp_dir.name, "background.png")
+        background_img = np.full((2700, 5400, 3), 96, dtype=np.uint8)
+        open(response_path, "a").close()
+        Image.fromarray(background_img).save(background_path)
+        config = NetcdfAnimatorConfig(
+            netcdf_response_var_file_path=response_path,
+            blue_marble_path=background_path,
+            **self.config_kwargs)
+        return PlateCarreeRasterAnimator(
+            self.grid, config, background_img=background_img)
@@ -0,0 +1,255 @@
+"""Benchmarks of reading synthetic multifile ICON outputs (asv style).
+
+The files are written once by `setup_cache` with `write_synthetic_icon_files`
+and read like `ICONMultifileDataReader` of the multifile ICON example, i.e.,
+`open_mfdataset` with `concat_dim="time"` that drops all but the response
+(or from a `DatasetCatalog` of the files),
+followed by selecting a level and reading one time step per frame, or with
+the level pushed down to hyperslab reads by `read_level_hyperslabs`. Each
+benchmark is parametrized by the scale of the files (the "levante" files
+have the shape of the gravity wave outputs on Levante) and their layout on
+disk. `ZarrReadSuite` reads the same frames from a store of the response's
+level written by `ingest_into_zarr`.
+"""
+from glob import glob
+from os.path import join
+
+import xarray as xarr
+
+from omnisuite_viz.catalog import DatasetCatalog
+from omnisuite_viz.hyperslab import ReadStatistics, read_level_hyperslabs
+from omnisuite_viz.ingest import ingest_into_zarr, open_zarr_store
+from omnisuite_viz.lazy_array import TimeConcatenatedArray
+from omnisuite_viz.synthetic import (
+    SyntheticICONConfig, write_synthetic_icon_files)
+
+# (number of levels, latitudes, longitudes) of the files
+SCALES = {
+    "small": (8, 90, 180),
+    "levante": (152, 512, 1024),
+}
+# (whether a chunk is one level of a time step, zlib compression level),
+# otherwise a chunk is a whole time step
+LAYOUTS = {
+    "compressed_chunk_per_level": (True, 1),
+    "chunk_per_time": (False, 0),
+}
+NUM_FILES = 4
+VARIABLES = ("u", "Z")
+RESPONSE = "u"
+# threads that open the files when building a catalog in parallel
+NUM_OPEN_THREADS = 8
+
+
+def get_data_dir(scale: str, layout: str) -> str:
+    return join("synthetic_icon", scale, layout)
+
+
+class MultifileReadSuite:
+    params = (list(SCALES), list(LAYOUTS))
+    param_names = ["scale", "layout"]
+    timeout = 600
+
+    def setup_cache(self):
+        for scale, (num_levels, num_latitudes, num_longitudes) in (
+                SCALES.items()):
+            for layout, (is_chunked_per_level, compression_level) in (
+                    LAYOUTS.items()):
+                write_synthetic_icon_files(
+                    get_data_dir(scale, layout),
+                    SyntheticICONConfig(
+                        num_files=NUM_FILES,
+                        num_levels=num_levels,
+                        num_latitudes=num_latitudes,
+                        num_longitudes=num_longitudes,
+                        variables=VARIABLES,
+                        restart_time_per_file=True,
+                        chunks=(
+                            (1, 1, num_latitudes, num_longitudes)
+                            if is_chunked_per_level else None),
+                        compression_level=compression_level))
+                data_dir = get_data_dir(scale, layout)
+                DatasetCatalog.build(
+                    sorted(glob(join(data_dir, "*.nc")))).save(
+                        join(data_dir, "catalog.json.gz"))
+        return
+
+    # writing the levante files takes minutes
+    setup_cache.timeout = 1800
+
+    def setup(self, scale: str, layout: str):
+        self.paths = sorted(glob(join(get_data_dir(scale, layout), "*.nc")))
+        self.catalog_path = join(
+            get_data_dir(scale, layout), "catalog.json.gz")
+        self.level_ix = SCALES[scale][0] // 2
+        self.mfdataset = self.open_mfdataset()
+        self.response = self.mfdataset[RESPONSE].isel(lev=self.level_ix)
+        self.level_data = read_level_hyperslabs(
+            self.paths, RESPONSE, self.level_ix)
+        self.lazy_response = TimeConcatenatedArray(
+            self.paths, RESPONSE, self.level_ix)
+        return
+
+    def teardown(self, scale: str, layout: str):
+        self.mfdataset.close()
+        self.lazy_response.close()
+        return
+
+    def open_mfdataset(self) -> xarr.Dataset:
+        return xarr.open_mfdataset(
+            self.paths,
+            drop_variables=[
+                variable for variable in VARIABLES if variable != RESPONSE],
+            concat_dim="time",
+            combine="nested")
+
+    def time_open_mfdataset(self, scale: str, layout: str):
+        self.open_mfdataset().close()
+        return
+
+    def time_open_from_catalog(self, scale: str, layout: str):
+        DatasetCatalog.load(self.catalog_path).to_dataset([RESPONSE])
+        return
+
+    def time_read_frame(self, scale: str, layout: str):
+        self.response.isel(time=NUM_FILES // 2).compute()
+        return
+
+    def time_read_all_frames(self, scale: str, layout: str):
+        for frame in range(self.response.shape[0]):
+            self.response.isel(time=frame).compute()
+        return
+
+    def time_read_all_frames_pushed_down(self, scale: str, layout: str):
+        for frame in range(self.level_data.shape[0]):
+            self.level_data[frame].compute()
+        return
+
+    def time_read_all_frames_dask_free(self, scale: str, layout: str):
+        for frame in range(len(self.lazy_response)):
+            self.lazy_response[frame]
+        return
+
+    def track_fraction_of_bytes_used(self, scale: str, layout: str) -> float:
+        statistics = ReadStatistics()
+        read_level_hyperslabs(
+            self.paths, RESPONSE, self.level_ix,
+            statistics=statistics).compute()
+        return statistics.fraction_used
+
+    track_fraction_of_bytes_used.unit = "used/read"
+
+
+class ZarrReadSuite:
+    params = list(SCALES)
+    param_names = ["scale"]
+    timeout = 600
+
+    def setup_cache(self):
+        try:
+            import zarr  # noqa: F401
+        except ImportError:
+            return
+        for scale, (num_levels, num_latitudes, num_longitudes) in (
+                SCALES.items()):
+            data_dir = get_data_dir(scale, "netcdf")
+            paths = write_synthetic_icon_files(
+                data_dir,
+                SyntheticICONConfig(
+                    num_files=NUM_FILES,
+                    num_levels=num_levels,
+                    num_latitudes=num_latitudes,
+                    num_longitudes=num_longitudes,
+                    variables=VARIABLES,
+                    restart_time_per_file=True))
+            level_ix = num_levels // 2
+            ingest_into_zarr(
+                paths,
+                RESPONSE,
+                join(data_dir, f"{RESPONSE}.zarr"),
+                level_start=level_ix,
+                level_stop=level_ix + 1,
+                concat_dim="time")
+        return
+
+    setup_cache.timeout = 1800
+
+    def setup(self, scale: str):
+        try:
+            import zarr  # noqa: F401
+        except ImportError:
+            raise NotImplementedError("requires zarr")
+        self.store_path = join(
+            get_data_dir(scale, "netcdf"), f"{RESPONSE}.zarr")
+        self.store = open_zarr_store(self.store_path)
+        self.response = self.store[RESPONSE].isel(lev=0)
+        return
+
+    def teardown(self, scale: str):
+        self.store.close()
+        return
+
+    def time_open_store(self, scale: str):
+        open_zarr_store(self.store_path).close()
+        return
+
+    def time_read_frame(self, scale: str):
+        self.response.isel(time=NUM_FILES // 2).compute()
+        return
+
+    def time_read_all_frames(self, scale: str):
+        for frame in range(self.response.shape[0]):
+            self.response.isel(time=frame).compute()
+        return
+
+
+class ManyFilesReadSuite:
+    """Reading a frame of a response concatenated over very many files."""
+    params = [100, 1000]
+    param_names = ["num_files"]
+    timeout = 600
+
+    def setup_cache(self):
+        for num_files in self.params:
+            write_synthetic_icon_files(
+                get_data_dir("many", str(num_files)),
+                SyntheticICONConfig(
+                    num_files=num_files,
+                    num_levels=4,
+                    num_latitudes=45,
+                    num_longitudes=90,
+                    variables=VARIABLES,
+                    restart_time_per_file=True))
+        return
+
+    setup_cache.timeout = 1800
+
+    def setup(self, num_files: int):
+        self.paths = sorted(
+            glob(join(get_data_dir("many", str(num_files)), "*.nc")))
+        self.mfdataset = xarr.open_mfdataset(
+            self.paths, concat_dim="time", combine="nested")
+        self.response = self.mfdataset[RESPONSE].isel(lev=1)
+        self.lazy_response = TimeConcatenatedArray(self.paths, RESPONSE, 1)
+        return
+
+    def teardown(self, num_files: int):
+        self.mfdataset.close()
+        self.lazy_response.close()
+        return
+
+    def time_read_frame(self, num_files: int):
+        self.response.isel(time=num_files // 2).compute()
+        return
+
+    def time_read_frame_dask_free(self, num_files: int):
+        self.lazy_response[num_files // 2]
+        return
+
+    def time_build_catalog(self, num_files: int):
+        DatasetCatalog.build(self.paths)
+        return
+
+    def time_build_catalog_in_parallel(self, num_files: int):
+        DatasetCatalog.build(self.paths, num_threads=NUM_OPEN_THREADS)
+        return
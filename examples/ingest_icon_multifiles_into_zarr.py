@@ -0,0 +1,91 @@
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+from omnisuite_viz.ingest import ingest_into_zarr
+
+DESCRIPTION = """
+Convert one variable (and optionally a range of its levels) of multifile
+ICON netcdf outputs (e.g., `GWS_*` or `BAL_*` files) into a Zarr store with
+one time step of one level per chunk, which
+`plot_timelapsed_icon_multifiles_on_plate_carree_projection.py` accepts in
+place of the files, e.g.,
+
+    python examples/ingest_icon_multifiles_into_zarr.py gws_u.zarr \\
+        --netcdf-response-var-file-path GWS_2019* --concat-dim time \\
+        --netcdf-response-var-short-name u --level-start 70 --level-stop 75
+    python examples/plot_timelapsed_icon_multifiles_on_plate_carree_projection.py \\
+        output/ --no-save-animation --netcdf-response-var-file-path gws_u.zarr \\
+        --level-ix 72
+
+Each frame of an animation of the store then only reads and decompresses its
+own time step of the selected level. Requires `pip install zarr`.
+"""
+
+
+def main():
+    args = cli()
+    print("Ingesting...")
+    ingest_into_zarr(
+        args.netcdf_response_var_file_path,
+        args.netcdf_response_var_short_name,
+        args.store_path,
+        level_start=args.level_start,
+        level_stop=args.level_stop,
+        level_name=args.level_name,
+        concat_dim=args.concat_dim,
+        compression_level=args.compression_level)
+    print(f"Wrote {args.store_path}")
+    return
+
+
+def cli():
+    parser = ArgumentParser(
+        description=DESCRIPTION, formatter_class=RawTextHelpFormatter)
+
+    parser.add_argument(
+        "store_path", type=str, help="path of the Zarr store (overwritten)")
+
+    parser.add_argument(
+        "--netcdf-response-var-file-path",
+        nargs="+",
+        type=str,
+        help="path or paths or file glob to netcdf input data. (required)",
+        required=True)
+
+    default_netcdf_response_var_short_name = "u"
+    parser.add_argument(
+        "--netcdf-response-var-short-name",
+        type=str,
+        help="short name of the variable to ingest"
+        f" (default: {default_netcdf_response_var_short_name})",
+        default=default_netcdf_response_var_short_name)
+
+    parser.add_argument(
+        "--concat-dim", type=str, default=None,
+        help="name of axis to manually concatenate on for xarray, see the"
+        " ICON example. (default: None)")
+
+    parser.add_argument(
+        "--level-start", type=int, default=None,
+        help="index of the first level to keep. (default: the first)")
+
+    parser.add_argument(
+        "--level-stop", type=int, default=None,
+        help="index after the last level to keep. (default: the last)")
+
+    default_level_name = "lev"
+    parser.add_argument(
+        "--level-name", type=str, default=default_level_name,
+        help=f"name of the level axis. (default: {default_level_name})")
+
+    default_compression_level = 5
+    parser.add_argument(
+        "--compression-level", type=int, default=default_compression_level,
+        help="zstd compression level of the chunks."
+        f" (default: {default_compression_level})")
+
+    args = parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    main()
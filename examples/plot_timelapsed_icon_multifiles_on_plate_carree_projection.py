@@ -5,7 +5,6 @@ from argparse import (
 from dataclasses import dataclass
 from os import environ
 from pathlib import Path
-from time import time as time_in_seconds
 from typing import ClassVar
 
 from cdo import Cdo
@@ -17,9 +16,21 @@ from matplotlib.pyplot import imread
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 
 from omnisuite_viz.reader import AbstractReader
+from omnisuite_viz.catalog import DatasetCatalog
 from omnisuite_viz.grid import WorldMapNetcdfGrid
-from omnisuite_viz.animator_config import NetcdfAnimatorConfig
-from omnisuite_viz.animator import OmniSuiteWorldMapAnimator
+from omnisuite_viz.hyperslab import (
+    FileHandlePool, ReadStatistics, read_headers, read_level_hyperslabs)
+from omnisuite_viz.ingest import (
+    LEVEL_START_ATTR, expand_file_paths, is_zarr_store, open_zarr_store)
+from omnisuite_viz.lazy_array import TimeConcatenatedArray
+from omnisuite_viz.animator_config import (
+    NetcdfAnimatorConfig, get_shard_frames)
+from omnisuite_viz.manifest import fingerprint_array
+from omnisuite_viz.prefetch import PrefetchingFrameSource
+from omnisuite_viz.statistics import StatisticsSidecar, fingerprint_files
+from omnisuite_viz.timing import PhaseTimer
+from omnisuite_viz.animator import (
+    OmniSuiteWorldMapAnimator, PlateCarreeRasterAnimator)
 
 
 SECONDS_PER_MINUTE: int = 60
@@ -34,6 +45,11 @@ with xarray) rather than just a single file.
 
 See `tests/exploratory/run_gravity_wave_example` or
 `tests/exploratory/run_bal_example` for animation outputs on Levante.
+
+On a batch system, each task of a job array can render one shard of the
+frames into the same output_dir with `--shard $TASK_ID/$NUM_TASKS`, after
+which a final job with the same arguments and `--merge-shards` (instead of
+`--shard`) checks that all frames exist and builds the animation.
 """
 
 
@@ -41,10 +57,13 @@ def main():
     # -- begin parse cli --
     args = cli()
 
-    # load cdo after parsing for faster --help
-    print("Loading CDO...")
+    # load cdo after parsing for faster --help, Zarr stores and catalogs
+    # do not need it
     global cdo
-    cdo = Cdo()
+    if (args.catalog_path is None
+            and not is_zarr_store(args.netcdf_response_var_file_path[0])):
+        print("Loading CDO...")
+        cdo = Cdo()
 
     # config args
     save_animation: bool = args.save_animation
@@ -52,6 +71,9 @@ def main():
 
     plot_width_in_pixels: int = args.plot_width_in_pixels
     plot_height_in_pixels: int = args.plot_height_in_pixels
+    preview_resolutions: list[tuple[int, int]] = args.preview_resolutions
+    num_strips: int = args.num_strips
+    strip_orientation: str = args.strip_orientation
 
     cmap: str = args.cmap
     alpha: float = args.alpha
@@ -75,12 +97,51 @@ def main():
     show_colorbar: bool = args.show_colorbar
 
     level_ix: int = args.level_ix
+    prefetch_depth: int = args.prefetch_depth
+    push_down_level: bool = args.push_down_level
+    catalog_path: str = args.catalog_path
+    dask_free_response: bool = args.dask_free_response
+    num_open_threads: int = args.num_open_threads
+    max_open_files: int = args.max_open_files
 
     vmin: float = args.vmin
     vmax: float = args.vmax
     use_quantile_for_clim: bool = args.use_quantile_for_clim
+    clim_relative_accuracy: float = args.clim_relative_accuracy
+    statistics_dir: str = args.statistics_dir
+
+    num_workers: int = args.num_workers
+    parallel_backend: str = args.parallel_backend
+    dask_scheduler_address: str = args.dask_scheduler_address
+    frames_per_task: int = args.frames_per_task
+    use_cached_background: bool = args.use_cached_background
+    png_compress_level: int | None = args.png_compress_level
+    num_writer_threads: int = args.num_writer_threads
+    stream_to_ffmpeg: bool = args.stream_to_ffmpeg
+    save_frames: bool = args.save_frames
+    animation_format: str = args.animation_format
+    frames_per_second: float = args.frames_per_second
+    animation_quality: int = args.animation_quality
+    num_encoder_threads: int = args.num_encoder_threads
+    resume: bool = args.resume
+    backend: str = args.backend
+
+    shard: str = args.shard
+    frame_start: int = args.frame_start
+    frame_stop: int = args.frame_stop
+    merge_shards: bool = args.merge_shards
+    timing_report_path: str = args.timing_report
+    profile_memory: bool = args.profile_memory
+    trace_allocations: bool = args.trace_allocations
     # -- end parse cli --
 
+    # bounds the files that xarray keeps open, e.g., for open_mfdataset
+    xarr.set_options(file_cache_maxsize=max_open_files)
+
+    # reading is reported together with the phases of the animator
+    timer = PhaseTimer(
+        profile_memory=profile_memory, trace_allocations=trace_allocations)
+
     # read netcdf data, the blue marble image, and post process
     reader = ICONMultifileDataReader(
         netcdf_response_var_file_path=netcdf_response_var_file_path,
@@ -92,13 +153,17 @@ def main():
         show_timestamp=show_timestamp,
         time_delta_in_hours_between_consecutive_files=time_delta_in_hours_between_consecutive_files,
 
-        level_ix=level_ix)
+        level_ix=level_ix,
+        push_down_level=push_down_level,
+        catalog_path=catalog_path,
+        dask_free_response=dask_free_response,
+        num_open_threads=num_open_threads,
+        max_open_files=max_open_files,
+        timer=timer)
 
     print("Reading data...")
-    start_read = time_in_seconds()
     reader.read()
-    end_read = time_in_seconds()
-    elapsed_read = end_read - start_read
+    elapsed_read = timer.get_total_wall_time("read")
     read_time_in_minutes = int(elapsed_read // SECONDS_PER_MINUTE)
     read_time_in_seconds = elapsed_read % SECONDS_PER_MINUTE
     print(
@@ -111,9 +176,28 @@ def main():
     grid = reader.grid
     frame_to_new_timestamp = reader.frame_to_new_timestamp
     num_frames_in_animation = grid.response.shape[0]  # equal to n timesteps
+    if shard is not None:
+        shard_frames = get_shard_frames(shard, num_frames_in_animation)
+        frame_start, frame_stop = shard_frames.start, shard_frames.stop
 
     blue_marble_img = reader.blue_marble_img
 
+    print("Computing color limits...")
+    statistics_sidecar = None
+    if use_quantile_for_clim:
+        statistics_sidecar = StatisticsSidecar(
+            statistics_dir,
+            fingerprint_files(
+                netcdf_response_var_file_path,
+                variable=netcdf_response_var_short_name,
+                level_ix=level_ix,
+                concat_dim=concat_dim,
+                relative_accuracy=clim_relative_accuracy))
+    with timer.phase("compute_clim"):
+        clim = get_response_clim(
+            grid.response, vmin, vmax, use_quantile_for_clim,
+            statistics_sidecar, clim_relative_accuracy)
+
     # set up plotting configuration
     # TODO: can provide the timesteps array here if you want!!
     # subclass this config and specialize it...
@@ -125,10 +209,36 @@ def main():
         coastlines_kwargs={"lw": 0.0},
         plot_height_in_pixels=plot_height_in_pixels,
         plot_width_in_pixels=plot_width_in_pixels,
+        preview_resolutions=preview_resolutions,
+        num_strips=num_strips,
+        strip_orientation=strip_orientation,
 
         netcdf_var_cmap_on_plot=cmap,
         netcdf_var_transparency_on_plot=alpha,
 
+        num_workers=num_workers,
+        parallel_backend=parallel_backend,
+        dask_scheduler_address=dask_scheduler_address,
+        frames_per_task=frames_per_task,
+        use_cached_background=use_cached_background,
+        png_compress_level=png_compress_level,
+        num_writer_threads=num_writer_threads,
+        stream_to_ffmpeg=stream_to_ffmpeg,
+        save_frames=save_frames,
+        animation_format=animation_format,
+        frames_per_second=frames_per_second,
+        animation_quality=animation_quality,
+        num_encoder_threads=num_encoder_threads,
+        resume=resume,
+        frame_start=frame_start,
+        frame_stop=frame_stop,
+        timing_report_path=timing_report_path,
+        profile_memory=profile_memory,
+        trace_allocations=trace_allocations,
+
+        clim=clim,
+        prefetch_depth=prefetch_depth,
+
         netcdf_response_var_file_path=netcdf_response_var_file_path,
         blue_marble_path=blue_marble_path)
     # TODO: ugly hack to modify config inplace
@@ -141,16 +251,29 @@ def main():
     config.netcdf_response_var_units = reader.mfdataset[
         netcdf_response_var_short_name].attrs.get("units")
 
-    config.use_quantile_for_clim = use_quantile_for_clim
-    config.vmin = vmin
-    config.vmax = vmax
-
     # write the frames to disk
-    animator = ICONModelAnimator(
-        grid=grid, config=config, blue_marble_img=blue_marble_img)
-
-    print("Making animation...")
-    animator.animate()
+    if backend == "raster":
+        animator = PlateCarreeRasterAnimator(
+            grid=grid,
+            config=config,
+            background_img=blue_marble_img,
+            timer=timer)
+    else:
+        animator = ICONModelAnimator(
+            grid=grid,
+            config=config,
+            blue_marble_img=blue_marble_img,
+            timer=timer)
+
+    if merge_shards:
+        print("Merging shards...")
+        animator.merge_shards()
+    else:
+        print("Making animation...")
+        animator.animate()
+
+    if reader.read_statistics is not None:
+        print(reader.read_statistics.format())
 
     return
 
@@ -182,7 +305,9 @@ def cli():
         "--netcdf-response-var-file-path",
         nargs="+",
         type=str,
-        help="path or paths or file glob to netcdf input data. (required)",
+        help="path or paths or file glob to netcdf input data, or a Zarr"
+        " store of the response written by"
+        " `examples/ingest_icon_multifiles_into_zarr.py`. (required)",
         required=True)
 
     default_netcdf_response_var_short_name: str = "u"
@@ -210,6 +335,68 @@ def cli():
         default=default_level_ix
     )
 
+    read_group.add_argument(
+        "--push-down-level",
+        action=BooleanOptionalAction,
+        help="read only the level at --level-ix from the files with one"
+        " hyperslab per on-disk chunk, and report the bytes of the"
+        " chunks read versus the bytes used. Requires --concat-dim time."
+        " (default: True)",
+        default=True)
+
+    read_group.add_argument(
+        "--catalog-path",
+        type=str,
+        help="path of a catalog (e.g., catalog.json.gz) of the metadata of"
+        " the files, which is built if it does not exist, lists other"
+        " files, or any of its files was modified since. Reading from the"
+        " catalog neither starts CDO nor opens the files before their data"
+        " is read. The files are concatenated in order along time as with"
+        " --concat-dim time. (default: None)",
+        default=None)
+
+    read_group.add_argument(
+        "--dask-free-response",
+        action=BooleanOptionalAction,
+        help="read each frame of the level at --level-ix with a netCDF4"
+        " hyperslab of a file kept open in a pool, without building a dask"
+        " graph, which avoids the overhead of dask for very many files."
+        " Requires --concat-dim time or --catalog-path. (default: False)",
+        default=False)
+
+    default_num_open_threads = 8
+    read_group.add_argument(
+        "--num-open-threads",
+        type=int,
+        help="number of threads that open and inspect the files"
+        " concurrently (before open_mfdataset, when building the catalog,"
+        " and to get the on-disk layout of the response), which overlaps"
+        " the latency of opening files on parallel file systems like"
+        " Lustre. The netCDF library itself is called by one thread at a"
+        " time. 1 opens the files one after another."
+        f" (default: {default_num_open_threads})",
+        default=default_num_open_threads)
+
+    default_max_open_files = 64
+    read_group.add_argument(
+        "--max-open-files",
+        type=int,
+        help="maximum number of files kept open while reading, after which"
+        " the least recently used file is closed, which keeps the number"
+        " of file descriptors under the system limit when animating"
+        f" thousands of files. (default: {default_max_open_files})",
+        default=default_max_open_files)
+
+    default_prefetch_depth = 2
+    read_group.add_argument(
+        "--prefetch-depth",
+        type=int,
+        help="number of time steps read in the background ahead of the"
+        " frame being rendered, which hides read latency (e.g., when"
+        " crossing file boundaries). 0 reads each time step on demand."
+        f" (default: {default_prefetch_depth})",
+        default=default_prefetch_depth)
+
     try:
         default_blue_marble_path = Path(
             "assets/world.topo.bathy.200412.3x5400x2700.jpg")
@@ -240,6 +427,35 @@ def cli():
         help=f" (default: {default_plot_height_in_pixels})",
         default=default_plot_height_in_pixels)
 
+    config_group.add_argument(
+        "--preview-resolutions",
+        nargs="+",
+        type=parse_resolution,
+        help="WIDTHxHEIGHT of lower resolution previews (e.g., 2048x1024"
+        " 1024x512) that are downsampled from each rendered frame and"
+        " written to a subdirectory of output_dir named after the"
+        " resolution. (default: no previews)",
+        default=[])
+
+    default_num_strips = 1
+    config_group.add_argument(
+        "--num-strips",
+        type=int,
+        help="number of strips each frame is rendered in, which bounds the"
+        " memory of rendering very large frames (e.g., 16384x8192) by the"
+        " size of a strip. Not supported by the raster backend."
+        f" (default: {default_num_strips})",
+        default=default_num_strips)
+
+    default_strip_orientation = "horizontal"
+    config_group.add_argument(
+        "--strip-orientation",
+        choices=["horizontal", "vertical"],
+        help="split frames into bands of rows, which are written to the"
+        " png as they are rendered, or bands of columns."
+        f" (default: {default_strip_orientation})",
+        default=default_strip_orientation)
+
     default_alpha = 0.3
     config_group.add_argument(
         "--alpha",
@@ -322,8 +538,218 @@ def cli():
         action=BooleanOptionalAction,
         default=True,)
 
+    default_clim_relative_accuracy = 0.01
+    config_group.add_argument(
+        "--clim-relative-accuracy",
+        type=float,
+        help="relative error of the quantiles used for the color limits if"
+        " `--use-quantile-for-clim`. The quantiles are estimated in a single"
+        " pass over the data with memory that is independent of its size."
+        f" (default: {default_clim_relative_accuracy})",
+        default=default_clim_relative_accuracy)
+
+    default_statistics_dir = Path(
+        environ.get("XDG_CACHE_HOME", Path.home() / ".cache"),
+        "omnisuite-viz", "statistics")
+    config_group.add_argument(
+        "--statistics-dir",
+        type=str,
+        help="directory of the per-frame and global statistics of the"
+        " response, which are computed once per set of input files,"
+        " variable, and level and reused by later runs (e.g., with other"
+        " `--vmin`/`--vmax` quantiles)."
+        f" (default: {default_statistics_dir})",
+        default=default_statistics_dir)
+
+    default_num_workers = 1
+    config_group.add_argument(
+        "--num-workers",
+        type=int,
+        help="number of processes used to render the frames in parallel."
+        f" (default: {default_num_workers})",
+        default=default_num_workers)
+
+    default_parallel_backend = "processes"
+    config_group.add_argument(
+        "--parallel-backend",
+        choices=["processes", "dask"],
+        help="render frames in local processes or as dask.distributed tasks"
+        " (requires `pip install distributed`). With `dask`, `--num-workers`"
+        " is the number of workers of the local cluster."
+        f" (default: {default_parallel_backend})",
+        default=default_parallel_backend)
+
+    config_group.add_argument(
+        "--dask-scheduler-address",
+        type=str,
+        help="address of a running dask scheduler (e.g., tcp://host:8786)"
+        " to render on instead of a local cluster. (default: None)",
+        default=None)
+
+    default_frames_per_task = 8
+    config_group.add_argument(
+        "--frames-per-task",
+        type=int,
+        help="number of frames rendered by each dask task."
+        f" (default: {default_frames_per_task})",
+        default=default_frames_per_task)
+
+    config_group.add_argument(
+        "--use-cached-background",
+        help="Flag to render the blue marble once and only redraw the"
+        " response data and what is drawn above it (e.g., coastlines,"
+        " timestamp, and colorbar) in each frame. (default: False)",
+        action=BooleanOptionalAction,
+        default=False,)
+
+    config_group.add_argument(
+        "--png-compress-level",
+        type=int,
+        help="zlib compression level in [0, 9] of the png frames. Lower"
+        " levels write faster but produce larger files."
+        " (default: 1 with the raster backend, else 6)",
+        default=None)
+
+    default_num_writer_threads = 0
+    config_group.add_argument(
+        "--num-writer-threads",
+        type=int,
+        help="number of threads that encode and write frames while the"
+        " next frame is rendered. 0 writes each frame before rendering"
+        f" the next. (default: {default_num_writer_threads})",
+        default=default_num_writer_threads)
+
+    config_group.add_argument(
+        "--stream-to-ffmpeg",
+        help="Flag to pipe frames into ffmpeg while rendering instead of"
+        " building the animation from the png frames afterwards. Requires"
+        " `--save-animation` and a single worker. (default: False)",
+        action=BooleanOptionalAction,
+        default=False,)
+
+    config_group.add_argument(
+        "--save-frames",
+        help="Flag to write each frame as png. Disabling this is only valid"
+        " with `--stream-to-ffmpeg`. (default: True)",
+        action=BooleanOptionalAction,
+        default=True,)
+
+    default_animation_format = "gif"
+    config_group.add_argument(
+        "--animation-format",
+        choices=["gif", "mp4", "webm", "webp"],
+        help="container/codec of the animation: gif, mp4 (H.264),"
+        " webm (VP9), or animated webp. mp4 and webm require ffmpeg."
+        f" (default: {default_animation_format})",
+        default=default_animation_format)
+
+    default_frames_per_second = 2
+    config_group.add_argument(
+        "--frames-per-second",
+        type=float,
+        help="frame rate of the animation."
+        f" (default: {default_frames_per_second})",
+        default=default_frames_per_second)
+
+    config_group.add_argument(
+        "--animation-quality",
+        type=int,
+        help="crf of mp4/webm (lower is better) or quality in [0, 100] of"
+        " webp (higher is better). (default: encoder default)",
+        default=None)
+
+    default_num_encoder_threads = 0
+    config_group.add_argument(
+        "--num-encoder-threads",
+        type=int,
+        help="threads used by ffmpeg to encode the animation, 0 lets"
+        f" ffmpeg decide. (default: {default_num_encoder_threads})",
+        default=default_num_encoder_threads)
+
+    config_group.add_argument(
+        "--resume",
+        help="Flag to only render frames whose time step or plot settings"
+        " changed since a previous run into the same output_dir, e.g.,"
+        " after the run was killed. (default: False)",
+        action=BooleanOptionalAction,
+        default=False,)
+
+    default_backend = "matplotlib"
+    config_group.add_argument(
+        "--backend",
+        choices=["matplotlib", "raster"],
+        help="renderer of the frames. The 'raster' backend blends the"
+        " response over the blue marble directly with NumPy, which is"
+        " much faster but draws no timestamp, colorbar, or coastlines."
+        f" (default: {default_backend})",
+        default=default_backend)
+
+    config_group.add_argument(
+        "--timing-report",
+        type=str,
+        help="path of a .json or .csv report of the wall and cpu time of"
+        " reading, of each phase of the animation, and of each frame, which"
+        " is also summarized after animating. (default: None)",
+        default=None)
+
+    config_group.add_argument(
+        "--profile-memory",
+        help="Flag to also report the resident set size and its peak for"
+        " each phase and frame, and the largest arrays (response, blue"
+        " marble, frame buffers). (default: False)",
+        action=BooleanOptionalAction,
+        default=False)
+
+    config_group.add_argument(
+        "--trace-allocations",
+        help="Flag to also trace allocations with tracemalloc and report"
+        " the source lines that allocated the most memory in each phase,"
+        " which slows down the run considerably. (default: False)",
+        action=BooleanOptionalAction,
+        default=False)
+
+    shard_group = parser.add_argument_group(
+        "shard",
+        "render a subset of the frames, e.g., in a task of a job array. The"
+        " frames keep their index and the color limits of the whole"
+        " animation.")
+
+    shard_group.add_argument(
+        "--shard",
+        type=str,
+        help="render the i-th of n contiguous ranges of frames given as"
+        " 'i/n', with i in [0, n). (default: None)",
+        default=None)
+
+    shard_group.add_argument(
+        "--frame-start",
+        type=int,
+        help="first frame to render. (default: 0)",
+        default=0)
+
+    shard_group.add_argument(
+        "--frame-stop",
+        type=int,
+        help="frame after the last frame to render. (default: None, i.e.,"
+        " the last frame of the animation)",
+        default=None)
+
+    shard_group.add_argument(
+        "--merge-shards",
+        help="Flag to not render any frames, but check that all shards"
+        " rendered their frames with the same settings and then build the"
+        " animation (with --save-animation). (default: False)",
+        action=BooleanOptionalAction,
+        default=False)
+
     args = parser.parse_args()
 
+    if args.merge_shards or args.shard is not None:
+        assert args.frame_start == 0 and args.frame_stop is None, (
+            "--frame-start/--frame-stop select the frames themselves")
+    assert not (args.merge_shards and args.shard is not None), (
+        "--merge-shards merges all shards")
+
     if (args.show_timestamp
             and args.time_delta_in_hours_between_consecutive_files is None):
         raise ValueError
@@ -335,12 +761,44 @@ def cli():
         assert args.vmin < args.vmax, msg
         assert args.vmin >= 0 and args.vmin <= 1, msg
         assert args.vmax >= 0 and args.vmax <= 1, msg
+        assert 0 < args.clim_relative_accuracy < 1
+
+    if args.backend == "raster":
+        assert not (args.show_timestamp or args.show_colorbar), (
+            "the raster backend draws neither timestamps nor colorbars")
 
     assert args.timestamp_x_pos >= 0 and args.timestamp_x_pos <= 1.0
     assert args.timestamp_y_pos >= 0 and args.timestamp_y_pos <= 1.0
     return args
 
 
+def parse_resolution(resolution: str) -> tuple[int, int]:
+    width, height = resolution.lower().split("x")
+    return int(width), int(height)
+
+
+def get_response_clim(
+        response: xarr.DataArray,
+        vmin: float,
+        vmax: float,
+        use_quantile_for_clim: bool,
+        statistics_sidecar: StatisticsSidecar | None,
+        relative_accuracy: float = 0.01) -> tuple[float, float]:
+    """Color limits that emphasize a particular range of response values.
+
+    Both quantiles are estimated from the quantile sketch of the response
+    statistics (see `QuantileSketch` for the error bound). The statistics
+    are computed in a single parallel pass over the chunks of `response`
+    only if no earlier run stored them in `statistics_sidecar`, which is
+    only required if `use_quantile_for_clim`.
+    """
+    if not use_quantile_for_clim:
+        return vmin, vmax
+    response_statistics = statistics_sidecar.load_or_compute(
+        response, relative_accuracy=relative_accuracy)
+    return response_statistics.quantiles([vmin, vmax])
+
+
 class ICONMultifileDataReader(AbstractReader):
     """Read and postprocess multifile ICON data (e.g., gravity wave)."""
 
@@ -353,7 +811,14 @@ class ICONMultifileDataReader(AbstractReader):
             show_timestamp: bool = False,
             time_delta_in_hours_between_consecutive_files: int = 6,
             level_ix: int = 0,
-            level_name: str = "lev"):
+            level_name: str = "lev",
+            push_down_level: bool = True,
+            catalog_path: str = None,
+            dask_free_response: bool = False,
+            num_open_threads: int = 1,
+            max_open_files: int = 64,
+            timer: PhaseTimer | None = None):
+        super().__init__(timer)
 
         # TODO: keep public for now
         self.netcdf_response_var_file_path = netcdf_response_var_file_path
@@ -370,10 +835,21 @@ class ICONMultifileDataReader(AbstractReader):
         self.level_name = level_name
 
         self.level_ix = level_ix
+        self.push_down_level = push_down_level
+        self.catalog_path = catalog_path
+        self.dask_free_response = dask_free_response
+        self.num_open_threads = num_open_threads
+        self.max_open_files = max_open_files
 
         # Initialize read variables
         self.mfdataset = None
         self.response = None
+        # index of the first level of the data in the original files, which
+        # is nonzero for a Zarr store of a range of levels
+        self.level_start = 0
+        # bytes read by hyperslab reads of the level, see `postprocess`
+        self.read_statistics = None
+        self.catalog = None
         self.latitude = None
         self.longitude = None
 
@@ -387,20 +863,41 @@ class ICONMultifileDataReader(AbstractReader):
         self.blue_marble_img = None
         return
 
-    def read(self):
-        # load only the response variable to save memory
-        data_vars = cdo.showname(
-            input=self.netcdf_response_var_file_path[0],
-            autoSplit=' ')
-        data_vars_to_drop = [
-            var for var in data_vars
-            if var != self.netcdf_response_var_short_name]
-
-        self.mfdataset = xarr.open_mfdataset(
-            self.netcdf_response_var_file_path,
-            drop_variables=data_vars_to_drop,
-            concat_dim=self.concat_dim,
-            combine="nested" if self.concat_dim is not None else "by_coords")
+    def _read(self):
+        if is_zarr_store(self.netcdf_response_var_file_path[0]):
+            # already holds only the response with a chunk per time step
+            # and level
+            assert len(self.netcdf_response_var_file_path) == 1, (
+                "expected a single Zarr store")
+            self.mfdataset = open_zarr_store(
+                self.netcdf_response_var_file_path[0])
+            self.level_start = self.mfdataset.attrs.get(LEVEL_START_ATTR, 0)
+        elif self.catalog_path is not None:
+            self.catalog = self._load_or_build_catalog()
+            self.mfdataset = self.catalog.to_dataset(
+                [self.netcdf_response_var_short_name])
+        else:
+            # load only the response variable to save memory
+            data_vars = cdo.showname(
+                input=self.netcdf_response_var_file_path[0],
+                autoSplit=' ')
+            data_vars_to_drop = [
+                var for var in data_vars
+                if var != self.netcdf_response_var_short_name]
+
+            # open_mfdataset(parallel=True) is not thread safe with the
+            # netCDF4 backend (its attributes are read without a lock), so
+            # only the latency of opening the files overlaps
+            read_headers(
+                expand_file_paths(self.netcdf_response_var_file_path),
+                self.num_open_threads)
+            self.mfdataset = xarr.open_mfdataset(
+                self.netcdf_response_var_file_path,
+                drop_variables=data_vars_to_drop,
+                concat_dim=self.concat_dim,
+                combine=(
+                    "nested" if self.concat_dim is not None
+                    else "by_coords"))
 
         self.response: xarr.DataArray = (
             self.mfdataset[self.netcdf_response_var_short_name])
@@ -423,8 +920,63 @@ class ICONMultifileDataReader(AbstractReader):
 
         return
 
-    def postprocess(self):
-        self.response = self.response.isel({self.level_name: self.level_ix})
+    def _load_or_build_catalog(self) -> DatasetCatalog:
+        print("Loading catalog...")
+        return DatasetCatalog.load_or_build(
+            self.catalog_path,
+            expand_file_paths(self.netcdf_response_var_file_path),
+            num_threads=self.num_open_threads)
+
+    def _postprocess(self):
+        level_ix = self.level_ix - self.level_start
+        assert 0 <= level_ix < self.response.sizes[self.level_name], (
+            f"level {self.level_ix} is not in the data")
+        response = self.response.isel({self.level_name: level_ix})
+
+        # files concatenated in order can be read directly, whereas a
+        # Zarr store has a chunk per time step and level already
+        if ((self.push_down_level or self.dask_free_response)
+                and (self.catalog is not None
+                     or self.concat_dim == response.dims[0])
+                and not is_zarr_store(self.netcdf_response_var_file_path[0])):
+            self.read_statistics = ReadStatistics()
+            # keeps the files open between the reads of the frames
+            pool = FileHandlePool(self.max_open_files)
+            if self.catalog is not None:
+                paths = self.catalog.paths
+                layouts = [
+                    entry.variables[self.netcdf_response_var_short_name]
+                    for entry in self.catalog.files]
+            else:
+                paths = expand_file_paths(self.netcdf_response_var_file_path)
+                layouts = None
+            if self.dask_free_response:
+                # reads each frame directly, but is not an xarray.DataArray
+                lazy_response = TimeConcatenatedArray(
+                    paths,
+                    self.netcdf_response_var_short_name,
+                    level_ix,
+                    self.level_name,
+                    layouts=layouts,
+                    pool=pool,
+                    statistics=self.read_statistics,
+                    num_threads=self.num_open_threads)
+                assert lazy_response.shape == response.shape
+                response = lazy_response
+            else:
+                level_data = read_level_hyperslabs(
+                    paths,
+                    self.netcdf_response_var_short_name,
+                    level_ix,
+                    self.level_name,
+                    dtype=response.dtype,
+                    statistics=self.read_statistics,
+                    layouts=layouts,
+                    num_threads=self.num_open_threads,
+                    pool=pool)
+                assert level_data.shape == response.shape
+                response = response.copy(data=level_data)
+        self.response = response
 
         if self.show_timestamp:
             time = self.mfdataset["time"].compute().values
@@ -477,17 +1029,18 @@ class ICONMultifileDataReader(AbstractReader):
 
 
 class ICONModelAnimator(OmniSuiteWorldMapAnimator):
-    def __init__(self, grid, config, blue_marble_img):
+    def __init__(self, grid, config, blue_marble_img, timer=None):
         """
         TODO: Ugly constructor??
         """
-        super().__init__(grid, config)
+        super().__init__(grid, config, timer)
         self._grid: WorldMapNetcdfGrid
         self._config: NetcdfAnimatorConfig
         self._blue_marble_img = blue_marble_img
 
         self._mesh = None
         self.textbox = None
+        self._frame_source = None
         return
 
     def _plot_initial_frame(self):
@@ -499,14 +1052,15 @@ class ICONModelAnimator(OmniSuiteWorldMapAnimator):
             transform=self._config.transform,
             zorder=zorder_blue_marble,)
 
-        # overlay the initial data on the blue marble
+        # overlay the first frame of the shard on the blue marble, which is
+        # then rendered first and prefetching continues after it
         # TODO: assumes there is a time field
-        t0 = 0
-        response_at_time: ndarray = (
-            self._grid.response
-            .isel(time=t0)
-            .compute()
-            .values)
+        t0 = self._config.frame_start
+        self._frame_source = PrefetchingFrameSource(
+            self._grid.response,
+            self._config.prefetch_depth,
+            stop=self._config.frame_stop)
+        response_at_time: ndarray = self._frame_source[t0]
 
         self._mesh = self._ax.pcolormesh(
             self._grid.longitude,
@@ -519,24 +1073,9 @@ class ICONModelAnimator(OmniSuiteWorldMapAnimator):
             cmap=self._config.netcdf_var_cmap_on_plot)
 
         # Set the color limits to emphasize a particular range of response
-        # varaible values
-        if self._config.use_quantile_for_clim:
-            response_clim_max = (
-                self._grid.response
-                .quantile(self._config.vmax)
-                .compute()
-                .values)
-
-            response_clim_min = (
-                self._grid.response
-                .quantile(self._config.vmin)
-                .compute()
-                .values)
-        else:
-            response_clim_max = self._config.vmax
-            response_clim_min = self._config.vmin
-
-        self._mesh.set_clim(response_clim_min, response_clim_max)
+        # varaible values (see `get_response_clim`)
+        if self._config.clim is not None:
+            self._mesh.set_clim(*self._config.clim)
 
         # Initialize the timestamp lable
         if self._config.frame_to_new_timestamp is not None:
@@ -575,22 +1114,53 @@ class ICONModelAnimator(OmniSuiteWorldMapAnimator):
 
         return
 
+    def _get_animated_artists(self):
+        animated_artists = [self._mesh]
+        if self.textbox is not None:
+            animated_artists.append(self.textbox)
+        return animated_artists
+
+    def _get_render_fingerprint(self) -> dict:
+        render_fingerprint = super()._get_render_fingerprint()
+        render_fingerprint.update(
+            cmap=self._config.netcdf_var_cmap_on_plot,
+            alpha=self._config.netcdf_var_transparency_on_plot,
+            clim=[float(c) for c in self._mesh.get_clim()],
+            blue_marble=fingerprint_array(self._blue_marble_img).hex(),
+            blue_marble_extent=list(self._config.blue_marble_extent),
+            timestamp_pos=[
+                self._config.timestamp_x_pos, self._config.timestamp_y_pos],
+            show_colorbar=self._config.show_colorbar,
+            colorbar_label=[
+                self._config.netcdf_response_var_short_name,
+                self._config.netcdf_response_var_units])
+        return render_fingerprint
+
+    def _get_frame_fingerprint(self, frame: int) -> bytes:
+        frame_fingerprint = fingerprint_array(self._frame_source[frame])
+        if self._config.frame_to_new_timestamp is not None:
+            frame_fingerprint += str(
+                self._config.frame_to_new_timestamp[frame]).encode()
+        return frame_fingerprint
+
     def _update_frame(self, frame: int):
         if self._config.frame_to_new_timestamp is not None:
             self.textbox.set_text(self._config.frame_to_new_timestamp[frame])
 
         # Update frame with the value of the response variable at next
         # frame where frame == timestep (e.g., 12 timesteps ==> 12 frames)
-        response_at_time: ndarray = (
-            self._grid.response
-            .isel(time=frame)
-            .compute()
-            .values)
+        # while the following timesteps are read in the background
+        response_at_time: ndarray = self._frame_source[frame]
 
         self._mesh.set_array(response_at_time)
 
         return
 
+    def _close_figure(self):
+        self._frame_source.close()
+        super()._close_figure()
+        return
+
 
 if __name__ == "__main__":
     main()
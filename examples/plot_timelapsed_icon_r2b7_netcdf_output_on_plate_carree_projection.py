@@ -275,6 +275,7 @@ class IconDataReader(AbstractReader):
             ICONMonthlyConfigConsts.TROPOSPHERE_BEGIN_HEIGHT_IN_METERS),
         max_vertical_layer_height_in_meters: float = (
             ICONMonthlyConfigConsts.TROPOSPHERE_END_HEIGHT_IN_METERS)):
+        super().__init__()
 
         # TODO: keep public for now
         self.netcdf_response_var_file_path = netcdf_response_var_file_path
@@ -293,7 +294,7 @@ class IconDataReader(AbstractReader):
         self.blue_marble_img = None
         return
 
-    def read(self):
+    def _read(self):
         # load datasets and define variable name maps
         self._netcdf_response_var_file = Dataset(
             self.netcdf_response_var_file_path)
@@ -360,7 +361,7 @@ class IconDataReader(AbstractReader):
         self.blue_marble_img = imread(self.blue_marble_path)
         return
 
-    def postprocess(self):
+    def _postprocess(self):
         # Use the upper and lower bounds of height to average response var...
         # thus converting 4th order tensor to 3rd order tensor for plotting..
         # this requires determining the index of the upper and lower bounds!
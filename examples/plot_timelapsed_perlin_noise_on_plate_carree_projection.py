@@ -4,12 +4,16 @@ from noise import pnoise3
 import os
 
 from omnisuite_viz.animator import OmniSuiteWorldMapAnimator
-from omnisuite_viz.animator_config import OmniSuiteAnimatorConfig
+from omnisuite_viz.animator_config import (
+    OmniSuiteAnimatorConfig, get_shard_frames)
 from omnisuite_viz.grid import WorldMapRectangularGrid
 
 DESCRIPTION = """
 Save animation frames (and optionally combine the frames to a gif) of Perlin
 noise on Plate-Carree projection. A trivial example with artificial data.
+
+Shards of the frames can be rendered by separate jobs into the same output_dir
+with `--shard i/n`, and merged into an animation with `--merge-shards`.
 """
 
 
@@ -26,6 +30,15 @@ def main():
 
     save_animation: bool = args.save_animation
     num_frames_in_animation: int = args.num_frames_in_animation
+    num_workers: int = args.num_workers
+    use_cached_background: bool = args.use_cached_background
+    resume: bool = args.resume
+    frame_start: int = args.frame_start
+    frame_stop: int = args.frame_stop
+    if args.shard is not None:
+        shard_frames = get_shard_frames(args.shard, num_frames_in_animation)
+        frame_start, frame_stop = shard_frames.start, shard_frames.stop
+    merge_shards: bool = args.merge_shards
 
     # perform animation
     grid = WorldMapRectangularGrid()
@@ -35,11 +48,19 @@ def main():
         num_frames_in_animation=num_frames_in_animation,
         plot_width_in_pixels=plot_width_in_pixels,
         plot_height_in_pixels=plot_height_in_pixels,
+        num_workers=num_workers,
+        use_cached_background=use_cached_background,
+        resume=resume,
+        frame_start=frame_start,
+        frame_stop=frame_stop,
         output_dir=output_dir)
 
     animator = PerlinNoiseAnimator(grid, config)
 
-    animator.animate()
+    if merge_shards:
+        animator.merge_shards()
+    else:
+        animator.animate()
 
     return
 
@@ -74,8 +95,63 @@ def cli():
         type=int,
         default=default_num_frames_in_animation)
 
+    default_num_workers = 1
+    parser.add_argument(
+        "--num-workers",
+        help="number of processes used to render the frames in parallel."
+        f" (default: {default_num_workers})",
+        type=int,
+        default=default_num_workers)
+
+    parser.add_argument(
+        "--use-cached-background",
+        help="render the static artists (e.g., coastlines) below the noise"
+        " once and blit only the animated noise and what is drawn above it"
+        " in each frame. (default: False)",
+        action=BooleanOptionalAction,
+        default=False)
+
+    parser.add_argument(
+        "--resume",
+        help="only render frames that are missing or changed since a"
+        " previous run into the same output_dir. (default: False)",
+        action=BooleanOptionalAction,
+        default=False)
+
+    parser.add_argument(
+        "--shard",
+        help="only render the i-th of n contiguous ranges of frames given"
+        " as 'i/n', with i in [0, n). (default: None)",
+        type=str,
+        default=None)
+
+    parser.add_argument(
+        "--frame-start",
+        help="first frame to render. (default: 0)",
+        type=int,
+        default=0)
+
+    parser.add_argument(
+        "--frame-stop",
+        help="frame after the last frame to render. (default: None)",
+        type=int,
+        default=None)
+
+    parser.add_argument(
+        "--merge-shards",
+        help="check that all shards rendered their frames and build the"
+        " animation instead of rendering. (default: False)",
+        action=BooleanOptionalAction,
+        default=False)
+
     args = parser.parse_args()
 
+    if args.merge_shards or args.shard is not None:
+        assert args.frame_start == 0 and args.frame_stop is None, (
+            "--frame-start/--frame-stop select the frames themselves")
+    assert not (args.merge_shards and args.shard is not None), (
+        "--merge-shards merges all shards")
+
     return args
 
 
@@ -112,6 +188,17 @@ class PerlinNoiseAnimator(OmniSuiteWorldMapAnimator):
 
         return
 
+    def _get_animated_artists(self):
+        return [self._mesh]
+
+    def _get_frame_fingerprint(self, frame: int) -> bytes:
+        # the noise field is a deterministic function of these values
+        return repr((
+            frame,
+            self._spatial_scale,
+            self._temporal_scale,
+            self._seed)).encode()
+
     def _update_frame(self, frame: int):
         self._update_perlin_noise_field(frame)
         self._mesh.set_array(self._perlin_noise_field.ravel())
@@ -0,0 +1,111 @@
+from argparse import ArgumentParser, BooleanOptionalAction
+from datetime import datetime
+
+from omnisuite_viz.synthetic import (
+    SyntheticICONConfig, write_synthetic_icon_files)
+
+DESCRIPTION = """
+Write synthetic NetCDF files laid out like the multifile ICON outputs (e.g.,
+`GWS_*` or `BAL_*` files), which can be animated with
+`plot_timelapsed_icon_multifiles_on_plate_carree_projection.py` or used to
+benchmark reading them off the cluster, e.g., at the scale of the Levante
+gravity wave files
+
+    python examples/write_synthetic_icon_multifiles.py synthetic/ \\
+        --num-files 28 --num-levels 152 --num-latitudes 512 \\
+        --num-longitudes 1024 --compression-level 1
+"""
+
+
+def main():
+    args = cli()
+    defaults = SyntheticICONConfig()
+    config = SyntheticICONConfig(
+        prefix=args.prefix,
+        num_files=args.num_files,
+        num_times_per_file=args.num_times_per_file,
+        num_levels=args.num_levels,
+        num_latitudes=args.num_latitudes,
+        num_longitudes=args.num_longitudes,
+        variables=tuple(args.variables or defaults.variables),
+        start_time=datetime.fromisoformat(args.start_time),
+        time_step_in_hours=args.time_step_in_hours,
+        restart_time_per_file=args.restart_time_per_file,
+        chunks=tuple(args.chunks) if args.chunks is not None else None,
+        compression_level=args.compression_level)
+    paths = write_synthetic_icon_files(args.output_dir, config)
+    print(f"Wrote {len(paths)} files to {args.output_dir}")
+    return
+
+
+def cli():
+    defaults = SyntheticICONConfig()
+    parser = ArgumentParser(description=DESCRIPTION)
+
+    parser.add_argument(
+        "output_dir", type=str, help="directory of the written files")
+
+    parser.add_argument(
+        "--prefix", type=str, default=defaults.prefix,
+        help="prefix of the file names, e.g., GWS or BAL"
+        f" (default: {defaults.prefix})")
+
+    parser.add_argument(
+        "--num-files", type=int, default=defaults.num_files,
+        help=f"(default: {defaults.num_files})")
+
+    parser.add_argument(
+        "--num-times-per-file", type=int, default=defaults.num_times_per_file,
+        help=f"(default: {defaults.num_times_per_file})")
+
+    parser.add_argument(
+        "--num-levels", type=int, default=defaults.num_levels,
+        help=f"(default: {defaults.num_levels})")
+
+    parser.add_argument(
+        "--num-latitudes", type=int, default=defaults.num_latitudes,
+        help=f"(default: {defaults.num_latitudes})")
+
+    parser.add_argument(
+        "--num-longitudes", type=int, default=defaults.num_longitudes,
+        help=f"(default: {defaults.num_longitudes})")
+
+    parser.add_argument(
+        "--variables", type=str, nargs="+", default=None,
+        help="short names of the variables"
+        f" (default: {' '.join(defaults.variables)})")
+
+    parser.add_argument(
+        "--start-time", type=str,
+        default=defaults.start_time.isoformat(),
+        help="iso format time of the first time step"
+        f" (default: {defaults.start_time.isoformat()})")
+
+    parser.add_argument(
+        "--time-step-in-hours", type=int,
+        default=defaults.time_step_in_hours,
+        help=f"(default: {defaults.time_step_in_hours})")
+
+    parser.add_argument(
+        "--restart-time-per-file", action=BooleanOptionalAction,
+        default=defaults.restart_time_per_file,
+        help="label the times of every file from the start time, like"
+        " outputs that must be read with `--concat-dim time`")
+
+    parser.add_argument(
+        "--chunks", type=int, nargs=4, default=None,
+        metavar=("TIME", "LEV", "LAT", "LON"),
+        help="NetCDF chunk sizes (default: chosen by the library)")
+
+    parser.add_argument(
+        "--compression-level", type=int,
+        default=defaults.compression_level,
+        help="zlib compression level, 0 does not compress"
+        f" (default: {defaults.compression_level})")
+
+    args = parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    main()
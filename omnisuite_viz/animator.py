@@ -1,36 +1,78 @@
 """Classes for writing/animating frames that can be imported into OmniSuite."""
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from copy import copy
+from functools import partial
+from hashlib import sha256
+from io import BytesIO
+import json
+from matplotlib.artist import Artist
+from matplotlib.axes import Axes
 import matplotlib.pyplot as plt
-from os import listdir
-from os.path import join, getctime
+import numpy as np
+from os import makedirs
+from os.path import basename, join, splitext
 from PIL import Image
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 from subprocess import run
+from time import perf_counter, time
 from warnings import warn
 
 from tqdm import tqdm
 
-from omnisuite_viz.grid import Grid, LatLonGrid
+from omnisuite_viz.grid import Grid, LatLonGrid, WorldMapNetcdfGrid
 from omnisuite_viz.animator_config import (
-    AnimatorConfig, OmniSuiteAnimatorConfig)
+    AnimatorConfig, NetcdfAnimatorConfig, OmniSuiteAnimatorConfig)
+from omnisuite_viz.manifest import (
+    FrameManifest, FrameManifestWriter, FrameRecord, fingerprint_array)
+from omnisuite_viz.prefetch import PrefetchingFrameSource
+from omnisuite_viz.raster import (
+    ColormapBlender, GridResampler, plate_carree_pixel_centers)
+from omnisuite_viz.timing import PhaseTimer, find_arrays
+from omnisuite_viz.writer import (
+    AsyncFrameWriter, FFmpegImagePipeWriter, FFmpegStreamWriter,
+    StreamingGifWriter, StreamingPngWriter, encode_animation_from_files,
+    encode_frame, ffmpeg_output_args, write_bytes, write_frame)
 
 
 class Animator(ABC):
+    """Render the frames of a grid and save them as an animation.
 
-    def __init__(self, grid: Grid, config: AnimatorConfig, *args, **kwargs):
+    The wall and CPU time of animating and of its phases are recorded in
+    `timer`, a new `PhaseTimer` if None.
+    """
+
+    def __init__(
+            self,
+            grid: Grid,
+            config: AnimatorConfig,
+            *args,
+            timer: Optional[PhaseTimer] = None,
+            **kwargs):
         self._grid = grid
         self._config = config
+        self.timer = PhaseTimer() if timer is None else timer
         return
 
     def animate(self):
-        self._configure_initial_frame()
-        self._plot_initial_frame()
-        self._update_and_save_frames()
-        if self._config.save_animation:
-            self._save_animation()
+        with self.timer.phase("animate"):
+            self._render_frames()
+            if self._config.save_animation:
+                self._save_animation()
         print(f"Results written to: {self._config.output_dir}")
         return
 
+    def _render_frames(self):
+        with self.timer.phase("configure_initial_frame"):
+            self._configure_initial_frame()
+        with self.timer.phase("plot_initial_frame"):
+            self._plot_initial_frame()
+        with self.timer.phase("update_and_save_frames"):
+            self._update_and_save_frames()
+        return
+
     @abstractmethod
     def _configure_initial_frame():
         raise NotImplementedError
@@ -48,9 +90,10 @@ class Animator(ABC):
         raise NotImplementedError
 
     def _save_animation(self):
-        frames = self._open_frames()
-        self._save_frames_as_animation(frames)
-        self._close_frames(frames)
+        with self.timer.phase("save_animation"):
+            frames = self._open_frames()
+            self._save_frames_as_animation(frames)
+            self._close_frames(frames)
         return
 
     @abstractmethod
@@ -67,15 +110,100 @@ class Animator(ABC):
 
 
 class OmniSuiteWorldMapAnimator(Animator):
-    """Animate world map frames that can be used in OmniSuite."""
+    """Animate world map frames that can be used in OmniSuite.
+
+    If `config.num_workers > 1`, the frames are split into contiguous ranges
+    that are rendered by a pool of worker processes, each of which builds its
+    own figure via `_configure_initial_frame` and `_plot_initial_frame`. For
+    the output to match the serial output, `_update_frame(frame)` must only
+    depend on `frame` and not on the frames drawn before it.
+
+    If `config.use_cached_background`, everything drawn before the artists
+    returned by `_get_animated_artists` (in the order of the zorders of the
+    figure's axes and of their artists) is rasterized once, and each frame
+    redraws the animated artists and the artists drawn after them (e.g.,
+    coastlines above the response or a colorbar axes) on top of that cached
+    buffer, so that frames match a full redraw. The animated artists must be
+    artists of the figure or of its axes.
+
+    If `config.num_writer_threads > 0`, the pixels of each frame are handed to
+    an `AsyncFrameWriter` so that png encoding and writing of a frame overlap
+    with rendering of the next frame.
+
+    If `config.num_strips > 1`, each frame is rendered as that many
+    horizontal or vertical strips on a strip sized canvas and stitched into
+    the written frame (see `_draw_strips`), so the memory of rendering scales
+    with the strip rather than the frame.
+
+    Only the frames `config.get_frames_to_render()` are rendered, e.g., one
+    shard of a batch job array. After all shards rendered their frames into
+    the same output directory, `merge_shards` validates them and builds the
+    animation.
+
+    If `config.stream_to_ffmpeg`, the pixels of each frame are piped into an
+    ffmpeg subprocess that encodes the animation while frames are rendered,
+    and png frames are only written if `config.save_frames`.
+
+    The wall and CPU time of each phase of `animate`, and of updating and
+    saving each frame, are recorded in `timer` (also in parallel workers).
+    If `config.timing_report_path` is given, they are written to that report
+    and summarized after animating. Pass the `timer` of the reader (see
+    `AbstractReader`) to report reading the data alongside. A timer built
+    from `config` profiles memory as configured below.
+
+    If `config.profile_memory`, the timings also record the (peak) resident
+    set size of each phase, and the largest arrays (e.g., the response, the
+    background, and frame buffers) are recorded after plotting the initial
+    frame and after rendering the frames. `config.trace_allocations`
+    additionally records the source lines that allocated the most memory.
+
+    Every written frame is recorded in a `FrameManifest` in the output
+    directory, which is the only source of frame order and file names for
+    assembling the animation.
+
+    Each record carries a frame key, a hash of `_get_render_fingerprint` and
+    `_get_frame_fingerprint(frame)`. If `config.resume`, a frame whose
+    previous record has the same key and whose file is intact is not
+    rendered again. Frames are only keyed by subclasses that override
+    `_get_frame_fingerprint`, and as for parallel rendering,
+    `_update_frame(frame)` must not depend on the frames drawn before it.
+    """
+    # zlib level of png frames if `config.png_compress_level` is None
+    DEFAULT_PNG_COMPRESS_LEVEL = 6
+
     @staticmethod
     def get_rectangle_for_full_plot_on_omniglobe():
         rectangle_for_full_plot_on_omniglobe = [0, 0, 1, 1]
         return rectangle_for_full_plot_on_omniglobe
 
-    def __init__(self, grid: LatLonGrid, config: OmniSuiteAnimatorConfig):
-        self._grid = grid
-        self._config = config
+    def __init__(
+            self,
+            grid: LatLonGrid,
+            config: OmniSuiteAnimatorConfig,
+            timer: Optional[PhaseTimer] = None):
+        if timer is None:
+            timer = PhaseTimer(
+                profile_memory=config.profile_memory,
+                trace_allocations=config.trace_allocations)
+        super().__init__(grid, config, timer=timer)
+        self._background = None
+        # drawn on top of the background in every frame, in draw order
+        self._foreground_artists: List[Artist] = []
+        self._writer: Optional[AsyncFrameWriter] = None
+        self._animation_stream: Optional[FFmpegStreamWriter] = None
+        # one per output directory, see `_get_output_dirs`
+        self._manifest_writers: List[FrameManifestWriter] = []
+        self._previous_manifests: List[FrameManifest] = []
+        self._render_fingerprint: Optional[bytes] = None
+        self._frame_pixels: Optional[np.ndarray] = None
+        return
+
+    def animate(self):
+        super().animate()
+        if self._config.timing_report_path is not None:
+            self.timer.write_report(self._config.timing_report_path)
+            print(self.timer.format_summary())
+            print(f"Timings written to: {self._config.timing_report_path}")
         return
 
     def _configure_initial_frame(self):
@@ -90,70 +218,692 @@ class OmniSuiteWorldMapAnimator(Animator):
     def _plot_initial_frame(self):
         return
 
+    def _get_png_compress_level(self) -> int:
+        if self._config.png_compress_level is None:
+            return self.DEFAULT_PNG_COMPRESS_LEVEL
+        return self._config.png_compress_level
+
+    def _get_animated_artists(self) -> List[Artist]:
+        """Artists changed by `_update_frame`, override for cached background."""
+        return []
+
+    def _get_render_fingerprint(self) -> dict:
+        """Json serializable settings that change the pixels of every frame.
+
+        Extend this with the settings of a subclass, e.g., its color map.
+        """
+        return {
+            "animator": type(self).__qualname__,
+            "size_in_pixels": [
+                self._config.plot_width_in_pixels,
+                self._config.plot_height_in_pixels],
+            "figsize": list(self._config.figsize),
+            "projection": self._config.projection.proj4_init,
+            "transform": self._config.transform.proj4_init,
+            "coastlines_kwargs": self._config.coastlines_kwargs,
+            # cached backgrounds and strips may differ in antialiased edges
+            "use_cached_background": self._config.use_cached_background,
+            "strips": [
+                self._config.num_strips, self._config.strip_orientation],
+            "latitude": fingerprint_array(self._grid.latitude).hex(),
+            "longitude": fingerprint_array(self._grid.longitude).hex(),
+        }
+
+    def _get_frame_fingerprint(self, frame: int) -> Optional[bytes]:
+        """Digest of the input of `frame`, e.g., its time slice.
+
+        None means that the input is unknown, so the frame is always
+        rendered. Override this to make frames resumable.
+        """
+        return None
+
+    def _digest_render_fingerprint(self) -> bytes:
+        return sha256(json.dumps(
+            self._get_render_fingerprint(),
+            sort_keys=True,
+            default=str).encode()).digest()
+
+    def _get_render_key(self) -> Optional[str]:
+        if self._render_fingerprint is None:
+            return None
+        return self._render_fingerprint.hex()
+
+    def _get_frame_key(self, frame: int) -> Optional[str]:
+        if self._render_fingerprint is None:
+            return None
+        frame_fingerprint = self._get_frame_fingerprint(frame)
+        if frame_fingerprint is None:
+            return None
+        return sha256(self._render_fingerprint + frame_fingerprint).hexdigest()
+
+    def _render_frames(self):
+        if self._config.parallel_backend == "dask":
+            self._render_frames_on_dask()
+        elif self._config.num_workers > 1:
+            self._render_frames_in_parallel()
+        else:
+            self._set_up_figure()
+            try:
+                self._update_and_save_frames()
+            finally:
+                self._close_figure()
+        return
+
+    def _set_up_figure(self):
+        with self.timer.phase("configure_initial_frame"):
+            self._configure_initial_frame()
+        with self.timer.phase("plot_initial_frame"):
+            self._plot_initial_frame()
+        self._record_arrays("plot_initial_frame")
+        return
+
+    def _record_arrays(self, phase: str):
+        """Record the largest arrays of the grid and animator in `timer`."""
+        if not self.timer.profile_memory:
+            return
+        name_to_array = find_arrays("grid", self._grid)
+        name_to_array.update(find_arrays("animator", self))
+        if (self._background is not None
+                and not isinstance(self._background, np.ndarray)):
+            name_to_array["animator._background"] = np.asarray(
+                self._background)  # the cached region of the canvas
+        fig = getattr(self, "_fig", None)
+        renderer = getattr(fig.canvas, "renderer", None) if fig else None
+        if renderer is not None:  # i.e., the figure was drawn
+            name_to_array["figure.canvas"] = np.asarray(
+                renderer.buffer_rgba())
+        self.timer.record_arrays(phase, name_to_array)
+        return
+
+    def _cache_background_if_configured(self):
+        if self._config.use_cached_background:
+            with self.timer.phase("cache_background"):
+                self._cache_background()
+        return
+
+    def _render_frames_on_dask(self):
+        """Render frames as dask.distributed tasks and write them in order.
+
+        Each task renders `config.frames_per_task` frames on its own figure
+        and returns them encoded (see `_render_encoded_frame_range`). This
+        process writes the encoded frames, records them in the manifest, and
+        pipes them into ffmpeg if `config.stream_to_ffmpeg`, in animation
+        order while later tasks are still rendering. At most
+        `2*config.num_workers` tasks are submitted at once, which bounds the
+        encoded frames held in memory.
+        """
+        try:
+            from dask.distributed import Client, LocalCluster
+        except ImportError as error:
+            raise RuntimeError(
+                "The dask backend requires `dask.distributed`, e.g.,"
+                " `pip install distributed`.") from error
+
+        frames = self._config.get_frames_to_render()
+        frames_per_task = self._config.frames_per_task
+        frame_ranges = [
+            range(start, min(start + frames_per_task, frames.stop))
+            for start in range(frames.start, frames.stop, frames_per_task)]
+        max_pending_tasks = 2*self._config.num_workers
+
+        with ExitStack() as stack:
+            if self._config.dask_scheduler_address is None:
+                scheduler = stack.enter_context(LocalCluster(
+                    n_workers=self._config.num_workers,
+                    threads_per_worker=1))
+            else:
+                scheduler = self._config.dask_scheduler_address
+            client = stack.enter_context(Client(scheduler))
+            # sent once per worker instead of with every task
+            [animator] = client.scatter([self], broadcast=True)
+
+            manifest_writer = None
+            if self._config.save_frames:
+                manifest_writer = stack.enter_context(FrameManifestWriter(
+                    join(
+                        self._config.output_dir,
+                        FrameManifest.get_file_name(frames))))
+            pipe_writer = None
+            if self._config.stream_to_ffmpeg:
+                pipe_writer = stack.enter_context(FFmpegImagePipeWriter(
+                    self._config.path_to_save_animation,
+                    self._config.frames_per_second,
+                    self._ffmpeg_output_args()))
+            progress_bar = stack.enter_context(
+                tqdm(total=len(frames), desc="Updating frames"))
+
+            pending_tasks = deque()
+            for frame_range in frame_ranges:
+                pending_tasks.append(client.submit(
+                    _render_encoded_frame_range, animator, frame_range,
+                    pure=False))
+                if len(pending_tasks) < max_pending_tasks:
+                    continue
+                encoded_frames, timer = pending_tasks.popleft().result()
+                self.timer.merge(timer)
+                self._write_encoded_frames(
+                    encoded_frames, manifest_writer, pipe_writer)
+                progress_bar.update(len(encoded_frames))
+            while len(pending_tasks) > 0:
+                encoded_frames, timer = pending_tasks.popleft().result()
+                self.timer.merge(timer)
+                self._write_encoded_frames(
+                    encoded_frames, manifest_writer, pipe_writer)
+                progress_bar.update(len(encoded_frames))
+        return
+
+    def _write_encoded_frames(
+            self,
+            encoded_frames: List[Tuple[int, bytes, float, Optional[str]]],
+            manifest_writer: Optional[FrameManifestWriter],
+            pipe_writer: Optional[FFmpegImagePipeWriter]):
+        for frame, encoded_frame, render_time, frame_key in encoded_frames:
+            if pipe_writer is not None:
+                with self.timer.phase("stream_frame", frame):
+                    pipe_writer.write(encoded_frame)
+            if manifest_writer is None:
+                continue
+            file_name = self._config.formatted_file_name_per_frame % frame
+            with self.timer.phase("write_frame", frame):
+                size_in_bytes, checksum = write_bytes(
+                    join(self._config.output_dir, file_name), encoded_frame)
+            manifest_writer.write(FrameRecord(
+                index=frame,
+                file_name=file_name,
+                size_in_bytes=size_in_bytes,
+                sha256=checksum,
+                render_time_in_seconds=render_time,
+                rendered_at=time(),
+                frame_key=frame_key,
+                render_key=self._get_render_key()))
+        return
+
+    def _render_encoded_frame_range(
+            self,
+            frames: range) -> List[Tuple[int, bytes, float, Optional[str]]]:
+        """Render `frames` on a new figure and return them encoded.
+
+        Returns:
+            The frame index, encoded frame (e.g., png), render time in
+            seconds, and frame key of each frame.
+        """
+        self._set_up_figure()
+        self._cache_background_if_configured()
+        self._render_fingerprint = self._digest_render_fingerprint()
+        encoded_frames = []
+        try:
+            for frame in frames:
+                render_start = perf_counter()
+                frame_key = self._get_frame_key(frame)
+                with self.timer.phase("update_frame", frame):
+                    self._update_frame(frame)
+                with self.timer.phase("encode_frame", frame):
+                    encoded_frame = self._encode_frame(
+                        self._config.formatted_file_name_per_frame % frame)
+                encoded_frames.append((
+                    frame,
+                    encoded_frame,
+                    perf_counter() - render_start,
+                    frame_key))
+            self._record_arrays("update_frame")
+        finally:
+            self._close_figure()
+        return encoded_frames
+
+    def _render_frames_in_parallel(self):
+        frames = self._config.get_frames_to_render()
+        frame_ranges = self._split_frames(frames, self._config.num_workers)
+        with ProcessPoolExecutor(
+                max_workers=len(frame_ranges)) as executor, tqdm(
+                    total=len(frames),
+                    desc="Updating frames") as progress_bar:
+            futures = {
+                executor.submit(self._render_frame_range, frame_range):
+                frame_range
+                for frame_range in frame_ranges}
+            for future in as_completed(futures):
+                self.timer.merge(future.result())
+                progress_bar.update(len(futures[future]))
+        return
+
+    def _render_frame_range(self, frames: range) -> PhaseTimer:
+        """Render `frames` on a figure owned by the calling (worker) process.
+
+        Returns:
+            The timer of the worker process.
+        """
+        self.timer = self.timer.empty_copy()  # of the worker process
+        self._set_up_figure()
+        try:
+            self._update_and_save_frame_range(frames)
+        finally:
+            self._close_figure()
+        return self.timer
+
+    @staticmethod
+    def _split_frames(frames: range, num_chunks: int) -> List[range]:
+        """Split `frames` into at most `num_chunks` contiguous ranges."""
+        num_chunks = max(1, min(num_chunks, len(frames)))
+        chunk_size, remainder = divmod(len(frames), num_chunks)
+        frame_ranges = []
+        start = frames.start
+        for chunk in range(num_chunks):
+            stop = start + chunk_size + (1 if chunk < remainder else 0)
+            frame_ranges.append(range(start, stop))
+            start = stop
+        return frame_ranges
+
     def _update_and_save_frames(self):
-        for frame in tqdm(
-                range(self._config.num_frames_in_animation),
-                desc="Updating frames"):
+        self._update_and_save_frame_range(
+            self._config.get_frames_to_render(), show_progress=True)
+        return
+
+    def _get_output_dirs(self) -> List[str]:
+        """Directories of the full resolution frames and of each preview."""
+        return [self._config.output_dir] + [
+            self._config.get_preview_dir(resolution)
+            for resolution in self._config.preview_resolutions]
+
+    def _update_and_save_frame_range(
+            self, frames: range, show_progress: bool = False):
+        if self._config.save_frames:
+            output_dirs = self._get_output_dirs()
+            for output_dir in output_dirs:
+                makedirs(output_dir, exist_ok=True)
+            if self._config.resume:
+                # loaded before the manifest files of `frames` are truncated
+                self._previous_manifests = [
+                    FrameManifest.load(output_dir)
+                    for output_dir in output_dirs]
+            self._render_fingerprint = self._digest_render_fingerprint()
+            self._manifest_writers = [
+                FrameManifestWriter(
+                    join(output_dir, FrameManifest.get_file_name(frames)))
+                for output_dir in output_dirs]
+        self._cache_background_if_configured()
+        if self._config.num_writer_threads > 0:
+            self._writer = AsyncFrameWriter(
+                self._config.num_writer_threads,
+                self._config.max_pending_frames,
+                self._get_png_compress_level())
+        if self._config.stream_to_ffmpeg:
+            self._animation_stream = FFmpegStreamWriter(
+                self._config.path_to_save_animation,
+                self._config.frames_per_second,
+                self._ffmpeg_output_args())
+        try:
+            for frame in (
+                    tqdm(frames, desc="Updating frames")
+                    if show_progress else frames):
+                self._update_and_save_frame(frame)
+            self._record_arrays("update_frame")
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if self._animation_stream is not None:
+                self._animation_stream.close()
+                self._animation_stream = None
+            for manifest_writer in self._manifest_writers:
+                manifest_writer.close()
+            self._manifest_writers = []
+            self._previous_manifests = []
+        return
+
+    def _update_and_save_frame(self, frame: int):
+        render_start = perf_counter()
+        frame_path = join(
+            self._config.output_dir,
+            self._config.formatted_file_name_per_frame % frame)
+        frame_key = self._get_frame_key(frame)
+        if self._is_frame_up_to_date(frame, frame_path, frame_key):
+            with self.timer.phase("reuse_frame", frame):
+                self._reuse_frame(frame)
+            return
+
+        with self.timer.phase("update_frame", frame):
             self._update_frame(frame)
-            frame_path = join(
-                self._config.output_dir,
-                self._config.formatted_file_name_per_frame % frame)
-            self._fig.savefig(frame_path)
+        file_name = basename(frame_path)
+        with self.timer.phase("save_frame", frame):
+            written_frames = [self._save_frame(frame_path)]
+        if self._config.save_frames:
+            with self.timer.phase("save_previews", frame):
+                written_frames += [
+                    self._save_preview(
+                        join(preview_dir, file_name), resolution)
+                    for preview_dir, resolution in zip(
+                        self._get_output_dirs()[1:],
+                        self._config.preview_resolutions)]
+
+        def record_frame(
+                manifest_writer: FrameManifestWriter,
+                size_and_checksum: Tuple[int, str]):
+            size_in_bytes, checksum = size_and_checksum
+            manifest_writer.write(FrameRecord(
+                index=frame,
+                file_name=file_name,
+                size_in_bytes=size_in_bytes,
+                sha256=checksum,
+                render_time_in_seconds=perf_counter() - render_start,
+                rendered_at=time(),
+                frame_key=frame_key,
+                render_key=self._get_render_key()))
+            return
+
+        def record_written_frame(
+                manifest_writer: FrameManifestWriter, future: Future):
+            if future.exception() is None:  # else raised by the writer
+                record_frame(manifest_writer, future.result())
+            return
+
+        for manifest_writer, written_frame in zip(
+                self._manifest_writers, written_frames):
+            if isinstance(written_frame, Future):
+                written_frame.add_done_callback(
+                    partial(record_written_frame, manifest_writer))
+            elif written_frame is not None:
+                record_frame(manifest_writer, written_frame)
         return
 
+    def _is_frame_up_to_date(
+            self,
+            frame: int,
+            frame_path: str,
+            frame_key: Optional[str]) -> bool:
+        if len(self._previous_manifests) == 0 or frame_key is None:
+            return False
+        for manifest in self._previous_manifests:
+            if frame not in manifest:
+                return False
+            record = manifest[frame]
+            if (record.frame_key != frame_key
+                    or record.file_name != basename(frame_path)
+                    or len(manifest.get_invalid_frames([frame])) > 0):
+                return False
+        return True
+
+    def _reuse_frame(self, frame: int):
+        """Keep the frame of a previous run instead of rendering it."""
+        if self._animation_stream is not None:
+            frame_path = self._previous_manifests[0].get_path(frame)
+            with Image.open(frame_path) as image:
+                self._animation_stream.write(np.asarray(image))
+        for manifest_writer, manifest in zip(
+                self._manifest_writers, self._previous_manifests):
+            manifest_writer.write(manifest[frame])
+        return
+
+    def _save_frame(self, frame_path: str):
+        """Write the current frame.
+
+        Returns:
+            None if no frame file is written, otherwise the size in bytes
+            and the sha256 of the written file or a future resolving to them.
+        """
+        if self._config.num_strips > 1:
+            return self._save_frame_in_strips(frame_path)
+        if (self._background is None and self._writer is None
+                and self._animation_stream is None
+                and len(self._config.preview_resolutions) == 0):
+            return write_bytes(frame_path, self._encode_frame(frame_path))
+
+        pixels = self._draw_frame()
+        self._frame_pixels = pixels
+        if self._animation_stream is not None:
+            self._animation_stream.write(pixels)
+        if not self._config.save_frames:
+            return None
+        if self._writer is not None:
+            # copy since the canvas buffer is overwritten by the next frame
+            return self._writer.submit(frame_path, pixels.copy())
+        return write_frame(
+            frame_path, pixels, self._get_png_compress_level())
+
+    def _encode_frame(self, frame_path: str) -> bytes:
+        """The current frame in the format of the extension of `frame_path`.
+        """
+        if self._background is not None:
+            return encode_frame(
+                frame_path,
+                self._draw_frame(),
+                self._get_png_compress_level())
+        buffer = BytesIO()
+        self._fig.savefig(
+            buffer,
+            format=splitext(frame_path)[1][1:],
+            pil_kwargs={"compress_level": self._get_png_compress_level()})
+        return buffer.getvalue()
+
+    def _save_frame_in_strips(self, frame_path: str) -> Tuple[int, str]:
+        """Write the current frame rendered one strip at a time.
+
+        Horizontal strips are appended to the png as soon as they are drawn,
+        while vertical strips are stitched into a frame sized buffer first
+        since every row of the png spans all of them.
+        """
+        width = self._config.plot_width_in_pixels
+        height = self._config.plot_height_in_pixels
+        if self._config.strip_orientation == "horizontal":
+            png_writer = None
+            for _, pixels in self._draw_strips():
+                if png_writer is None:
+                    png_writer = StreamingPngWriter(
+                        frame_path, width, height, pixels.shape[-1],
+                        compress_level=self._get_png_compress_level())
+                png_writer.write_rows(pixels)
+            return png_writer.close()
+
+        frame_pixels = None
+        for columns, pixels in self._draw_strips():
+            if frame_pixels is None:
+                frame_pixels = np.empty(
+                    (height, width, pixels.shape[-1]), dtype=np.uint8)
+            frame_pixels[:, columns.start:columns.stop] = pixels
+        return write_frame(
+            frame_path, frame_pixels, self._get_png_compress_level())
+
+    def _get_strips(self) -> List[range]:
+        """Rows (horizontal) or columns (vertical) of each strip."""
+        if self._config.strip_orientation == "horizontal":
+            num_pixels = self._config.plot_height_in_pixels
+        else:
+            num_pixels = self._config.plot_width_in_pixels
+        return self._split_frames(range(num_pixels), self._config.num_strips)
+
+    def _draw_strips(self) -> Iterator[Tuple[range, np.ndarray]]:
+        """Rasterize the current frame one strip at a time.
+
+        The figure is resized to the strip and the map axes are moved such
+        that only the strip lies inside the figure, so the Agg canvas never
+        holds more than one strip. All artists must therefore be placed
+        relative to the map axes (e.g., `transform=self._ax.transAxes`).
+        """
+        width = self._config.plot_width_in_pixels
+        height = self._config.plot_height_in_pixels
+        for strip in self._get_strips():
+            strip_size = len(strip)
+            if self._config.strip_orientation == "horizontal":
+                self._set_figure_size_in_pixels(width, strip_size)
+                self._ax.set_position([
+                    0, (strip.stop - height) / strip_size,
+                    1, height / strip_size])
+            else:
+                self._set_figure_size_in_pixels(strip_size, height)
+                self._ax.set_position([
+                    -strip.start / strip_size, 0,
+                    width / strip_size, 1])
+            self._fig.canvas.draw()
+            yield strip, np.asarray(self._fig.canvas.buffer_rgba())
+
+    def _set_figure_size_in_pixels(self, width: int, height: int):
+        # Agg truncates the size in pixels, e.g., 28.999999999999996 to 28
+        self._fig.set_size_inches(
+            (width + 1e-6) / self._fig.dpi, (height + 1e-6) / self._fig.dpi)
+        return
+
+    def _save_preview(self, preview_path: str, resolution: Tuple[int, int]):
+        """Write the current frame downsampled to (width, height).
+
+        Returns:
+            Same as `_save_frame`.
+        """
+        preview = np.asarray(Image.fromarray(self._frame_pixels).resize(
+            resolution, Image.Resampling.BOX))
+        if self._writer is not None:
+            return self._writer.submit(preview_path, preview)
+        return write_frame(
+            preview_path, preview, self._get_png_compress_level())
+
+    def _draw_frame(self) -> np.ndarray:
+        """Rasterize the current frame and return its pixels."""
+        canvas = self._fig.canvas
+        if self._background is not None:
+            canvas.restore_region(self._background)
+            for artist in self._foreground_artists:
+                self._fig.draw_artist(artist)
+        else:
+            canvas.draw()
+        return np.asarray(canvas.buffer_rgba())
+
+    def _close_figure(self):
+        plt.close(self._fig)
+        return
+
+    def _cache_background(self):
+        """Rasterize the layers below the animated artists into a buffer."""
+        self._foreground_artists = self._get_foreground_artists()
+        for artist in self._foreground_artists:
+            artist.set_animated(True)  # not drawn by `canvas.draw`
+        self._fig.canvas.draw()
+        self._background = self._fig.canvas.copy_from_bbox(self._fig.bbox)
+        return
+
+    def _get_foreground_artists(self) -> List[Artist]:
+        """Artists drawn from the first animated artist on, in draw order.
+
+        Mirrors `Figure.draw` and `Axes.draw`, which draw their children
+        sorted by zorder.
+        """
+        animated_artists = self._get_animated_artists()
+        # cartopy draws the cells of a mesh that wrap around the globe as a
+        # collection just below the mesh, which is updated with the mesh
+        animated_artists += [
+            artist._wrapped_collection_fix for artist in animated_artists
+            if hasattr(artist, "_wrapped_collection_fix")]
+        foreground_artists = []
+        for child in _get_draw_order(
+                self._fig.get_children(), self._fig.patch):
+            if len(foreground_artists) > 0 or child in animated_artists:
+                foreground_artists.append(child)
+            elif isinstance(child, Axes):
+                axes_children = _get_axes_draw_order(child)
+                first_animated = next((
+                    ix for ix, axes_child in enumerate(axes_children)
+                    if axes_child in animated_artists), None)
+                if first_animated is not None:
+                    foreground_artists += axes_children[first_animated:]
+        assert all(
+            artist in foreground_artists for artist in animated_artists), (
+                "animated artists must be artists of the figure or its axes")
+        return foreground_artists
+
     def _update_frame(self, frame: int):
         self._ax.text(0, frame, frame)  # arbitrary modification needed for gif
         return
 
-    def _open_frames(self) -> List[Image.Image]:
-        files_sorted_by_creation_date = sorted(
-            listdir(self._config.output_dir),
-            key=lambda fpath: getctime(join(self._config.output_dir, fpath)))
-        frames: List[Image.Image] = [
-            Image.open(join(self._config.output_dir, f))
-            for f in files_sorted_by_creation_date]
-        return frames
+    def merge_shards(self):
+        """Validate the frames of all shards and save the animation.
 
-    def _save_frames_as_animation(self, frames: List[Image.Image]):
+        Call this once after every shard rendered its frames into
+        `config.output_dir`, with the config of the shards but covering all
+        frames of the animation.
+
+        Raises:
+            ValueError: If a frame of the animation (or of a preview) is
+                missing or its file does not match its record, or if the
+                frames were rendered with different settings, e.g., color
+                limits.
+        """
+        assert not self._config.stream_to_ffmpeg, (
+            "merging builds the animation from the frames")
+        frames = range(self._config.num_frames_in_animation)
+        for output_dir in self._get_output_dirs():
+            manifest = FrameManifest.load(output_dir)
+            invalid_frames = manifest.get_invalid_frames(frames)
+            if len(invalid_frames) > 0:
+                raise ValueError(
+                    f"{len(invalid_frames)} frame(s) in {output_dir} are"
+                    " missing or do not match the manifest, e.g., frame"
+                    f" {invalid_frames[0]}, render the shards that contain"
+                    " them (e.g., with `resume`) before merging")
+            render_keys = set(
+                manifest[frame].render_key for frame in frames) - {None}
+            if len(render_keys) > 1:
+                raise ValueError(
+                    f"the frames in {output_dir} were rendered with"
+                    f" {len(render_keys)} different settings (e.g., color"
+                    " limits), render all shards with the same settings")
+        if self._config.save_animation:
+            self._save_animation()
+        print(f"Results written to: {self._config.output_dir}")
+        return
+
+    def _save_animation(self):
+        if not self._config.stream_to_ffmpeg:  # else encoded in frames
+            super()._save_animation()
+        preview_dirs = self._get_output_dirs()[1:]
+        if len(preview_dirs) == 0:
+            return
+        with self.timer.phase("save_preview_animations"):
+            for preview_dir in preview_dirs:
+                frames = self._open_frames(preview_dir)
+                self._save_frames_as_animation(frames, preview_dir)
+                self._close_frames(frames)
+        return
+
+    def _get_animation_path(self, output_dir: Optional[str] = None) -> str:
+        if output_dir is None:
+            return self._config.path_to_save_animation
+        return join(output_dir, basename(self._config.path_to_save_animation))
+
+    def _get_frame_paths(self, output_dir: Optional[str] = None) -> List[str]:
+        """Paths of all frames in animation order, from the manifest.
+
+        The frames are those in `config.output_dir` unless `output_dir` is
+        given, e.g., the directory of a preview.
+        """
+        manifest = FrameManifest.load(
+            self._config.output_dir if output_dir is None else output_dir)
+        return manifest.get_paths(range(self._config.num_frames_in_animation))
+
+    def _open_frames(
+            self, output_dir: Optional[str] = None) -> Iterator[Image.Image]:
+        """Lazily open the frames one at a time in animation order."""
+        for frame_path in self._get_frame_paths(output_dir):
+            with Image.open(frame_path) as frame:
+                yield frame
+
+    def _ffmpeg_output_args(self) -> List[str]:
+        return ffmpeg_output_args(
+            self._config.animation_format,
+            quality=self._config.animation_quality,
+            num_threads=self._config.num_encoder_threads,
+            loop=self._config.pil_image_gif_loop)
+
+    def _save_frames_as_animation(
+            self,
+            frames: Iterator[Image.Image],
+            output_dir: Optional[str] = None):
+        path_to_save_animation = self._get_animation_path(output_dir)
         has_ffmpeg = run(
             ["which", "ffmpeg"], capture_output=True).returncode == 0
         if has_ffmpeg:
-            output_palettegen = run(
-                [
-                    "ffmpeg",
-                    "-loglevel",
-                    "fatal",
-                    "-i",
-                    # TODO: should use frame naming convention here instead...
-                    f"{self._config.output_dir}/frame_%d.png",
-                    "-vf",
-                    "palettegen",
-                    f"{self._config.output_dir}/palette.png"
-                ]
-            )
-            if output_palettegen.returncode != 0:
-                print(output_palettegen)
-                raise
-            output_gif_gen = run(
-                [
-                    "ffmpeg",
-                    "-framerate",
-                    "2",  # TODO: make configurable? not worth effot...
-                    "-loglevel",
-                    "fatal",
-                    "-i",
-                    f"{self._config.output_dir}/frame_%d.png",
-                    "-i",
-                    f"{self._config.output_dir}/palette.png",
-                    "-filter_complex",
-                    "paletteuse",
-                    f"{self._config.path_to_save_animation}"
-                ]
-            )
-            if output_gif_gen.returncode != 0:
-                print(output_gif_gen)
-                raise
-        else:
+            encode_animation_from_files(
+                self._get_frame_paths(output_dir),
+                path_to_save_animation,
+                self._config.frames_per_second,
+                self._ffmpeg_output_args())
+        elif self._config.animation_format in ("gif", "webp"):
             msg = (
                 "Using PIL by default to create animation may lead to"
                 " artifacts in the animation. Refer to the README.md"
@@ -162,15 +912,223 @@ class OmniSuiteWorldMapAnimator(Animator):
                 "https://johnvansickle.com/ffmpeg/"
             )
             warn(message=msg)
-            frames[0].save(
-                self._config.path_to_save_animation,
-                save_all=True,
-                append_images=frames[1:],
-                loop=self._config.pil_image_gif_loop,
-                duration=self._config.pil_image_duration_between_frames_in_ms)
+            if self._config.animation_format == "gif":
+                self._save_frames_as_gif(frames, path_to_save_animation)
+            else:
+                self._save_frames_as_webp(frames, path_to_save_animation)
+        else:
+            raise RuntimeError(
+                f"Creating a {self._config.animation_format} animation"
+                " requires `ffmpeg`, refer to the README.md on installing it.")
+        return
+
+    def _save_frames_as_gif(
+            self,
+            frames: Iterator[Image.Image],
+            path_to_save_animation: str):
+        with StreamingGifWriter(
+                path_to_save_animation,
+                self._config.pil_image_duration_between_frames_in_ms,
+                loop=self._config.pil_image_gif_loop) as gif_writer:
+            for frame in frames:
+                gif_writer.write(frame)
+        return
+
+    def _save_frames_as_webp(
+            self,
+            frames: Iterator[Image.Image],
+            path_to_save_animation: str):
+        # Pillow's webp encoder needs all frames at once
+        loaded_frames = [frame.copy() for frame in frames]
+        quality_kwargs = {}
+        if self._config.animation_quality is not None:
+            quality_kwargs["quality"] = self._config.animation_quality
+        loaded_frames[0].save(
+            path_to_save_animation,
+            save_all=True,
+            append_images=loaded_frames[1:],
+            loop=self._config.pil_image_gif_loop,
+            duration=self._config.pil_image_duration_between_frames_in_ms,
+            **quality_kwargs)
+        return
+
+    def _close_frames(self, frames: Iterator[Image.Image]):
+        frames.close()
+        return
+
+
+def _get_draw_order(
+        children: List[Artist], patch: Artist) -> List[Artist]:
+    return sorted(
+        (child for child in children if child is not patch),
+        key=lambda child: child.get_zorder())
+
+
+def _get_axes_draw_order(axes: Axes) -> List[Artist]:
+    """The children that `axes.draw` draws, in draw order."""
+    hidden_children = []
+    if not (axes.axison and axes.get_frame_on()):
+        hidden_children += axes.spines.values()
+    if not axes.axison:
+        hidden_children += [axes.xaxis, axes.yaxis]
+    return _get_draw_order(
+        [
+            child for child in axes.get_children()
+            if not any(child is hidden for hidden in hidden_children)],
+        axes.patch)
+
+
+def _render_encoded_frame_range(
+        animator: OmniSuiteWorldMapAnimator,
+        frames: range) -> Tuple[
+            List[Tuple[int, bytes, float, Optional[str]]], PhaseTimer]:
+    # a dask worker keeps one scattered animator for all of its tasks, which
+    # must not share a figure or timer
+    animator = copy(animator)
+    animator.timer = animator.timer.empty_copy()
+    return animator._render_encoded_frame_range(frames), animator.timer
+
+
+class PlateCarreeRasterAnimator(OmniSuiteWorldMapAnimator):
+    """Animate a regular lat/lon grid on Plate-Carree directly with NumPy.
+
+    Each frame is the response resampled onto the output pixel grid, mapped
+    through a lookup table of `config.netcdf_var_cmap_on_plot`, and alpha
+    blended over a background image that is resampled only once. Neither
+    matplotlib nor cartopy take part in rendering, so coastlines and other
+    figure decorations are not drawn.
+
+    In `benchmarks/benchmark_animator.py`, a 0.25 degree response renders
+    about 9x faster than with `pcolormesh` at 4096x2048 pixels (0.15s vs
+    1.3s), and about 4.5x faster including encoding the png frame, which
+    takes most of the time of a frame even at the default zlib level of 1.
+    A 2 degree response renders about 2.5x faster at 2048x1024 pixels.
+    Writer threads (`config.num_writer_threads`) encode frames while the
+    next one is rendered.
+
+    The color limits are `config.clim`, or the minimum and maximum of the
+    whole response if `config.clim` is None, which are computed once before
+    frames are dispatched to workers. Time slices of the response are read
+    `config.prefetch_depth` frames ahead of the frame being rendered.
+    """
+    # zlib takes longer to compress a frame at level 6 than it takes to
+    # render it, and at level 1 it yields about 15% larger frames
+    DEFAULT_PNG_COMPRESS_LEVEL = 1
+
+    def __init__(
+            self,
+            grid: WorldMapNetcdfGrid,
+            config: NetcdfAnimatorConfig,
+            background_img: Optional[np.ndarray] = None,
+            timer: Optional[PhaseTimer] = None):
+        super().__init__(grid, config, timer)
+        self._grid: WorldMapNetcdfGrid
+        self._config: NetcdfAnimatorConfig
+        self._background_img = background_img
+        assert config.num_strips == 1, (
+            "the raster animator does not render frames in strips")
+
+        self._resampler = None
+        self._blender = None
+        self._frame_source = None
+        self._frame_rgb = None
+        self._clim = None
         return
 
-    def _close_frames(self, frames: List[Image.Image]):
-        for frame in frames:
-            frame.close()
+    def _configure_initial_frame(self):
+        longitude, latitude = plate_carree_pixel_centers(
+            self._config.plot_width_in_pixels,
+            self._config.plot_height_in_pixels)
+        self._resampler = GridResampler(
+            self._grid.latitude, self._grid.longitude, latitude, longitude,
+            method=self._config.raster_interpolation)
+        self._clim = self._get_clim()
+        vmin, vmax = self._clim
+        self._blender = ColormapBlender(
+            self._config.netcdf_var_cmap_on_plot,
+            vmin,
+            vmax,
+            self._config.netcdf_var_transparency_on_plot)
+        self._frame_source = PrefetchingFrameSource(
+            self._grid.response,
+            self._config.prefetch_depth,
+            stop=self._config.frame_stop)
+        return
+
+    def _render_frames(self):
+        if self._config.clim is None:
+            # once here instead of over the whole response in every worker
+            self._config = copy(self._config)
+            self._config.clim = self._get_clim()
+        super()._render_frames()
+        return
+
+    def _get_clim(self) -> Tuple[float, float]:
+        if self._config.clim is not None:
+            return self._config.clim
+        response = self._grid.response
+        return float(np.nanmin(response)), float(np.nanmax(response))
+
+    def _plot_initial_frame(self):
+        shape = (
+            self._config.plot_height_in_pixels,
+            self._config.plot_width_in_pixels, 3)
+        if self._background_img is None:
+            self._background = np.full(shape, 255, dtype=np.uint8)
+            return
+
+        background_img = np.asarray(self._background_img)
+        if background_img.ndim == 2:
+            background_img = np.stack([background_img]*3, axis=-1)
+        background_img = background_img[..., :3].astype(np.float32)
+        if np.issubdtype(self._background_img.dtype, np.floating):
+            background_img *= 255  # e.g., `imread` of a png
+
+        height, width = background_img.shape[:2]
+        img_longitude, img_latitude = plate_carree_pixel_centers(
+            width, height, extent=self._config.blue_marble_extent)
+        longitude, latitude = plate_carree_pixel_centers(
+            self._config.plot_width_in_pixels,
+            self._config.plot_height_in_pixels)
+        background_resampler = GridResampler(
+            img_latitude, img_longitude, latitude, longitude,
+            method="bilinear")
+        self._background = np.clip(
+            np.round(background_resampler(background_img)), 0, 255
+        ).astype(np.uint8)
+        return
+
+    def _cache_background(self):
+        return  # the background is always precomposed
+
+    def _get_render_fingerprint(self) -> dict:
+        render_fingerprint = super()._get_render_fingerprint()
+        render_fingerprint.update(
+            cmap=self._config.netcdf_var_cmap_on_plot,
+            alpha=self._config.netcdf_var_transparency_on_plot,
+            clim=list(self._clim),
+            raster_interpolation=self._config.raster_interpolation,
+            background=(
+                None if self._background_img is None
+                else fingerprint_array(self._background_img).hex()),
+            background_extent=list(self._config.blue_marble_extent))
+        return render_fingerprint
+
+    def _get_frame_fingerprint(self, frame: int) -> bytes:
+        return fingerprint_array(self._frame_source[frame])
+
+    def _update_frame(self, frame: int):
+        response_at_time = np.asarray(
+            self._frame_source[frame], dtype=np.float32)
+        # the frame is overwritten by the next one like a canvas buffer
+        self._frame_rgb = self._blender.blend(
+            self._resampler(response_at_time), self._background,
+            out=self._frame_rgb)
+        return
+
+    def _draw_frame(self) -> np.ndarray:
+        return self._frame_rgb
+
+    def _close_figure(self):
+        self._frame_source.close()
         return
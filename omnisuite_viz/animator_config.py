@@ -3,10 +3,13 @@ from cartopy.crs import Projection, PlateCarree
 from dataclasses import dataclass, field
 from glob import glob
 from matplotlib.pyplot import rcParams, imread
-from os.path import exists, join
+import math
+from os.path import exists, join, splitext
 from typing import ClassVar, Tuple, Optional
 import re
 
+from omnisuite_viz.timing import PhaseTimer
+
 
 @dataclass(kw_only=True)
 class AnimatorConfig:
@@ -16,16 +19,20 @@ class AnimatorConfig:
     num_frames_in_animation: int
 
     path_to_save_animation: str = None
+    animation_format: str = "gif"
 
+    ANIMATION_FORMATS: ClassVar[Tuple[str, ...]] = (
+        "gif", "mp4", "webm", "webp")
     INCH_PER_PIXEL: ClassVar[float] = 1 / rcParams['figure.dpi']
     formatted_file_name_per_frame: str = "frame_%d.png"
 
     def __post_init__(self):
         assert exists(self.output_dir)
 
+        assert self.animation_format in self.ANIMATION_FORMATS
         if self.path_to_save_animation is None:
             self.path_to_save_animation = join(
-                self.output_dir, "animation.gif")
+                self.output_dir, f"animation.{self.animation_format}")
 
         # See pg. 41 of OmniSuite 6.0 manual
         # https://globoccess.com/omnisuite/documents/OmniSuite_6-0_manual.pdf
@@ -51,7 +58,77 @@ class OmniSuiteAnimatorConfig(AnimatorConfig):
     plot_height_in_pixels: int = 2048
     figsize: Optional[Tuple[int, int]] = None
     pil_image_gif_loop: int = 0
-    pil_image_duration_between_frames_in_ms: float = 500
+    # None derives one from the other, and 2 frames per second if both are,
+    # both must agree if both are given
+    pil_image_duration_between_frames_in_ms: Optional[float] = None
+    frames_per_second: Optional[float] = None
+
+    # crf of mp4/webm or quality in [0, 100] of webp, None is the encoder's
+    # default and gif has no quality setting
+    animation_quality: Optional[int] = None
+    # threads used by ffmpeg to encode the animation, 0 lets ffmpeg decide
+    num_encoder_threads: int = 0
+
+    # number of processes used to render frames, 1 renders serially
+    num_workers: int = 1
+
+    # "processes" renders frame ranges in a process pool of this machine,
+    # "dask" submits them as tasks to the dask.distributed scheduler at
+    # `dask_scheduler_address` (a LocalCluster of num_workers processes if
+    # None), which return the encoded frames to this process in order
+    parallel_backend: str = "processes"
+    dask_scheduler_address: Optional[str] = None
+    # frames rendered per dask task, each task builds its own figure
+    frames_per_task: int = 8
+
+    # rasterize the layers below the animated artists once, see animator
+    use_cached_background: bool = False
+
+    # zlib level of png frames, lower is faster but yields larger files,
+    # None is the default of the animator (see DEFAULT_PNG_COMPRESS_LEVEL)
+    png_compress_level: Optional[int] = None
+
+    # threads encoding and writing frames while the next frame is rendered,
+    # 0 writes each frame synchronously
+    num_writer_threads: int = 0
+    # frames rendered but not yet written, None is 2*num_writer_threads
+    max_pending_frames: Optional[int] = None
+
+    # pipe frames into ffmpeg while rendering instead of assembling the
+    # animation from the png frames afterwards
+    stream_to_ffmpeg: bool = False
+    # write png frames, can be disabled when streaming frames to ffmpeg
+    save_frames: bool = True
+
+    # (width, height) of lower resolution copies of each frame (and of the
+    # animation) that are downsampled from the rendered frame and written
+    # to `get_preview_dir(resolution)`
+    preview_resolutions: Tuple[Tuple[int, int], ...] = ()
+
+    # render each frame as strips of rows ("horizontal") or columns
+    # ("vertical") on a strip sized canvas, which bounds the memory of
+    # rendering very large frames (e.g., 16384x8192)
+    num_strips: int = 1
+    strip_orientation: str = "horizontal"
+
+    # skip frames whose manifest record in output_dir has the same frame key,
+    # i.e., whose input and rendering settings did not change
+    resume: bool = False
+
+    # only render the frames [frame_start, frame_stop) of the animation, e.g.,
+    # one shard of a batch job array (see `get_shard_frames`), where frames
+    # keep their index in the animation. None renders up to the last frame.
+    # The animation of a subset of the frames is built by `merge_shards`.
+    frame_start: int = 0
+    frame_stop: Optional[int] = None
+
+    # .json or .csv file of the wall and cpu time of each phase of animating
+    # and of each frame (see `PhaseTimer`), None only keeps them in memory
+    timing_report_path: Optional[str] = None
+    # also record the (peak) resident set size of each phase and the largest
+    # arrays, and with trace_allocations (slow) the top allocating lines
+    profile_memory: bool = False
+    trace_allocations: bool = False
 
     projection: Projection = PlateCarree()
     transform: Projection = PlateCarree()
@@ -60,11 +137,103 @@ class OmniSuiteAnimatorConfig(AnimatorConfig):
 
     def __post_init__(self):
         super().__post_init__()
+        assert self.num_workers >= 1
+        assert (
+            self.png_compress_level is None
+            or 0 <= self.png_compress_level <= 9)
+        assert self.num_writer_threads >= 0
+        assert self.num_encoder_threads >= 0
+        if (self.frames_per_second is None
+                and self.pil_image_duration_between_frames_in_ms is None):
+            self.frames_per_second = 2
+        if self.frames_per_second is None:
+            self.frames_per_second = (
+                1000 / self.pil_image_duration_between_frames_in_ms)
+        if self.pil_image_duration_between_frames_in_ms is None:
+            self.pil_image_duration_between_frames_in_ms = (
+                1000 / self.frames_per_second)
+        assert math.isclose(
+            self.pil_image_duration_between_frames_in_ms,
+            1000 / self.frames_per_second), (
+                "frames_per_second and pil_image_duration_between_frames_in_ms"
+                " disagree")
+        assert self.parallel_backend in ("processes", "dask")
+        assert self.frames_per_task >= 1
+        if self.parallel_backend == "dask":
+            msg = "not supported by the dask backend"
+            assert not self.resume, msg
+            assert len(self.preview_resolutions) == 0, msg
+            assert self.num_strips == 1, msg
+        if self.stream_to_ffmpeg:
+            assert self.save_animation, "streaming requires save_animation"
+            assert (
+                self.num_workers == 1 or self.parallel_backend == "dask"), (
+                "frames must be streamed in order from a single process")
+        else:
+            assert self.save_frames, "frames are neither saved nor streamed"
+        assert self.save_frames or not self.resume, (
+            "resuming requires the frames of a previous run")
+        self.preview_resolutions = tuple(
+            (int(width), int(height))
+            for width, height in self.preview_resolutions)
+        for width, height in self.preview_resolutions:
+            assert 0 < width <= self.plot_width_in_pixels, (
+                "previews can only be downsampled from the rendered frame")
+            assert 0 < height <= self.plot_height_in_pixels, (
+                "previews can only be downsampled from the rendered frame")
+        assert self.save_frames or len(self.preview_resolutions) == 0, (
+            "previews are written as frames")
+        assert self.strip_orientation in ("horizontal", "vertical")
+        assert 1 <= self.num_strips <= min(
+            self.plot_width_in_pixels, self.plot_height_in_pixels)
+        if self.num_strips > 1:
+            msg = "strips are drawn and written one after another"
+            assert not self.use_cached_background, msg
+            assert self.num_writer_threads == 0, msg
+            assert not self.stream_to_ffmpeg, msg
+            assert len(self.preview_resolutions) == 0, msg
+            assert self.formatted_file_name_per_frame.endswith(".png"), (
+                "strips are written as png")
+        if self.timing_report_path is not None:
+            report_format = splitext(self.timing_report_path)[1].lower()
+            assert report_format in PhaseTimer.REPORT_FORMATS, (
+                "timings are reported as json or csv")
+        if self.frame_stop is None:
+            self.frame_stop = self.num_frames_in_animation
+        assert (
+            0 <= self.frame_start <= self.frame_stop
+            <= self.num_frames_in_animation)
+        if len(self.get_frames_to_render()) < self.num_frames_in_animation:
+            msg = "the animation of a subset of frames is built by merging"
+            assert not self.save_animation, msg
+            assert not self.stream_to_ffmpeg, msg
         if self.figsize is None:
             self.figsize = (
                 self.plot_width_in_pixels*AnimatorConfig.INCH_PER_PIXEL,
                 self.plot_height_in_pixels*AnimatorConfig.INCH_PER_PIXEL)
 
+    def get_preview_dir(self, resolution: Tuple[int, int]) -> str:
+        width, height = resolution
+        return join(self.output_dir, f"{width}x{height}")
+
+    def get_frames_to_render(self) -> range:
+        return range(self.frame_start, self.frame_stop)
+
+
+def get_shard_frames(shard: str, num_frames_in_animation: int) -> range:
+    """Frames of the shard "i/n", i.e., the i-th of n contiguous ranges.
+
+    Shards are numbered from 0 (e.g., a job array `--array=0-(n-1)`) and
+    differ by at most one frame in length, so a shard is empty if n is
+    larger than the number of frames.
+    """
+    shard_index, num_shards = (int(part) for part in shard.split("/"))
+    assert 0 <= shard_index < num_shards, f"invalid shard {shard}"
+    shard_size, remainder = divmod(num_frames_in_animation, num_shards)
+    start = shard_index*shard_size + min(shard_index, remainder)
+    stop = start + shard_size + (1 if shard_index < remainder else 0)
+    return range(start, stop)
+
 
 @dataclass(kw_only=True)
 class NetcdfAnimatorConfig(OmniSuiteAnimatorConfig):
@@ -76,8 +245,19 @@ class NetcdfAnimatorConfig(OmniSuiteAnimatorConfig):
     netcdf_var_transparency_on_plot: float = 0.30
     netcdf_var_cmap_on_plot: str = "bwr"
 
+    # (vmin, vmax) of the response variable, None derives it from the data
+    clim: Optional[Tuple[float, float]] = None
+
+    # resampling of the response onto output pixels for the raster animator
+    raster_interpolation: str = "nearest"
+
+    # number of time slices of the response read ahead of the rendered frame
+    prefetch_depth: int = 0
+
     def __post_init__(self):
         super().__post_init__()
+        assert self.raster_interpolation in ("nearest", "bilinear")
+        assert self.prefetch_depth >= 0
         assert self.is_valid_netcdf_response_var_file_path, \
             "You can download an example NetCDF file from" +\
             " https://zenodo.org/records/15639060"
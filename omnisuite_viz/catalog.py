@@ -0,0 +1,223 @@
+"""Catalog of the metadata of multifile NetCDF datasets.
+
+Opening thousands of files to list their variables and decode their
+coordinates dominates the startup of animations of multifile outputs. A
+`DatasetCatalog` records what is needed to read the files, i.e., per file
+its variables with their shapes, dtypes, and chunking, and its time values,
+together with the coordinates shared by the files, in a small gzipped json
+file, from which datasets are opened without touching the files until data
+is read.
+"""
+from dataclasses import asdict, dataclass
+import gzip
+import json
+import os
+from os.path import abspath
+from typing import Any, Dict, List, Optional, Sequence
+
+import netCDF4
+import numpy as np
+import xarray as xarr
+
+from omnisuite_viz.hyperslab import (
+    NETCDF_LOCK, VariableLayout, inspect_files, read_level_hyperslabs)
+
+TIME_DTYPE = "datetime64[ns]"
+
+
+@dataclass
+class VariableEntry(VariableLayout):
+    attrs: Dict[str, Any]
+
+    @classmethod
+    def of(cls, variable: netCDF4.Variable) -> "VariableEntry":
+        layout = VariableLayout.of(variable)
+        return cls(**vars(layout), attrs={
+            name: _to_json_value(variable.getncattr(name))
+            for name in variable.ncattrs()})
+
+
+@dataclass
+class FileEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    variables: Dict[str, VariableEntry]
+    # of the time coordinate in nanoseconds since the epoch
+    time: List[int]
+
+    @classmethod
+    def of(
+            cls,
+            dataset: netCDF4.Dataset,
+            time_name: str = "time") -> "FileEntry":
+        path = dataset.filepath()
+        stat = os.stat(path)
+        variables = {
+            name: VariableEntry.of(variable)
+            for name, variable in dataset.variables.items()}
+        time = (
+            _decode_time(dataset[time_name])
+            if time_name in dataset.variables
+            else np.zeros(0, dtype=TIME_DTYPE))
+        return cls(
+            path=abspath(path),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            variables=variables,
+            time=time.astype(np.int64).tolist())
+
+    def is_modified(self) -> bool:
+        stat = os.stat(self.path)
+        return (stat.st_size, stat.st_mtime_ns) != (self.size, self.mtime_ns)
+
+
+@dataclass
+class DatasetCatalog:
+    """Metadata of files whose variables are concatenated along time.
+
+    The files are concatenated in the order of `files` (like
+    `open_mfdataset` with `concat_dim="time"` and `combine="nested"`), and
+    the coordinates other than time are those of the first file.
+    """
+    files: List[FileEntry]
+    # values of the coordinate variables other than time
+    coordinates: Dict[str, List[Any]]
+    time_name: str = "time"
+
+    @classmethod
+    def build(
+            cls,
+            paths: Sequence[str],
+            time_name: str = "time",
+            num_threads: int = 1) -> "DatasetCatalog":
+        """Catalog of the files at `paths`, each of which is opened once.
+
+        The files are opened by `num_threads` threads (see `inspect_files`).
+        """
+        assert len(paths) > 0
+        files = inspect_files(
+            paths,
+            lambda dataset: FileEntry.of(dataset, time_name),
+            num_threads)
+        coordinates = {}
+        with NETCDF_LOCK, netCDF4.Dataset(paths[0], "r") as dataset:
+            for name, variable in dataset.variables.items():
+                if name != time_name and variable.dimensions == (name,):
+                    coordinates[name] = variable[:].tolist()
+        return cls(files=files, coordinates=coordinates, time_name=time_name)
+
+    @classmethod
+    def load_or_build(
+            cls,
+            path: str,
+            paths: Sequence[str],
+            time_name: str = "time",
+            num_threads: int = 1) -> "DatasetCatalog":
+        """Catalog saved at `path` if it is up to date, else a new one.
+
+        The catalog is rebuilt (see `build`) and saved at `path` if it does
+        not exist, lists other files than `paths`, or any of its files was
+        modified since it was built (see `get_modified_paths`).
+        """
+        paths = [abspath(file_path) for file_path in paths]
+        if os.path.exists(path):
+            catalog = cls.load(path)
+            if catalog.paths == paths:
+                modified_paths = catalog.get_modified_paths()
+                if len(modified_paths) == 0:
+                    return catalog
+                print(
+                    f"Rebuilding catalog, {len(modified_paths)} file(s) were"
+                    f" modified, e.g., {modified_paths[0]}")
+        catalog = cls.build(paths, time_name, num_threads)
+        catalog.save(path)
+        return catalog
+
+    @property
+    def paths(self) -> List[str]:
+        return [entry.path for entry in self.files]
+
+    @property
+    def time(self) -> np.ndarray:
+        return np.concatenate([
+            np.asarray(entry.time, dtype=np.int64) for entry in self.files
+        ]).astype(TIME_DTYPE)
+
+    @property
+    def data_variables(self) -> List[str]:
+        """Variables of the first file that are concatenated along time."""
+        return [
+            name for name, entry in self.files[0].variables.items()
+            if entry.dimensions[:1] == (self.time_name,)
+            and name != self.time_name]
+
+    def get_modified_paths(self) -> List[str]:
+        """Paths of files that changed since they were cataloged."""
+        return [entry.path for entry in self.files if entry.is_modified()]
+
+    def to_dataset(
+            self,
+            variable_names: Optional[Sequence[str]] = None) -> xarr.Dataset:
+        """Lazy dataset of the variables (by default all data variables).
+
+        Each variable is a dask array that reads one on-disk chunk along
+        time per dask chunk (see `read_level_hyperslabs`), and no file is
+        opened before its data is read.
+        """
+        data_vars = {}
+        for name in variable_names or self.data_variables:
+            layouts = [entry.variables[name] for entry in self.files]
+            data = read_level_hyperslabs(
+                self.paths, name, level_ix=None, layouts=layouts)
+            data_vars[name] = xarr.Variable(
+                layouts[0].dimensions, data, attrs=layouts[0].attrs)
+        coords = {
+            name: ((name,), values)
+            for name, values in self.coordinates.items()}
+        coords[self.time_name] = ((self.time_name,), self.time)
+        return xarr.Dataset(data_vars, coords=coords)
+
+    def save(self, path: str):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, "wt") as f:
+            json.dump(asdict(self), f, separators=(",", ":"))
+        os.replace(temp_path, path)  # atomic, no partial catalogs
+        return
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetCatalog":
+        with gzip.open(path, "rt") as f:
+            state = json.load(f)
+        files = []
+        for file_state in state.pop("files"):
+            file_state["variables"] = {
+                name: _variable_entry_from_dict(variable_state)
+                for name, variable_state in file_state["variables"].items()}
+            files.append(FileEntry(**file_state))
+        return cls(files=files, **state)
+
+
+def _variable_entry_from_dict(state: dict) -> VariableEntry:
+    for name in ("dimensions", "shape", "chunk_shape"):
+        if state[name] is not None:
+            state[name] = tuple(state[name])
+    return VariableEntry(**state)
+
+
+def _decode_time(time: netCDF4.Variable) -> np.ndarray:
+    if not hasattr(time, "units"):
+        return np.asarray(time[:], dtype=TIME_DTYPE)
+    dates = netCDF4.num2date(
+        time[:],
+        time.units,
+        getattr(time, "calendar", "standard"),
+        only_use_cftime_datetimes=False,
+        only_use_python_datetimes=True)
+    return np.asarray(dates, dtype=TIME_DTYPE)
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
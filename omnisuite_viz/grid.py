@@ -1,9 +1,13 @@
 """Classes for discrete values of grid and response variable on the grid."""
 from abc import ABC, abstractmethod
+import netCDF4
 from numpy import linspace, meshgrid, ndarray
-from typing import Tuple, Union
+from typing import Optional, Sequence, Tuple, Union
 from xarray import DataArray
 
+from omnisuite_viz.hyperslab import NETCDF_LOCK, FileHandlePool
+from omnisuite_viz.lazy_array import TimeConcatenatedArray
+
 
 class Grid(ABC):
     @property
@@ -107,6 +111,34 @@ class WorldMapNetcdfGrid(LatLonGrid):
         self._response = response
         return
 
+    @classmethod
+    def from_netcdf_files(
+            cls,
+            paths: Sequence[str],
+            variable_name: str,
+            level_ix: Optional[int] = None,
+            level_name: str = "lev",
+            latitude_name: str = "lat",
+            longitude_name: str = "lon",
+            max_open_files: int = 64,
+            num_threads: int = 1) -> "WorldMapNetcdfGrid":
+        """Grid whose response is read lazily from files without dask.
+
+        The response is a `TimeConcatenatedArray` of the variable, see
+        there, and the latitude and longitude are read from the first file.
+        """
+        with NETCDF_LOCK, netCDF4.Dataset(paths[0], "r") as dataset:
+            latitude = dataset[latitude_name][:].data
+            longitude = dataset[longitude_name][:].data
+        response = TimeConcatenatedArray(
+            paths,
+            variable_name,
+            level_ix=level_ix,
+            level_name=level_name,
+            pool=FileHandlePool(max_open_files),
+            num_threads=num_threads)
+        return cls(response, latitude, longitude)
+
     @property
     def latitude(self) -> ndarray:
         return self._latitude
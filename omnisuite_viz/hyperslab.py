@@ -0,0 +1,370 @@
+"""Hyperslab reads of one level of multifile NetCDF variables.
+
+Selecting a level with `isel` on top of `open_mfdataset` leaves it to dask
+and the NetCDF library which bytes are read. Here the level (and the time
+steps of each dask chunk) are read with a single hyperslab per chunk of the
+file's own chunk layout, and the bytes of the on-disk chunks that each read
+touches are counted, so that the cost of a file layout for an animation of a
+single level is visible.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import os
+from threading import Lock
+from typing import (
+    Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar,
+    Union)
+
+import dask
+import dask.array
+import netCDF4
+import numpy as np
+from numpy import ndarray
+from xarray.backends.locks import HDF5_LOCK, NETCDFC_LOCK, combine_locks
+
+BYTES_PER_MEGABYTE = 2**20
+# read to warm the cache of a file system before the file is opened
+HEADER_NUM_BYTES = 2**16
+
+# the netCDF and HDF5 libraries are not thread safe, so they are only called
+# under this lock, which is shared with the netCDF4 backend of xarray
+NETCDF_LOCK = combine_locks([NETCDFC_LOCK, HDF5_LOCK])
+
+Key = Tuple[Union[slice, int], ...]
+T = TypeVar("T")
+
+
+@dataclass
+class ReadStatistics:
+    """Bytes read from NetCDF files compared with the bytes that were used.
+
+    `bytes_read` counts the uncompressed size of every on-disk chunk that a
+    read touches, which the NetCDF library decompresses in full, and
+    `bytes_used` the size of the selected values. Only reads of this
+    process are counted (e.g., not those of parallel workers).
+    """
+    num_reads: int = 0
+    bytes_read: int = 0
+    bytes_used: int = 0
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def add(self, bytes_read: int, bytes_used: int):
+        with self._lock:
+            self.num_reads += 1
+            self.bytes_read += bytes_read
+            self.bytes_used += bytes_used
+        return
+
+    @property
+    def fraction_used(self) -> float:
+        return self.bytes_used / self.bytes_read if self.bytes_read else 1.
+
+    def format(self) -> str:
+        return (
+            f"Read {self.bytes_read / BYTES_PER_MEGABYTE:.1f} MB of NetCDF"
+            f" chunks in {self.num_reads} reads to use"
+            f" {self.bytes_used / BYTES_PER_MEGABYTE:.1f} MB"
+            f" ({100*self.fraction_used:.1f}%)")
+
+    def __getstate__(self) -> dict:
+        state = dict(vars(self))
+        del state["_lock"]  # e.g., when the response is sent to workers
+        return state
+
+    def __setstate__(self, state: dict):
+        vars(self).update(state)
+        self._lock = Lock()
+        return
+
+
+class FileHandlePool:
+    """Open netCDF4 datasets of which at most `max_open_files` stay open.
+
+    Opening another file closes the least recently used one that is not in
+    use, which bounds the number of file descriptors however many files are
+    read (e.g., in long animations over thousands of files). Only while
+    more than `max_open_files` datasets are in use at once (i.e., by that
+    many threads) are more files open. The pool's lock is only held to look
+    up, open, and close datasets, so that threads read different files
+    concurrently, and the netCDF library is only called under
+    `NETCDF_LOCK` (e.g., `dataset[name][key]` must be read under it).
+    """
+
+    def __init__(self, max_open_files: int = 64):
+        assert max_open_files >= 1
+        self.max_open_files = max_open_files
+        self.num_opened = 0  # number of times a file was opened
+        # least recently used first
+        self._datasets: "OrderedDict[str, netCDF4.Dataset]" = OrderedDict()
+        # number of `open` contexts of each dataset in use
+        self._num_users: Dict[str, int] = {}
+        # datasets in use when the pool was closed, closed after their use
+        self._paths_to_close: Set[str] = set()
+        self._lock = Lock()
+        return
+
+    def __len__(self) -> int:
+        return len(self._datasets)
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[netCDF4.Dataset]:
+        with self._lock:
+            dataset = self._datasets.get(path)
+            if dataset is None:
+                with NETCDF_LOCK:
+                    dataset = netCDF4.Dataset(path, "r")
+                self._datasets[path] = dataset
+                self.num_opened += 1
+            self._datasets.move_to_end(path)
+            self._paths_to_close.discard(path)
+            self._num_users[path] = self._num_users.get(path, 0) + 1
+            self._close_unused_datasets()
+        try:
+            yield dataset
+        finally:
+            with self._lock:
+                self._num_users[path] -= 1
+                if self._num_users[path] == 0:
+                    del self._num_users[path]
+                    if path in self._paths_to_close:
+                        self._paths_to_close.remove(path)
+                        with NETCDF_LOCK:
+                            self._datasets.pop(path).close()
+                self._close_unused_datasets()
+        return
+
+    def _close_unused_datasets(self):
+        """Close the least recently used datasets not in use above the bound.
+        """
+        for path in list(self._datasets):
+            if len(self._datasets) <= self.max_open_files:
+                break
+            if path not in self._num_users:
+                with NETCDF_LOCK:
+                    self._datasets.pop(path).close()
+        return
+
+    def close(self):
+        """Close all datasets, those in use once they are no longer used."""
+        with self._lock, NETCDF_LOCK:
+            for path in list(self._datasets):
+                if path in self._num_users:
+                    self._paths_to_close.add(path)
+                else:
+                    self._datasets.pop(path).close()
+        return
+
+    def __getstate__(self) -> dict:
+        # open datasets cannot be sent to other processes, e.g., workers
+        return {"max_open_files": self.max_open_files}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state["max_open_files"])
+        return
+
+
+_process_pool: Optional[FileHandlePool] = None
+_process_pool_pid: Optional[int] = None
+_process_pool_lock = Lock()
+
+
+def get_process_pool() -> FileHandlePool:
+    """Pool of the datasets read by this process without a pool of its own.
+
+    A forked process gets a new pool instead of the handles of its parent.
+    """
+    global _process_pool, _process_pool_pid
+    with _process_pool_lock:
+        if _process_pool_pid != os.getpid():
+            _process_pool = FileHandlePool()
+            _process_pool_pid = os.getpid()
+        return _process_pool
+
+
+@dataclass
+class VariableLayout:
+    """What is needed to read a variable of a file without opening it."""
+    dimensions: Tuple[str, ...]
+    shape: Tuple[int, ...]
+    chunk_shape: Optional[Tuple[int, ...]]  # None if stored contiguously
+    dtype: str
+
+    @classmethod
+    def of(cls, variable: netCDF4.Variable) -> "VariableLayout":
+        return cls(
+            dimensions=tuple(variable.dimensions),
+            shape=tuple(variable.shape),
+            chunk_shape=get_chunk_shape(variable),
+            dtype=str(variable.dtype))
+
+
+def get_chunk_shape(variable: netCDF4.Variable) -> Optional[Tuple[int, ...]]:
+    """On-disk chunk shape of `variable`, None if stored contiguously."""
+    chunking = variable.chunking()
+    return None if chunking == "contiguous" else tuple(chunking)
+
+
+def get_bytes_read(
+        key: Key,
+        shape: Tuple[int, ...],
+        chunk_shape: Optional[Tuple[int, ...]],
+        itemsize: int) -> int:
+    """Uncompressed bytes of the on-disk chunks touched by a hyperslab.
+
+    `key` has an integer or a slice with a step of 1 per dimension. Reads of
+    contiguous variables are assumed to read only the selected bytes.
+    """
+    num_bytes = itemsize
+    for index, size, chunk_size in zip(
+            key, shape, chunk_shape or (None,)*len(shape)):
+        start, stop = (
+            (index, index + 1) if isinstance(index, (int, np.integer))
+            else index.indices(size)[:2])
+        if chunk_size is None:
+            num_bytes *= stop - start
+        else:
+            first_chunk_start = (start // chunk_size) * chunk_size
+            last_chunk_stop = -(-stop // chunk_size) * chunk_size
+            num_bytes *= min(last_chunk_stop, size) - first_chunk_start
+    return num_bytes
+
+
+def read_hyperslab(
+        path: str,
+        variable_name: str,
+        key: Key,
+        statistics: Optional[ReadStatistics] = None,
+        pool: Optional[FileHandlePool] = None) -> ndarray:
+    """Read `variable_name[key]` of the file, masked values as NaN.
+
+    The file is kept open in `pool` (by default the pool of the process, see
+    `get_process_pool`) for the next read.
+    """
+    pool = pool if pool is not None else get_process_pool()
+    with pool.open(path) as dataset, NETCDF_LOCK:
+        variable = dataset[variable_name]
+        values = variable[key]
+        if statistics is not None:
+            statistics.add(
+                get_bytes_read(
+                    key,
+                    variable.shape,
+                    get_chunk_shape(variable),
+                    variable.dtype.itemsize),
+                values.nbytes)
+    return fill_masked(values)
+
+
+def fill_masked(values: Union[ndarray, np.ma.MaskedArray]) -> ndarray:
+    """Values read by netCDF4 with the masked (e.g., fill) values as NaN."""
+    if np.ma.isMaskedArray(values):
+        if values.dtype.kind != "f":
+            values = values.astype(np.float64)
+        values = values.filled(np.nan)
+    return np.asarray(values)
+
+
+def read_headers(paths: Sequence[str], num_threads: int = 1):
+    """Read the header of each file without the netCDF library.
+
+    With `num_threads` threads, the latency of opening files (e.g., the
+    metadata requests of a parallel file system like Lustre) overlaps, and
+    the netCDF library later reads the headers from the cache.
+    """
+    if num_threads <= 1:
+        for path in paths:
+            _read_header(path)
+    else:
+        with ThreadPoolExecutor(num_threads) as executor:
+            list(executor.map(_read_header, paths))
+    return
+
+
+def _read_header(path: str):
+    with open(path, "rb") as f:
+        f.read(HEADER_NUM_BYTES)
+    return
+
+
+def inspect_files(
+        paths: Sequence[str],
+        inspect: Callable[[netCDF4.Dataset], T],
+        num_threads: int = 1) -> List[T]:
+    """`inspect(dataset)` of each file, in the order of `paths`.
+
+    The files are opened by `num_threads` threads. Calls of the netCDF
+    library are serialized by `NETCDF_LOCK`, but each thread first reads
+    the header of its file without the lock (see `read_headers`).
+    """
+    def inspect_file(path: str) -> T:
+        _read_header(path)
+        with NETCDF_LOCK, netCDF4.Dataset(path, "r") as dataset:
+            return inspect(dataset)
+
+    if num_threads <= 1:
+        return [inspect_file(path) for path in paths]
+    with ThreadPoolExecutor(num_threads) as executor:
+        return list(executor.map(inspect_file, paths))
+
+
+def read_level_hyperslabs(
+        paths: Sequence[str],
+        variable_name: str,
+        level_ix: Optional[int],
+        level_name: str = "lev",
+        dtype: Optional[np.dtype] = None,
+        statistics: Optional[ReadStatistics] = None,
+        layouts: Optional[Sequence[VariableLayout]] = None,
+        num_threads: int = 1,
+        pool: Optional[FileHandlePool] = None) -> dask.array.Array:
+    """Lazy array of one level of a variable concatenated over files.
+
+    The variable's first dimension (time) is concatenated over `paths` in
+    order, like `open_mfdataset` with `concat_dim="time"` and
+    `combine="nested"`, and the level is removed (all levels are kept if
+    `level_ix` is None). Each dask chunk holds the time steps of one on-disk
+    chunk along time and is read with a single hyperslab of the level, so
+    that no on-disk chunk is decompressed for more than one dask chunk.
+    `dtype` is the dtype of the read values, by default that of the
+    variable (e.g., give float for packed variables). The files are opened
+    by `num_threads` threads (see `inspect_files`) to get the layout of the
+    variable unless `layouts` has one per file (e.g., from a
+    `DatasetCatalog`). The files are read through `pool` (see
+    `read_hyperslab`), which bounds the open files of this process, and
+    workers of other processes read through their own pools.
+    """
+    if layouts is None:
+        layouts = inspect_files(
+            paths,
+            lambda dataset: VariableLayout.of(dataset[variable_name]),
+            num_threads)
+    assert len(layouts) == len(paths)
+
+    blocks = []
+    for path, layout in zip(paths, layouts):
+        shape = layout.shape
+        chunk_shape = layout.chunk_shape
+        block_dtype = dtype or layout.dtype
+        level_axis = None
+        if level_ix is not None:
+            level_axis = layout.dimensions.index(level_name)
+            assert level_axis > 0, "the first dimension must be time"
+        num_times = shape[0]
+        times_per_block = chunk_shape[0] if chunk_shape is not None else 1
+        block_shape = tuple(
+            size for axis, size in enumerate(shape) if axis != level_axis)
+        for time_start in range(0, num_times, times_per_block):
+            time_stop = min(time_start + times_per_block, num_times)
+            key = tuple(
+                slice(time_start, time_stop) if axis == 0
+                else level_ix if axis == level_axis
+                else slice(None)
+                for axis in range(len(shape)))
+            blocks.append(dask.array.from_delayed(
+                dask.delayed(read_hyperslab)(
+                    path, variable_name, key, statistics, pool),
+                shape=(time_stop - time_start,) + block_shape[1:],
+                dtype=block_dtype))
+    return dask.array.concatenate(blocks, axis=0)
@@ -0,0 +1,105 @@
+"""Ingest a selection of multifile NetCDF data into a frame-optimized store.
+
+Animations read one time step (of one level) per frame, which the chunking of
+model outputs is rarely laid out for. The store holds a single variable,
+optionally a range of its levels, with one time step of one level per chunk,
+so that each frame reads and decompresses only its own bytes. `zarr` is
+optional and not installed with this package, install it with
+`pip install zarr`.
+"""
+from glob import glob
+from os.path import exists, isdir, join
+from typing import List, Optional, Sequence
+
+import xarray as xarr
+
+# attribute of the store with the index of its first level in the inputs
+LEVEL_START_ATTR = "ingested_level_start"
+
+
+def _import_zarr():
+    try:
+        import zarr
+    except ImportError as error:
+        raise RuntimeError(
+            "Zarr stores require `zarr`, e.g., `pip install zarr`.") from error
+    return zarr
+
+
+def is_zarr_store(path: str) -> bool:
+    return isdir(path) and any(
+        exists(join(path, metadata_file))
+        for metadata_file in ("zarr.json", ".zgroup", ".zattrs"))
+
+
+def expand_file_paths(file_paths: Sequence[str]) -> List[str]:
+    """Paths of the files matched by `file_paths`, which may be globs."""
+    paths = []
+    for file_path in file_paths:
+        paths.extend(sorted(glob(file_path)) or [file_path])
+    return paths
+
+
+def ingest_into_zarr(
+        file_paths: Sequence[str],
+        variable: str,
+        store_path: str,
+        level_start: Optional[int] = None,
+        level_stop: Optional[int] = None,
+        level_name: str = "lev",
+        concat_dim: Optional[str] = None,
+        compression_level: int = 5):
+    """Write `variable` of the files (or globs) to a Zarr store.
+
+    The files are combined like `open_mfdataset` in the multifile ICON
+    example (nested along `concat_dim` if given, else by coordinates), and
+    only the levels `[level_start, level_stop)` are kept if either is given.
+    The variable is chunked one time step (i.e., one entry of its first
+    dimension) of one level (if it has `level_name`) per chunk and
+    compressed with zstd at `compression_level`, and the store is written
+    one chunk at a time, so memory is bounded by a few time steps. An
+    existing store at `store_path` is overwritten.
+    """
+    assert level_start is None or level_start >= 0
+    zarr = _import_zarr()
+    paths = expand_file_paths(file_paths)
+    with xarr.open_dataset(paths[0]) as first_dataset:
+        data_vars_to_drop = [
+            var for var in first_dataset.data_vars if var != variable]
+    mfdataset = xarr.open_mfdataset(
+        paths,
+        drop_variables=data_vars_to_drop,
+        concat_dim=concat_dim,
+        combine="nested" if concat_dim is not None else "by_coords")
+
+    response = mfdataset[variable]
+    if level_start is not None or level_stop is not None:
+        response = response.isel(
+            {level_name: slice(level_start, level_stop)})
+    dataset = response.to_dataset()
+    for dataset_variable in dataset.variables.values():
+        dataset_variable.encoding = {}  # e.g., the chunks of the NetCDF files
+    dataset = dataset.chunk({
+        dim: 1 if dim_ix == 0 or dim == level_name else -1
+        for dim_ix, dim in enumerate(response.dims)})
+    dataset.attrs[LEVEL_START_ATTR] = level_start or 0
+
+    compressor = zarr.codecs.BloscCodec(
+        cname="zstd", clevel=compression_level, shuffle="shuffle")
+    dataset.to_zarr(
+        store_path,
+        mode="w",
+        encoding={variable: {"compressors": (compressor,)}},
+        consolidated=False)
+    mfdataset.close()
+    return
+
+
+def open_zarr_store(store_path: str) -> xarr.Dataset:
+    """Dataset of a store written by `ingest_into_zarr`.
+
+    Each variable is a dask array with one time step of one level per chunk,
+    so reading a frame only reads that chunk.
+    """
+    _import_zarr()
+    return xarr.open_zarr(store_path, consolidated=False)
@@ -0,0 +1,168 @@
+"""Dask-free lazy array of a NetCDF variable concatenated over many files.
+
+With years of multifile outputs, `open_mfdataset` builds a dask graph with
+tens of thousands of tasks, and every `isel(time=frame).compute()` of an
+animation pays for building and optimizing a graph to read a single 2D
+slice. `TimeConcatenatedArray` instead maps a time index to its file and
+local index through a table of offsets and reads the slice with a netCDF4
+hyperslab of a file kept open in a `FileHandlePool`.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from omnisuite_viz.hyperslab import (
+    NETCDF_LOCK, FileHandlePool, ReadStatistics, VariableLayout,
+    fill_masked, get_bytes_read, inspect_files)
+
+
+class TimeConcatenatedArray:
+    """Lazy array of a variable concatenated over files along time.
+
+    The first dimension of the variable (time) is concatenated over `paths`
+    in order, like `open_mfdataset` with `concat_dim="time"` and
+    `combine="nested"`. If `level_ix` is given, the variable is read at that
+    index of its `level_name` dimension, which is removed. Indexing with an
+    integer or slice of times, optionally followed by integers or slices of
+    the other dimensions, reads only the selection with one netCDF4
+    hyperslab per file, masked values as NaN, and returns a numpy array.
+
+    The files are opened by `num_threads` threads (see `inspect_files`) to
+    get the layout of the variable unless `layouts` has one per file (e.g.,
+    from a `DatasetCatalog`). Reads are counted in `statistics` if given.
+    """
+
+    def __init__(
+            self,
+            paths: Sequence[str],
+            variable_name: str,
+            level_ix: Optional[int] = None,
+            level_name: str = "lev",
+            layouts: Optional[Sequence[VariableLayout]] = None,
+            pool: Optional[FileHandlePool] = None,
+            statistics: Optional[ReadStatistics] = None,
+            num_threads: int = 1):
+        assert len(paths) > 0
+        self.paths = list(paths)
+        self.variable_name = variable_name
+        self.level_ix = level_ix
+        self.pool = pool if pool is not None else FileHandlePool()
+        self.statistics = statistics
+        if layouts is None:
+            layouts = inspect_files(
+                self.paths,
+                lambda dataset: VariableLayout.of(dataset[variable_name]),
+                num_threads)
+        assert len(layouts) == len(self.paths)
+        self._layouts = list(layouts)
+
+        layout = layouts[0]
+        self._level_axis = None
+        if level_ix is not None:
+            self._level_axis = layout.dimensions.index(level_name)
+            assert self._level_axis > 0, "the first dimension must be time"
+        # first global time index of each file, and the total at the end
+        self._offsets = np.cumsum(
+            [0] + [file_layout.shape[0] for file_layout in layouts])
+        self.shape: Tuple[int, ...] = (int(self._offsets[-1]),) + tuple(
+            size for axis, size in enumerate(layout.shape)
+            if axis not in (0, self._level_axis))
+        self.dtype = np.dtype(layout.dtype)
+        return
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __repr__(self) -> str:
+        return (
+            f"TimeConcatenatedArray({self.variable_name!r},"
+            f" shape={self.shape}, dtype={self.dtype},"
+            f" num_files={len(self.paths)})")
+
+    def locate(self, time_ix: int) -> Tuple[int, int]:
+        """Index of the file of the time step and its index in the file."""
+        file_ix = int(np.searchsorted(self._offsets, time_ix, "right")) - 1
+        return file_ix, time_ix - int(self._offsets[file_ix])
+
+    def __getitem__(self, key) -> ndarray:
+        key = key if isinstance(key, tuple) else (key,)
+        time_key, other_key = key[0], key[1:]
+        assert len(other_key) < self.ndim, "too many indices"
+        if not all(isinstance(k, (int, np.integer, slice)) for k in key):
+            # e.g., arrays of indices are applied to the read values
+            return self[:][key]
+
+        if isinstance(time_key, (int, np.integer)):
+            time_ix = int(time_key) + (len(self) if time_key < 0 else 0)
+            if not 0 <= time_ix < len(self):
+                raise IndexError(f"time index {time_key} is out of bounds")
+            file_ix, local_ix = self.locate(time_ix)
+            return self._read(file_ix, local_ix, other_key)
+
+        time_ixs = np.arange(*time_key.indices(len(self)))
+        if time_ixs.size == 0:
+            return np.empty(
+                (0,) + self.shape[1:], self.dtype)[(slice(None),) + other_key]
+        step = time_key.step or 1
+        file_ixs = np.searchsorted(self._offsets, time_ixs, "right") - 1
+        # consecutive runs of time steps in the same file
+        run_starts = np.flatnonzero(np.diff(file_ixs)) + 1
+        values = []
+        for run in np.split(np.arange(time_ixs.size), run_starts):
+            file_ix = int(file_ixs[run[0]])
+            first, last = (
+                int(time_ixs[run[ix]] - self._offsets[file_ix])
+                for ix in (0, -1))
+            if step > 0:
+                local_key = slice(first, last + 1, step)
+                values.append(self._read(file_ix, local_key, other_key))
+            else:
+                local_key = slice(last, first + 1, -step)
+                values.append(self._read(file_ix, local_key, other_key)[::-1])
+        return np.concatenate(values, axis=0)
+
+    def __array__(self, dtype=None, copy=None) -> ndarray:
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+    def _read(self, file_ix: int, local_key, other_key: Tuple) -> ndarray:
+        layout = self._layouts[file_ix]
+        other_key = list(other_key)
+        file_key: List = []
+        for axis in range(len(layout.shape)):
+            if axis == 0:
+                file_key.append(local_key)
+            elif axis == self._level_axis:
+                file_key.append(self.level_ix)
+            else:
+                file_key.append(other_key.pop(0) if other_key else slice(None))
+        file_key = tuple(file_key)
+
+        with self.pool.open(self.paths[file_ix]) as dataset, NETCDF_LOCK:
+            values = dataset[self.variable_name][file_key]
+        if self.statistics is not None:
+            self.statistics.add(
+                get_bytes_read(
+                    file_key,
+                    layout.shape,
+                    layout.chunk_shape,
+                    self.dtype.itemsize),
+                values.nbytes)
+        return fill_masked(values)
+
+    def close(self):
+        self.pool.close()
+        return
@@ -0,0 +1,156 @@
+"""Classes for recording which frames of an animation were written."""
+from dataclasses import asdict, dataclass
+from glob import glob
+from hashlib import sha256
+import json
+from os.path import exists, getsize, join
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from numpy import ndarray
+
+
+@dataclass
+class FrameRecord:
+    index: int
+    file_name: str  # relative to the directory of the manifest
+    size_in_bytes: int
+    sha256: str
+    render_time_in_seconds: float
+    rendered_at: float  # seconds since the epoch
+    # hash of everything the pixels depend on, None if unknown
+    frame_key: Optional[str] = None
+    # hash of the settings shared by all frames (e.g., color limits), None if
+    # unknown
+    render_key: Optional[str] = None
+
+
+class FrameManifest:
+    """Frames written to `output_dir` in the order of the animation.
+
+    Each process that renders frames appends a `FrameRecord` per written
+    frame to its own json lines file (see `FrameManifestWriter`), so frames
+    rendered by parallel workers or separate jobs never contend for a file.
+    Loading merges all of these files, and if a frame was rendered more than
+    once, its most recent record wins.
+    """
+    FILE_NAME_PATTERN = "manifest*.jsonl"
+
+    @staticmethod
+    def get_file_name(frames: range) -> str:
+        return f"manifest.{frames.start}-{frames.stop}.jsonl"
+
+    def __init__(self, output_dir: str, records: Dict[int, FrameRecord]):
+        self.output_dir = output_dir
+        self._records = records
+        return
+
+    @classmethod
+    def load(cls, output_dir: str) -> "FrameManifest":
+        records: Dict[int, FrameRecord] = {}
+        for manifest_path in sorted(
+                glob(join(output_dir, cls.FILE_NAME_PATTERN))):
+            with open(manifest_path, "r") as manifest_file:
+                for line in manifest_file:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = FrameRecord(**json.loads(line))
+                    except (TypeError, ValueError):
+                        continue  # e.g., a line truncated by a killed job
+                    previous_record = records.get(record.index)
+                    if (previous_record is None
+                            or previous_record.rendered_at
+                            <= record.rendered_at):
+                        records[record.index] = record
+        return cls(output_dir, records)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._records
+
+    def __getitem__(self, index: int) -> FrameRecord:
+        return self._records[index]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get_path(self, index: int) -> str:
+        return join(self.output_dir, self._records[index].file_name)
+
+    def get_missing_frames(self, frames: Iterable[int]) -> List[int]:
+        return [frame for frame in frames if frame not in self._records]
+
+    def get_invalid_frames(
+            self,
+            frames: Iterable[int],
+            verify_checksum: bool = False) -> List[int]:
+        """Frames that are missing, or whose file does not match its record.
+        """
+        invalid_frames = []
+        for frame in frames:
+            if frame not in self._records:
+                invalid_frames.append(frame)
+                continue
+            record = self._records[frame]
+            path = self.get_path(frame)
+            if (not exists(path)
+                    or getsize(path) != record.size_in_bytes
+                    or (verify_checksum
+                        and compute_sha256(path) != record.sha256)):
+                invalid_frames.append(frame)
+        return invalid_frames
+
+    def get_paths(self, frames: Iterable[int]) -> List[str]:
+        """Paths of `frames` in the given order, raises if any is missing."""
+        frames = list(frames)
+        missing_frames = self.get_missing_frames(frames)
+        if len(missing_frames) > 0:
+            raise ValueError(
+                f"{len(missing_frames)} frame(s) are missing from the"
+                f" manifest in {self.output_dir}, e.g., frame"
+                f" {missing_frames[0]}")
+        return [self.get_path(frame) for frame in frames]
+
+
+class FrameManifestWriter:
+    """Append frame records to a json lines manifest file (thread safe)."""
+
+    def __init__(self, manifest_path: str, append: bool = False):
+        self._manifest_file = open(manifest_path, "a" if append else "w")
+        self._lock = Lock()
+        return
+
+    def write(self, record: FrameRecord):
+        with self._lock:
+            self._manifest_file.write(json.dumps(asdict(record)) + "\n")
+            self._manifest_file.flush()
+        return
+
+    def close(self):
+        with self._lock:
+            self._manifest_file.close()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return
+
+
+def compute_sha256(path: str) -> str:
+    digest = sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_array(array: ndarray) -> bytes:
+    """Digest of the dtype, shape, and values of `array`."""
+    array = np.ascontiguousarray(array)
+    digest = sha256(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(memoryview(array).cast("B"))
+    return digest.digest()
@@ -0,0 +1,86 @@
+"""Classes for reading time slices of a response ahead of rendering."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+from numpy import ndarray
+
+
+class PrefetchingFrameSource:
+    """Materialize `response[frame]` as an array, reading ahead in a thread.
+
+    When `frame` is requested, the slices `frame+1, ..., frame+prefetch_depth`
+    (bounded by `stop`) are read in a background thread while the caller
+    renders `frame`. Frames are expected to be requested in ascending order,
+    any other frame is simply read synchronously. A `prefetch_depth` of 0
+    reads every frame synchronously.
+
+    The `response` may be anything indexable along its leading (time) axis
+    that converts to an array, e.g., a numpy array or a dask backed
+    `xarray.DataArray`.
+    """
+
+    def __init__(
+            self,
+            response,
+            prefetch_depth: int = 0,
+            stop: Optional[int] = None):
+        assert prefetch_depth >= 0
+        self._response = response
+        self._prefetch_depth = prefetch_depth
+        self._stop = len(response) if stop is None else stop
+
+        self._executor = None
+        if prefetch_depth > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="frame-prefetch")
+        self._frame_to_pending_slice: Dict[int, Future] = {}
+
+        # the last requested slice is kept since it is often requested twice
+        self._last_frame = None
+        self._last_slice = None
+        return
+
+    def read(self, frame: int) -> ndarray:
+        return np.asarray(self._response[frame])
+
+    def __getitem__(self, frame: int) -> ndarray:
+        if frame == self._last_frame:
+            return self._last_slice
+
+        pending_slice = self._frame_to_pending_slice.pop(frame, None)
+        self._drop_stale_slices(frame)
+        self._prefetch_after(frame)
+        if pending_slice is not None:
+            response_at_time = pending_slice.result()
+        else:
+            response_at_time = self.read(frame)
+
+        self._last_frame = frame
+        self._last_slice = response_at_time
+        return response_at_time
+
+    def _drop_stale_slices(self, frame: int):
+        for stale_frame in [
+                f for f in self._frame_to_pending_slice if f < frame]:
+            self._frame_to_pending_slice.pop(stale_frame).cancel()
+        return
+
+    def _prefetch_after(self, frame: int):
+        if self._executor is None:
+            return
+        last_prefetched_frame = min(
+            frame + self._prefetch_depth, self._stop - 1)
+        for next_frame in range(frame + 1, last_prefetched_frame + 1):
+            if next_frame not in self._frame_to_pending_slice:
+                self._frame_to_pending_slice[next_frame] = (
+                    self._executor.submit(self.read, next_frame))
+        return
+
+    def close(self):
+        for pending_slice in self._frame_to_pending_slice.values():
+            pending_slice.cancel()
+        self._frame_to_pending_slice.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        return
@@ -0,0 +1,228 @@
+"""Single pass, mergeable quantile estimation for arrays larger than memory."""
+from typing import Any, Callable, Sequence, Tuple, Union
+
+import dask
+import dask.array
+import numpy as np
+from numpy import ndarray
+
+
+class _DenseStore:
+    """Counts of consecutive integer keys, collapsing the lowest keys.
+
+    At most `max_num_bins` counts are kept. Keys below the highest key minus
+    `max_num_bins` are counted in the lowest kept bin.
+    """
+
+    def __init__(self, max_num_bins: int):
+        self.max_num_bins = max_num_bins
+        self.offset = 0  # key of counts[0]
+        self.counts = np.zeros(0, dtype=np.int64)
+        return
+
+    @property
+    def keys(self) -> ndarray:
+        return np.arange(self.offset, self.offset + self.counts.size)
+
+    def add_keys(self, keys: ndarray):
+        if keys.size == 0:
+            return
+        keys = np.maximum(keys, keys.max() - self.max_num_bins + 1)
+        offset = keys.min()
+        self._add_counts(offset, np.bincount(keys - offset))
+        return
+
+    def merge(self, other: "_DenseStore"):
+        if other.counts.size > 0:
+            self._add_counts(other.offset, other.counts)
+        return
+
+    def _add_counts(self, offset: int, counts: ndarray):
+        if self.counts.size == 0:
+            lowest_key, highest_key = offset, offset + counts.size
+        else:
+            lowest_key = min(self.offset, offset)
+            highest_key = max(
+                self.offset + self.counts.size, offset + counts.size)
+        merged_counts = np.zeros(highest_key - lowest_key, dtype=np.int64)
+        start = self.offset - lowest_key
+        merged_counts[start:start + self.counts.size] += self.counts
+        start = offset - lowest_key
+        merged_counts[start:start + counts.size] += counts
+
+        num_collapsed_bins = merged_counts.size - self.max_num_bins
+        if num_collapsed_bins > 0:
+            merged_counts[num_collapsed_bins] += (
+                merged_counts[:num_collapsed_bins].sum())
+            merged_counts = merged_counts[num_collapsed_bins:]
+            lowest_key += num_collapsed_bins
+
+        self.offset = int(lowest_key)
+        self.counts = merged_counts
+        return
+
+
+class QuantileSketch:
+    """Logarithmically binned histogram of values (a DDSketch).
+
+    A value `x` is counted in the bin `ceil(log(|x|) / log(gamma))` of the
+    sketch for its sign, where `gamma = (1 + a) / (1 - a)` for the
+    `relative_accuracy` `a`. Every value in a bin is within a relative
+    distance `a` of the bin's representative value, so for any quantile `q`
+    the estimate `e` satisfies
+
+        |e - x_q| <= a * |x_q|,
+
+    where `x_q` is the exact quantile `np.quantile(values, q, method="lower")`,
+    i.e., the element of rank `floor(q * (n - 1))`. The bound does not hold
+    for values whose magnitude is below `min_magnitude`, which are counted
+    as 0, or for the smallest magnitudes of each sign if they span more than
+    `max_num_bins` bins, i.e., a ratio of `gamma**max_num_bins` (about 1e17
+    for the defaults), which are collapsed into the lowest kept bin.
+
+    Memory is bounded by `2 * max_num_bins` counts regardless of the number
+    of values, and sketches of separate chunks of data can be merged into
+    the sketch of all the data, which allows chunks to be sketched in
+    parallel. NaN and infinite values are ignored.
+
+    References:
+    [1] : Masson, Rim, and Lee. "DDSketch: A fast and fully-mergeable
+        quantile sketch with relative-error guarantees." VLDB (2019).
+    """
+
+    def __init__(
+            self,
+            relative_accuracy: float = 0.01,
+            max_num_bins: int = 2048,
+            min_magnitude: float = 1e-12):
+        assert 0 < relative_accuracy < 1
+        assert max_num_bins >= 1
+        assert min_magnitude > 0
+        self.relative_accuracy = relative_accuracy
+        self.max_num_bins = max_num_bins
+        self.min_magnitude = min_magnitude
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self._gamma)
+        self._positive_store = _DenseStore(max_num_bins)
+        self._negative_store = _DenseStore(max_num_bins)
+        self._zero_count = 0
+        return
+
+    @property
+    def count(self) -> int:
+        return int(
+            self._positive_store.counts.sum()
+            + self._negative_store.counts.sum()
+            + self._zero_count)
+
+    def add(self, values: Union[ndarray, float]) -> "QuantileSketch":
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        is_zero = np.abs(values) < self.min_magnitude
+        self._zero_count += int(is_zero.sum())
+        self._positive_store.add_keys(
+            self._get_keys(values[(values > 0) & ~is_zero]))
+        self._negative_store.add_keys(
+            self._get_keys(-values[(values < 0) & ~is_zero]))
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        assert (
+            other.relative_accuracy == self.relative_accuracy
+            and other.min_magnitude == self.min_magnitude), (
+                "only sketches with the same accuracy can be merged")
+        self._positive_store.merge(other._positive_store)
+        self._negative_store.merge(other._negative_store)
+        self._zero_count += other._zero_count
+        return self
+
+    def to_dict(self) -> dict:
+        """Json serializable state of the sketch, see `from_dict`."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_num_bins": self.max_num_bins,
+            "min_magnitude": self.min_magnitude,
+            "zero_count": self._zero_count,
+            "positive_offset": self._positive_store.offset,
+            "positive_counts": self._positive_store.counts.tolist(),
+            "negative_offset": self._negative_store.offset,
+            "negative_counts": self._negative_store.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "QuantileSketch":
+        sketch = cls(
+            relative_accuracy=state["relative_accuracy"],
+            max_num_bins=state["max_num_bins"],
+            min_magnitude=state["min_magnitude"])
+        sketch._zero_count = state["zero_count"]
+        for store, sign in (
+                (sketch._positive_store, "positive"),
+                (sketch._negative_store, "negative")):
+            store.offset = state[f"{sign}_offset"]
+            store.counts = np.asarray(
+                state[f"{sign}_counts"], dtype=np.int64)
+        return sketch
+
+    def _get_keys(self, magnitudes: ndarray) -> ndarray:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _get_values(self, keys: ndarray) -> ndarray:
+        return 2 * self._gamma**keys.astype(np.float64) / (self._gamma + 1)
+
+    def quantiles(self, quantiles: Sequence[float]) -> ndarray:
+        """Estimates of the `quantiles` (each in [0, 1]) of all values."""
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        assert np.all((quantiles >= 0) & (quantiles <= 1))
+        count = self.count
+        if count == 0:
+            raise ValueError("cannot compute quantiles of an empty sketch")
+
+        # bins in ascending order of their values
+        values = np.concatenate([
+            -self._get_values(self._negative_store.keys)[::-1],
+            [0.],
+            self._get_values(self._positive_store.keys)])
+        counts = np.concatenate([
+            self._negative_store.counts[::-1],
+            [self._zero_count],
+            self._positive_store.counts])
+        ranks = quantiles * (count - 1)
+        return values[np.searchsorted(np.cumsum(counts), ranks, side="right")]
+
+    def quantile(self, quantile: float) -> float:
+        return float(self.quantiles([quantile])[0])
+
+
+def _merge_all(*summaries):
+    merged_summary = summaries[0]
+    for summary in summaries[1:]:
+        merged_summary.merge(summary)
+    return merged_summary
+
+
+def map_reduce_blocks(
+        data: dask.array.Array,
+        summarize_block: Callable[[ndarray, Tuple[int, ...]], Any],
+        split_every: int = 8):
+    """Summarize each block of `data` and merge the summaries in a tree.
+
+    `summarize_block(block, block_offset)` is called with every block and
+    the index of its first element, and must return an object with a
+    `merge(other)` method that merges `other` into it. The blocks are
+    summarized in parallel by the dask scheduler with `split_every`
+    summaries per merge, so memory is bounded by the blocks in flight
+    rather than the size of `data`.
+    """
+    block_starts = [np.cumsum((0,) + chunks[:-1]) for chunks in data.chunks]
+    summaries = [
+        dask.delayed(summarize_block)(
+            block,
+            tuple(int(starts[i]) for starts, i in zip(block_starts, index)))
+        for index, block in np.ndenumerate(data.to_delayed())]
+    while len(summaries) > 1:
+        summaries = [
+            dask.delayed(_merge_all)(*summaries[i:i + split_every])
+            for i in range(0, len(summaries), split_every)]
+    return summaries[0].compute()
+
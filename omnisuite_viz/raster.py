@@ -0,0 +1,225 @@
+"""Vectorized resampling and color mapping of lat/lon fields to rasters."""
+from matplotlib import colormaps
+import numpy as np
+from numpy import ndarray
+from typing import Optional, Tuple
+
+
+def plate_carree_pixel_centers(
+        width: int,
+        height: int,
+        extent: Tuple[float, float, float, float] = (-180, 180, -90, 90)
+) -> Tuple[ndarray, ndarray]:
+    """Longitudes (left to right) and latitudes (top to bottom) of pixels."""
+    longitude_min, longitude_max, latitude_min, latitude_max = extent
+    longitude = longitude_min + (
+        (np.arange(width) + 0.5) * (longitude_max - longitude_min) / width)
+    latitude = latitude_max - (
+        (np.arange(height) + 0.5) * (latitude_max - latitude_min) / height)
+    return longitude, latitude
+
+
+class AxisResampler:
+    """Map target coordinates onto indices of a monotonic source axis.
+
+    A periodic axis (e.g., a global longitude) wraps around by 360 degrees so
+    that target coordinates between the last and first source coordinate are
+    interpolated between the last and first source index.
+    """
+
+    def __init__(
+            self,
+            source: ndarray,
+            target: ndarray,
+            periodic: bool = False,
+            method: str = "nearest"):
+        assert method in ("nearest", "bilinear")
+        source = np.asarray(source, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        size = source.size
+
+        # work on an increasing axis, indices are flipped back below
+        self.is_descending = size > 1 and source[0] > source[-1]
+        if self.is_descending:
+            source = source[::-1]
+
+        index = np.arange(size, dtype=np.float64)
+        if periodic:
+            target = source[0] + np.mod(target - source[0], 360)
+            source = np.append(source, source[0] + 360)
+            index = np.append(index, size)
+
+        fractional_index = np.interp(target, source, index)
+        lower = np.floor(fractional_index).astype(np.intp)
+        weight = (fractional_index - lower).astype(np.float32)
+        upper = lower + 1
+        if periodic:
+            lower, upper = lower % size, upper % size
+        else:
+            lower = np.clip(lower, 0, size - 1)
+            upper = np.clip(upper, 0, size - 1)
+
+        if method == "nearest":
+            lower = np.where(weight < 0.5, lower, upper)
+            upper = None
+            weight = None
+
+        if self.is_descending:
+            lower = size - 1 - lower
+            upper = None if upper is None else size - 1 - upper
+
+        self.lower = lower
+        self.upper = upper
+        self.weight = weight
+        return
+
+    def __call__(self, array: ndarray, axis: int) -> ndarray:
+        lower = np.take(array, self.lower, axis=axis)
+        if self.upper is None:
+            return lower
+        upper = np.take(array, self.upper, axis=axis)
+        shape = [1] * array.ndim
+        shape[axis] = -1
+        weight = self.weight.reshape(shape)
+        return lower + (upper - lower) * weight
+
+
+class GridResampler:
+    """Separable nearest/bilinear resampling of a (lat, lon) field."""
+
+    def __init__(
+            self,
+            source_latitude: ndarray,
+            source_longitude: ndarray,
+            target_latitude: ndarray,
+            target_longitude: ndarray,
+            method: str = "nearest"):
+        self._latitude_resampler = AxisResampler(
+            source_latitude, target_latitude, method=method)
+        self._longitude_resampler = AxisResampler(
+            source_longitude, target_longitude,
+            periodic=self._is_global_longitude(source_longitude),
+            method=method)
+        return
+
+    @staticmethod
+    def _is_global_longitude(longitude: ndarray) -> bool:
+        longitude = np.asarray(longitude, dtype=np.float64)
+        if longitude.size < 2:
+            return False
+        spacing = abs(longitude[-1] - longitude[0]) / (longitude.size - 1)
+        return abs(longitude[-1] - longitude[0]) + spacing >= 360 - 1e-6
+
+    def __call__(self, field: ndarray) -> ndarray:
+        """Resample the leading (lat, lon) axes of `field`."""
+        field = self._latitude_resampler(field, axis=0)
+        return self._longitude_resampler(field, axis=1)
+
+
+class ColormapBlender:
+    """Color map a field through a lookup table and blend it over an image.
+
+    Blending is done in uint16 arithmetic with lookup tables of the colors
+    premultiplied by their alpha in [0, 256] and of the weights of the
+    background, i.e., a pixel is `(background*weight + premultiplied) >> 8`.
+    The background weighted by the most common weight (that of an opaque
+    color map) is computed once per background, so only pixels of other
+    weights (e.g., NaN) are blended one by one. Intermediates are kept in
+    buffers that are reused by frames of the same shape.
+    """
+
+    def __init__(
+            self,
+            cmap: str,
+            vmin: float,
+            vmax: float,
+            alpha: float,
+            num_colors: int = 256):
+        assert vmax > vmin
+        rgba = colormaps[cmap].resampled(num_colors)(np.arange(num_colors))
+        # the extra entry is fully transparent and is used for NaN values
+        rgba = np.vstack([rgba, np.zeros((1, 4))])
+        rgb = np.round(rgba[:, :3] * 255).astype(np.uint16)
+        alpha = np.round(rgba[:, 3] * alpha * 256).astype(np.uint16)
+        # +128 rounds to nearest, at most 255*256 + 128 fits into uint16
+        self._premultiplied_rgb = rgb * alpha[:, None] + 128
+        self._background_weight = 256 - alpha
+        weights, counts = np.unique(
+            self._background_weight, return_counts=True)
+        self._common_weight = weights[np.argmax(counts)]
+        self._has_other_weight = (
+            self._background_weight != self._common_weight)
+        self._vmin = np.float32(vmin)
+        self._scale = np.float32(num_colors / (vmax - vmin))
+        self._num_colors = num_colors
+        self._buffers = {}
+        self._weighted_background = None
+        self._weighted_background_source = None
+        return
+
+    def _get_buffer(
+            self,
+            name: str,
+            shape: Tuple[int, ...],
+            dtype: type) -> ndarray:
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[name] = np.empty(shape, dtype=dtype)
+        return buffer
+
+    def _get_weighted_background(self, background: ndarray) -> ndarray:
+        if background is not self._weighted_background_source:
+            self._weighted_background = (
+                background.astype(np.uint16) * self._common_weight)
+            self._weighted_background_source = background
+        return self._weighted_background
+
+    def lookup_indices(self, field: ndarray) -> ndarray:
+        """Indices into the lookup tables, NaN maps to the transparent one.
+        """
+        field = np.asarray(field, dtype=np.float32)
+        scaled = self._get_buffer("scaled", field.shape, np.float32)
+        np.subtract(field, self._vmin, out=scaled)
+        scaled *= self._scale
+        is_nan = np.isnan(scaled)
+        np.clip(scaled, 0, self._num_colors - 1, out=scaled)
+        np.copyto(scaled, self._num_colors, where=is_nan)
+        indices = self._get_buffer("indices", field.shape, np.intp)
+        np.copyto(indices, scaled, casting="unsafe")
+        return indices
+
+    def blend(
+            self,
+            field: ndarray,
+            background: ndarray,
+            out: Optional[ndarray] = None) -> ndarray:
+        """RGB uint8 image of `field` drawn over uint8 RGB `background`.
+
+        The image is written into `out` if given.
+        """
+        indices = self.lookup_indices(field)
+        shape = indices.shape + (3,)
+        if out is None:
+            out = np.empty(shape, dtype=np.uint8)
+        blended = self._get_buffer("blended", shape, np.uint16)
+        np.take(
+            self._premultiplied_rgb, indices, axis=0, out=blended,
+            mode="clip")
+        blended += self._get_weighted_background(background)
+        np.right_shift(blended, 8, out=out, casting="unsafe")
+
+        # e.g., NaN, rarely more than a small fraction of the pixels
+        has_other_weight = self._get_buffer(
+            "has_other_weight", indices.shape, np.bool_)
+        np.take(
+            self._has_other_weight, indices, out=has_other_weight,
+            mode="clip")
+        pixels = np.flatnonzero(has_other_weight)
+        if len(pixels) > 0:
+            pixel_indices = indices.ravel()[pixels]
+            pixel_background = background.reshape(-1, 3)[pixels]
+            out.reshape(-1, 3)[pixels] = (
+                pixel_background
+                * self._background_weight[pixel_indices, None]
+                + self._premultiplied_rgb[pixel_indices]) >> 8
+        return out
@@ -1,17 +1,40 @@
 """Classes for reading and post processing data."""
 
 from abc import ABC, abstractmethod
+from typing import Optional
+
 from omnisuite_viz.grid import Grid2D
+from omnisuite_viz.timing import PhaseTimer
 
 
 class AbstractReader(ABC):
-    """Abstract class for reading and post processing (e.g., weather) data."""
-    @abstractmethod
+    """Abstract class for reading and post processing (e.g., weather) data.
+
+    `read` and `postprocess` record their time as the phases "read" and
+    "postprocess" of `timer`, e.g., the timer of the animator of the grid so
+    that they are reported together.
+    """
+
+    def __init__(self, timer: Optional[PhaseTimer] = None):
+        self.timer = PhaseTimer() if timer is None else timer
+        return
+
     def read(self):
+        with self.timer.phase("read"):
+            self._read()
+        return
+
+    def postprocess(self):
+        with self.timer.phase("postprocess"):
+            self._postprocess()
+        return
+
+    @abstractmethod
+    def _read(self):
         raise NotImplementedError
 
     @abstractmethod
-    def postprocess(self):
+    def _postprocess(self):
         raise NotImplementedError
 
     @property
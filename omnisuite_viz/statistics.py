@@ -0,0 +1,257 @@
+"""Statistics of a response variable that are computed once per input."""
+from dataclasses import dataclass
+from glob import glob
+from hashlib import sha256
+import json
+import os
+from os.path import abspath, exists, isdir, join
+from typing import List, Optional, Sequence, Tuple, Union
+
+import dask.array
+import numpy as np
+from numpy import ndarray
+from xarray import DataArray
+
+from omnisuite_viz.quantile import QuantileSketch, map_reduce_blocks
+
+
+class _FrameStatisticsAccumulator:
+    """Per-frame count, min, max, mean, and sum of squared deviations.
+
+    Frames are the entries of the leading axis of the added blocks. Partial
+    statistics of the same frames (e.g., of separate spatial blocks) are
+    combined with the parallel variance algorithm of Chan et al.
+    """
+
+    def __init__(self, num_frames: int, **sketch_kwargs):
+        self.count = np.zeros(num_frames, dtype=np.int64)
+        self.minimum = np.full(num_frames, np.inf)
+        self.maximum = np.full(num_frames, -np.inf)
+        self.mean = np.zeros(num_frames)
+        self.m2 = np.zeros(num_frames)
+        self.sketch = QuantileSketch(**sketch_kwargs)
+        return
+
+    def add(self, block: ndarray, frame_start: int = 0):
+        block = np.asarray(block, dtype=np.float64)
+        self.sketch.add(block)
+        values = block.reshape(block.shape[0], -1)
+        is_finite = np.isfinite(values)
+        count = is_finite.sum(axis=1)
+        has_values = count > 0
+        minimum = np.where(is_finite, values, np.inf).min(axis=1)
+        maximum = np.where(is_finite, values, -np.inf).max(axis=1)
+        finite_values = np.where(is_finite, values, 0.)
+        mean = np.divide(
+            finite_values.sum(axis=1), count,
+            out=np.zeros(len(values)), where=has_values)
+        deviations = np.where(is_finite, values - mean[:, None], 0.)
+        m2 = (deviations**2).sum(axis=1)
+        self._merge_frames(
+            slice(frame_start, frame_start + len(values)),
+            count, minimum, maximum, mean, m2)
+        return
+
+    def merge(self, other: "_FrameStatisticsAccumulator"):
+        self._merge_frames(
+            slice(None),
+            other.count, other.minimum, other.maximum, other.mean, other.m2)
+        self.sketch.merge(other.sketch)
+        return
+
+    def _merge_frames(self, frames: slice, count, minimum, maximum, mean, m2):
+        total_count = self.count[frames] + count
+        delta = mean - self.mean[frames]
+        weight = np.divide(
+            count, total_count,
+            out=np.zeros(len(total_count)), where=total_count > 0)
+        self.m2[frames] += m2 + delta**2 * self.count[frames] * weight
+        self.mean[frames] += delta * weight
+        self.count[frames] = total_count
+        self.minimum[frames] = np.minimum(self.minimum[frames], minimum)
+        self.maximum[frames] = np.maximum(self.maximum[frames], maximum)
+        return
+
+
+@dataclass
+class ResponseStatistics:
+    """Per-frame and global statistics of a response, ignoring NaNs.
+
+    Frames without finite values have NaN statistics. Quantiles are estimated
+    from `sketch`, so any quantiles can be derived without reading the
+    response again.
+    """
+    frame_min: List[float]
+    frame_max: List[float]
+    frame_mean: List[float]
+    frame_std: List[float]
+    min: float
+    max: float
+    mean: float
+    std: float
+    count: int
+    sketch: QuantileSketch
+
+    @classmethod
+    def compute(
+            cls,
+            response: Union[ndarray, DataArray, dask.array.Array],
+            **sketch_kwargs) -> "ResponseStatistics":
+        """Compute the statistics in a single pass over `response`.
+
+        The blocks of a dask backed response are processed in parallel (see
+        `map_reduce_blocks`), other responses one frame at a time.
+        """
+        data = response.data if isinstance(response, DataArray) else response
+        num_frames = data.shape[0]
+        if isinstance(data, dask.array.Array):
+            def summarize_block(block, block_offset):
+                accumulator = _FrameStatisticsAccumulator(
+                    num_frames, **sketch_kwargs)
+                accumulator.add(block, block_offset[0])
+                return accumulator
+            accumulator = map_reduce_blocks(data, summarize_block)
+        else:
+            accumulator = _FrameStatisticsAccumulator(
+                num_frames, **sketch_kwargs)
+            for frame in range(num_frames):
+                accumulator.add(np.asarray(data[frame:frame + 1]), frame)
+        return cls._from_accumulator(accumulator)
+
+    @classmethod
+    def _from_accumulator(
+            cls,
+            accumulator: _FrameStatisticsAccumulator) -> "ResponseStatistics":
+        count = accumulator.count
+        has_values = count > 0
+        total_count = int(count.sum())
+        if total_count > 0:
+            minimum = float(accumulator.minimum.min())
+            maximum = float(accumulator.maximum.max())
+            mean = float((count * accumulator.mean).sum() / total_count)
+            m2 = (
+                accumulator.m2.sum()
+                + (count * (accumulator.mean - mean)**2).sum())
+            std = float(np.sqrt(m2 / total_count))
+        else:
+            minimum = maximum = mean = std = float("nan")
+
+        def with_nan(values: ndarray) -> List[float]:
+            return np.where(has_values, values, np.nan).tolist()
+
+        return cls(
+            frame_min=with_nan(accumulator.minimum),
+            frame_max=with_nan(accumulator.maximum),
+            frame_mean=with_nan(accumulator.mean),
+            frame_std=with_nan(np.sqrt(np.divide(
+                accumulator.m2, count,
+                out=np.zeros(len(count)), where=has_values))),
+            min=minimum,
+            max=maximum,
+            mean=mean,
+            std=std,
+            count=total_count,
+            sketch=accumulator.sketch)
+
+    def quantiles(self, quantiles: Sequence[float]) -> Tuple[float, ...]:
+        return tuple(float(q) for q in self.sketch.quantiles(quantiles))
+
+    def to_dict(self) -> dict:
+        state = {
+            name: value for name, value in vars(self).items()
+            if name != "sketch"}
+        state["sketch"] = self.sketch.to_dict()
+        return state
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "ResponseStatistics":
+        state = dict(state)
+        state["sketch"] = QuantileSketch.from_dict(state["sketch"])
+        return cls(**state)
+
+
+# metadata files of Zarr (v3 and v2) groups and arrays
+ZARR_METADATA_FILE_NAMES = (
+    "zarr.json", ".zgroup", ".zarray", ".zattrs", ".zmetadata")
+
+
+def _get_zarr_metadata_paths(store_path: str) -> List[str]:
+    """Paths of the metadata files of the groups and arrays of a store.
+
+    Only directories with metadata files are descended into, so the chunk
+    files are neither listed nor stat-ed.
+    """
+    metadata_paths = []
+    for dir_path, dir_names, file_names in os.walk(store_path):
+        dir_names[:] = sorted(
+            dir_name for dir_name in dir_names
+            if any(
+                exists(join(dir_path, dir_name, metadata_file_name))
+                for metadata_file_name in ZARR_METADATA_FILE_NAMES))
+        metadata_paths.extend(
+            join(dir_path, file_name) for file_name in sorted(file_names)
+            if file_name in ZARR_METADATA_FILE_NAMES)
+    return metadata_paths
+
+
+def fingerprint_files(file_paths: Sequence[str], **selection) -> str:
+    """Hash of the paths, sizes, and modification times of the input files.
+
+    `file_paths` may contain glob patterns. `selection` describes what is
+    read from the files, e.g., the variable and level, and must be json
+    serializable. Directories (e.g., Zarr stores) are fingerprinted by their
+    metadata files (see `ZARR_METADATA_FILE_NAMES`), which are rewritten
+    whenever a store is (re)written, e.g., by `ingest_into_zarr`. Chunks
+    modified in place without touching the metadata are not detected.
+    """
+    files = []
+    for file_path in file_paths:
+        for path in sorted(glob(file_path)) or [file_path]:
+            paths = _get_zarr_metadata_paths(path) if isdir(path) else [path]
+            for path in paths:
+                stat = os.stat(path)
+                files.append(
+                    [abspath(path), stat.st_size, stat.st_mtime_ns])
+    key = json.dumps(
+        {"files": files, "selection": selection}, sort_keys=True)
+    return sha256(key.encode()).hexdigest()
+
+
+class StatisticsSidecar:
+    """Statistics of a response stored in `statistics_dir` by fingerprint.
+
+    Since the fingerprint changes whenever an input file is replaced or
+    modified, a stored file is never stale.
+    """
+
+    def __init__(self, statistics_dir: str, fingerprint: str):
+        self.path = join(statistics_dir, f"statistics.{fingerprint}.json")
+        self._statistics_dir = statistics_dir
+        return
+
+    def load(self) -> Optional[ResponseStatistics]:
+        if not exists(self.path):
+            return None
+        try:
+            with open(self.path, "r") as f:
+                return ResponseStatistics.from_dict(json.load(f))
+        except (TypeError, ValueError, KeyError):
+            return None  # e.g., written by a killed run
+
+    def save(self, statistics: ResponseStatistics):
+        os.makedirs(self._statistics_dir, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(statistics.to_dict(), f)
+        os.replace(temp_path, self.path)  # atomic, no partial sidecars
+        return
+
+    def load_or_compute(
+            self,
+            response: Union[ndarray, DataArray, dask.array.Array],
+            **sketch_kwargs) -> ResponseStatistics:
+        statistics = self.load()
+        if statistics is None:
+            statistics = ResponseStatistics.compute(response, **sketch_kwargs)
+            self.save(statistics)
+        return statistics
@@ -0,0 +1,165 @@
+"""Synthetic multifile NetCDF data laid out like ICON output.
+
+The files mimic the `GWS_*`/`BAL_*` outputs read by the multifile ICON
+example, i.e., files named `<prefix>_<YYYYMMDDhhmm><file number>.nc` with
+`(time, lev, lat, lon)` variables and `lat`/`lon` coordinates, so that the
+read path can be tested and benchmarked without access to the original data.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import os
+from os.path import join
+from typing import List, Optional, Tuple
+
+import netCDF4
+import numpy as np
+from numpy import ndarray
+
+TIME_UNITS = "hours since 1970-01-01 00:00:00"
+
+
+@dataclass(kw_only=True)
+class SyntheticICONConfig:
+    """Layout of a synthetic multifile dataset.
+
+    The defaults are a small dataset, the files on Levante are, e.g.,
+    `num_levels=152, num_latitudes=512, num_longitudes=1024` with one time
+    step per file.
+    """
+    prefix: str = "GWS"
+    num_files: int = 4
+    num_times_per_file: int = 1
+    num_levels: int = 8
+    num_latitudes: int = 90
+    num_longitudes: int = 180
+    variables: Tuple[str, ...] = ("u", "v", "temp", "Z")
+
+    start_time: datetime = datetime(2022, 12, 1)
+    time_step_in_hours: int = 6
+    # every file labels its times from `start_time` like the ICON outputs
+    # that must be concatenated with `concat_dim="time"`
+    restart_time_per_file: bool = False
+    first_file_number: int = 60
+
+    # NetCDF chunk sizes of (time, lev, lat, lon), None lets the library
+    # choose (e.g., one time step per chunk)
+    chunks: Optional[Tuple[int, int, int, int]] = None
+    # zlib level, 0 does not compress
+    compression_level: int = 0
+    shuffle: bool = True
+    dtype: str = "float32"
+    seed: int = 0
+
+    def __post_init__(self):
+        assert self.num_files >= 1
+        assert min(
+            self.num_times_per_file,
+            self.num_levels,
+            self.num_latitudes,
+            self.num_longitudes) >= 1
+        assert len(self.variables) >= 1
+        assert 0 <= self.compression_level <= 9
+        if self.chunks is not None:
+            assert len(self.chunks) == 4 and min(self.chunks) >= 1, (
+                "chunks must be sizes of (time, lev, lat, lon)")
+
+    @property
+    def num_times(self) -> int:
+        return self.num_files * self.num_times_per_file
+
+    def get_file_name(self, file_ix: int) -> str:
+        return (
+            f"{self.prefix}_{self.start_time:%Y%m%d%H%M}"
+            f"{self.first_file_number + file_ix:03d}.nc")
+
+
+def write_synthetic_icon_files(
+        output_dir: str, config: SyntheticICONConfig) -> List[str]:
+    """Write the files of `config` to `output_dir` and return their paths.
+
+    Each variable is a wave travelling eastward over time, varying with
+    level, plus a little noise, so that it compresses like smooth model
+    output. Files are written one (time, level) slice at a time, so that
+    memory is bounded by a single slice regardless of the dataset's size.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    latitude = np.linspace(-90, 90, config.num_latitudes)
+    longitude = np.linspace(-180, 180, config.num_longitudes, endpoint=False)
+    longitude_mesh, latitude_mesh = np.meshgrid(
+        np.deg2rad(longitude), np.deg2rad(latitude))
+    rng = np.random.default_rng(config.seed)
+
+    paths = []
+    for file_ix in range(config.num_files):
+        path = join(output_dir, config.get_file_name(file_ix))
+        with netCDF4.Dataset(path, "w", format="NETCDF4") as dataset:
+            _write_coordinates(dataset, config, file_ix, latitude, longitude)
+            for variable_ix, variable in enumerate(config.variables):
+                nc_variable = dataset.createVariable(
+                    variable,
+                    config.dtype,
+                    ("time", "lev", "lat", "lon"),
+                    zlib=config.compression_level > 0,
+                    complevel=config.compression_level,
+                    shuffle=config.shuffle,
+                    chunksizes=config.chunks)
+                for time_ix in range(config.num_times_per_file):
+                    time_step = file_ix*config.num_times_per_file + time_ix
+                    for level in range(config.num_levels):
+                        nc_variable[time_ix, level] = _get_wave(
+                            longitude_mesh,
+                            latitude_mesh,
+                            phase=0.5*time_step + 0.1*level + variable_ix,
+                            rng=rng)
+        paths.append(path)
+    return paths
+
+
+def _write_coordinates(
+        dataset: netCDF4.Dataset,
+        config: SyntheticICONConfig,
+        file_ix: int,
+        latitude: ndarray,
+        longitude: ndarray):
+    dataset.createDimension("time", None)
+    dataset.createDimension("lev", config.num_levels)
+    dataset.createDimension("lat", config.num_latitudes)
+    dataset.createDimension("lon", config.num_longitudes)
+
+    first_time_step = (
+        0 if config.restart_time_per_file
+        else file_ix*config.num_times_per_file)
+    times = [
+        config.start_time
+        + timedelta(hours=config.time_step_in_hours*(first_time_step + t))
+        for t in range(config.num_times_per_file)]
+    time = dataset.createVariable("time", "f8", ("time",))
+    time.units = TIME_UNITS
+    time.calendar = "proleptic_gregorian"
+    time[:] = netCDF4.date2num(times, TIME_UNITS, "proleptic_gregorian")
+
+    lev = dataset.createVariable("lev", "f8", ("lev",))
+    lev.standard_name = "model_level_number"
+    lev[:] = np.arange(1, config.num_levels + 1)
+
+    lat = dataset.createVariable("lat", "f8", ("lat",))
+    lat.units = "degrees_north"
+    lat.standard_name = "latitude"
+    lat[:] = latitude
+
+    lon = dataset.createVariable("lon", "f8", ("lon",))
+    lon.units = "degrees_east"
+    lon.standard_name = "longitude"
+    lon[:] = longitude
+    return
+
+
+def _get_wave(
+        longitude_mesh: ndarray,
+        latitude_mesh: ndarray,
+        phase: float,
+        rng: np.random.Generator) -> ndarray:
+    noise = rng.normal(scale=0.01, size=longitude_mesh.shape)
+    return (
+        10*np.sin(4*longitude_mesh - phase)*np.cos(latitude_mesh)
+        + noise)
@@ -0,0 +1,356 @@
+"""Wall and CPU time, and memory, of the phases of reading and animating."""
+from contextlib import contextmanager
+import csv
+from dataclasses import asdict, dataclass, fields
+import json
+import os
+from os.path import splitext
+import resource
+import sys
+from time import perf_counter, process_time, time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+BYTES_PER_MEGABYTE = 2**20
+
+
+@dataclass
+class PhaseTiming:
+    phase: str
+    frame: Optional[int]  # None for phases that are not per frame
+    wall_time_in_seconds: float
+    # of the whole process, i.e., includes threads working during the phase
+    cpu_time_in_seconds: float
+    started_at: float  # seconds since the epoch
+    process_id: int
+    # only recorded if memory is profiled, see `PhaseTimer`
+    rss_in_bytes: Optional[int] = None
+    peak_rss_in_bytes: Optional[int] = None
+    peak_traced_in_bytes: Optional[int] = None
+    top_allocations: Optional[List[str]] = None
+
+
+@dataclass
+class ArrayRecord:
+    name: str
+    shape: List[int]
+    dtype: str
+    nbytes: int
+    # e.g., a dask backed response, whose bytes are only read per chunk
+    is_lazy: bool
+    phase: str  # the phase after which the array was alive
+    process_id: int
+
+
+def get_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, None if unknown."""
+    return _read_proc_status("VmRSS")
+
+
+def get_peak_rss() -> int:
+    """Peak resident set size in bytes since the start or last reset."""
+    peak_rss = _read_proc_status("VmHWM")
+    if peak_rss is not None:
+        return peak_rss
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss*1024
+
+
+def reset_peak_rss():
+    """Reset the peak resident set size (Linux only, else a no-op)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    return
+
+
+def _read_proc_status(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])*1024  # in kB
+    except OSError:
+        pass
+    return None
+
+
+def find_arrays(name: str, owner: Any, depth: int = 2) -> Dict[str, Any]:
+    """Arrays among the attributes of `owner` by their dotted name.
+
+    Attributes that are instances of classes of this package (e.g., a
+    `PrefetchingFrameSource`) are searched `depth - 1` levels deeper.
+    """
+    # only imported when profiling, e.g., not by configs of numpy animators
+    import dask.array
+    from xarray import DataArray
+
+    name_to_array = {}
+    for attribute, value in vars(owner).items():
+        attribute_name = f"{name}.{attribute}"
+        if isinstance(value, (np.ndarray, DataArray, dask.array.Array)):
+            name_to_array[attribute_name] = value
+        elif (depth > 1 and hasattr(value, "__dict__")
+                and type(value).__module__.startswith("omnisuite_viz")):
+            name_to_array.update(
+                find_arrays(attribute_name, value, depth - 1))
+    return name_to_array
+
+
+def _get_peak_traced() -> int:
+    return tracemalloc.get_traced_memory()[1]
+
+
+class _NestedPeaks:
+    """Peak of a resettable high water mark during each of nested phases.
+
+    The mark is reset when a phase starts, so that its peak only covers the
+    phase, after the peak so far was folded into the phases enclosing it.
+    """
+
+    def __init__(
+            self,
+            read_peak: Callable[[], int],
+            reset_peak: Callable[[], None]):
+        self._read_peak = read_peak
+        self._reset_peak = reset_peak
+        self._open_peaks: List[int] = []
+        return
+
+    def start(self):
+        self._fold_peak()
+        self._open_peaks.append(0)
+        self._reset_peak()
+        return
+
+    def stop(self) -> int:
+        self._fold_peak()
+        return self._open_peaks.pop()
+
+    def _fold_peak(self):
+        peak = self._read_peak()
+        self._open_peaks = [max(peak, p) for p in self._open_peaks]
+        return
+
+
+class PhaseTimer:
+    """Record the wall and CPU time of named phases.
+
+    Phases may be nested (e.g., "animate" contains every "update_frame") and
+    are recorded once per call, so per-frame phases get one timing per frame.
+    Records of other processes (e.g., parallel workers) are combined with
+    `merge`.
+
+    If `profile_memory`, each timing also records the resident set size at
+    the end and the peak resident set size during the phase. The peak is
+    reset at the start of every phase on Linux, elsewhere it is the peak of
+    the process so far. `record_arrays` records the largest arrays alive
+    after a phase.
+
+    If `trace_allocations`, allocations are traced with `tracemalloc`
+    (which slows down allocating considerably), and each timing records the
+    peak of traced memory during the phase and, except for per-frame phases,
+    the `num_top_allocations` source lines with the most memory alive at the
+    end of the phase.
+    """
+    REPORT_FORMATS = (".json", ".csv")
+
+    def __init__(
+            self,
+            profile_memory: bool = False,
+            trace_allocations: bool = False,
+            num_top_allocations: int = 10):
+        self.profile_memory = profile_memory or trace_allocations
+        self.trace_allocations = trace_allocations
+        self.num_top_allocations = num_top_allocations
+        self.timings: List[PhaseTiming] = []
+        self.arrays: List[ArrayRecord] = []
+        self._rss_peaks = _NestedPeaks(get_peak_rss, reset_peak_rss)
+        self._traced_peaks = _NestedPeaks(
+            _get_peak_traced, tracemalloc.reset_peak)
+        return
+
+    def empty_copy(self) -> "PhaseTimer":
+        """Timer with the same settings but without any records."""
+        return PhaseTimer(
+            self.profile_memory,
+            self.trace_allocations,
+            self.num_top_allocations)
+
+    @contextmanager
+    def phase(self, name: str, frame: Optional[int] = None) -> Iterator[None]:
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._traced_peaks.start()
+        if self.profile_memory:
+            self._rss_peaks.start()
+        started_at = time()
+        wall_start = perf_counter()
+        cpu_start = process_time()
+        try:
+            yield
+        finally:
+            timing = PhaseTiming(
+                phase=name,
+                frame=frame,
+                wall_time_in_seconds=perf_counter() - wall_start,
+                cpu_time_in_seconds=process_time() - cpu_start,
+                started_at=started_at,
+                process_id=os.getpid())
+            if self.profile_memory:
+                timing.rss_in_bytes = get_rss()
+                timing.peak_rss_in_bytes = self._rss_peaks.stop()
+            if self.trace_allocations:
+                timing.peak_traced_in_bytes = self._traced_peaks.stop()
+                if frame is None:
+                    timing.top_allocations = self._get_top_allocations()
+            self.timings.append(timing)
+        return
+
+    def _get_top_allocations(self) -> List[str]:
+        statistics = tracemalloc.take_snapshot().statistics("lineno")
+        return [
+            f"{statistic.traceback[0].filename}"
+            f":{statistic.traceback[0].lineno}"
+            f" {statistic.size / BYTES_PER_MEGABYTE:.1f} MB"
+            f" in {statistic.count} blocks"
+            for statistic in statistics[:self.num_top_allocations]]
+
+    def record_arrays(
+            self,
+            phase: str,
+            name_to_array: Dict[str, Any],
+            num_largest_arrays: int = 10):
+        """Record the largest of the arrays alive after `phase`.
+
+        The arrays may be numpy, dask, or xarray arrays, and an array that
+        is referenced by several names is recorded by its first name.
+        """
+        import dask.array
+        from xarray import DataArray
+
+        records = []
+        recorded_arrays = set()
+        for name, array in name_to_array.items():
+            data = array.data if isinstance(array, DataArray) else array
+            if id(data) in recorded_arrays:
+                continue
+            recorded_arrays.add(id(data))
+            records.append(ArrayRecord(
+                name=name,
+                shape=[int(size) for size in np.shape(data)],
+                dtype=str(data.dtype),
+                nbytes=int(data.nbytes),
+                is_lazy=isinstance(data, dask.array.Array),
+                phase=phase,
+                process_id=os.getpid()))
+        records.sort(key=lambda record: record.nbytes, reverse=True)
+        self.arrays.extend(records[:num_largest_arrays])
+        return
+
+    def merge(self, other: "PhaseTimer"):
+        self.timings.extend(other.timings)
+        self.arrays.extend(other.arrays)
+        return
+
+    def get_total_wall_time(self, phase: str) -> float:
+        return sum(
+            timing.wall_time_in_seconds for timing in self.timings
+            if timing.phase == phase)
+
+    def summarize(self) -> List[Dict]:
+        """Wall and CPU time of each phase in order of first occurrence.
+
+        With memory profiling, the peak resident set size over all calls of
+        the phase is included.
+        """
+        phase_to_timings: Dict[str, List[PhaseTiming]] = {}
+        for timing in self.timings:
+            phase_to_timings.setdefault(timing.phase, []).append(timing)
+        summary = []
+        for phase, timings in phase_to_timings.items():
+            wall_times = [timing.wall_time_in_seconds for timing in timings]
+            peak_rss = [
+                timing.peak_rss_in_bytes for timing in timings
+                if timing.peak_rss_in_bytes is not None]
+            summary.append({
+                "phase": phase,
+                "count": len(timings),
+                "total_wall_time_in_seconds": sum(wall_times),
+                "mean_wall_time_in_seconds": sum(wall_times) / len(timings),
+                "max_wall_time_in_seconds": max(wall_times),
+                "total_cpu_time_in_seconds": sum(
+                    timing.cpu_time_in_seconds for timing in timings),
+                "peak_rss_in_bytes": max(peak_rss) if peak_rss else None,
+            })
+        return summary
+
+    def format_summary(self) -> str:
+        header = (
+            f"{'phase':<24} {'count':>7} {'total [s]':>11} {'mean [s]':>10}"
+            f" {'max [s]':>10} {'cpu [s]':>11}")
+        if self.profile_memory:
+            header += f" {'peak rss [MB]':>14}"
+        lines = [header, "-"*len(header)]
+        for row in self.summarize():
+            line = (
+                f"{row['phase']:<24} {row['count']:>7d}"
+                f" {row['total_wall_time_in_seconds']:>11.3f}"
+                f" {row['mean_wall_time_in_seconds']:>10.4f}"
+                f" {row['max_wall_time_in_seconds']:>10.4f}"
+                f" {row['total_cpu_time_in_seconds']:>11.3f}")
+            if self.profile_memory:
+                peak_rss = row["peak_rss_in_bytes"]
+                line += (
+                    f" {'-':>14}" if peak_rss is None
+                    else f" {peak_rss / BYTES_PER_MEGABYTE:>14.1f}")
+            lines.append(line)
+
+        if len(self.arrays) > 0:
+            # the largest of each array and phase over all processes
+            name_and_phase_to_record: Dict[Any, ArrayRecord] = {}
+            for record in sorted(self.arrays, key=lambda r: r.nbytes):
+                name_and_phase_to_record[record.name, record.phase] = record
+            header = f"{'largest arrays':<40} {'after phase':<24} {'MB':>10}"
+            lines += ["", header, "-"*len(header)]
+            for record in sorted(
+                    name_and_phase_to_record.values(),
+                    key=lambda record: -record.nbytes)[:10]:
+                lazy = " (lazy)" if record.is_lazy else ""
+                lines.append(
+                    f"{record.name + lazy:<40} {record.phase:<24}"
+                    f" {record.nbytes / BYTES_PER_MEGABYTE:>10.1f}")
+        return "\n".join(lines)
+
+    def write_report(self, path: str):
+        """Write every timing to a .json or .csv file.
+
+        The json report also contains the summary and the recorded arrays.
+        """
+        report_format = splitext(path)[1].lower()
+        assert report_format in self.REPORT_FORMATS, (
+            f"the report must be one of {self.REPORT_FORMATS}")
+        if report_format == ".json":
+            with open(path, "w") as f:
+                json.dump({
+                    "summary": self.summarize(),
+                    "timings": [asdict(timing) for timing in self.timings],
+                    "arrays": [asdict(record) for record in self.arrays],
+                }, f, indent=1)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=[
+                    field.name for field in fields(PhaseTiming)])
+                writer.writeheader()
+                for timing in self.timings:
+                    row = asdict(timing)
+                    if timing.top_allocations is not None:
+                        row["top_allocations"] = "; ".join(
+                            timing.top_allocations)
+                    writer.writerow(row)
+        return
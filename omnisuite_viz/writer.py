@@ -0,0 +1,489 @@
+"""Classes for encoding and writing rendered frames."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import sha256
+from io import BytesIO
+from os.path import splitext
+from shutil import which
+import struct
+from subprocess import DEVNULL, PIPE, Popen
+from tempfile import TemporaryFile
+from threading import BoundedSemaphore
+from typing import IO, Iterable, List, Optional, Sequence, Tuple
+import zlib
+
+import numpy as np
+from numpy import ndarray
+from PIL import GifImagePlugin, Image
+
+# single pass equivalent of running ffmpeg with palettegen then paletteuse
+FFMPEG_GIF_PALETTE_FILTER = "split[a][b];[a]palettegen[p];[b][p]paletteuse"
+# of the stderr of a failed ffmpeg process shown in its error
+FFMPEG_STDERR_TAIL_IN_BYTES = 2000
+
+
+def ffmpeg_output_args(
+        animation_format: str,
+        quality: Optional[int] = None,
+        num_threads: int = 0,
+        loop: int = 0) -> List[str]:
+    """Arguments after the input of ffmpeg that encode `animation_format`."""
+    if animation_format == "gif":
+        output_args = [
+            "-filter_complex", FFMPEG_GIF_PALETTE_FILTER, "-loop", str(loop)]
+    elif animation_format == "mp4":
+        output_args = [
+            "-c:v", "libx264",
+            "-pix_fmt", "yuv420p",
+            # yuv420p requires even frame dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-crf", str(23 if quality is None else quality),
+            "-movflags", "+faststart"]
+    elif animation_format == "webm":
+        output_args = [
+            "-c:v", "libvpx-vp9",
+            "-pix_fmt", "yuv420p",
+            "-crf", str(31 if quality is None else quality),
+            "-b:v", "0",
+            "-row-mt", "1"]
+    elif animation_format == "webp":
+        output_args = [
+            "-c:v", "libwebp_anim",
+            "-quality", str(75 if quality is None else quality),
+            "-loop", str(loop)]
+    else:
+        raise ValueError(f"unknown animation format: {animation_format}")
+    if num_threads > 0:
+        output_args += ["-threads", str(num_threads)]
+    return output_args
+
+
+def write_bytes(path: str, data: bytes) -> Tuple[int, str]:
+    """Write `data` and return its size in bytes and sha256 checksum."""
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data), sha256(data).hexdigest()
+
+
+def encode_frame(
+        frame_path: str,
+        pixels: ndarray,
+        compress_level: int = 6) -> bytes:
+    """Encode `pixels` in the format of the file extension (e.g., png)."""
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(
+        buffer,
+        format=Image.registered_extensions()[splitext(frame_path)[1].lower()],
+        compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def write_frame(
+        frame_path: str,
+        pixels: ndarray,
+        compress_level: int = 6) -> Tuple[int, str]:
+    """Encode and write `pixels`, see `encode_frame`."""
+    return write_bytes(
+        frame_path, encode_frame(frame_path, pixels, compress_level))
+
+
+class StreamingPngWriter:
+    """Write an 8 bit png from consecutive bands of rows.
+
+    Each band passed to `write_rows` is filtered (Paeth) and compressed
+    right away, so memory scales with the band rather than the image. The
+    file is complete once `close` returns its size and sha256.
+    """
+    SIGNATURE = b"\x89PNG\r\n\x1a\n"
+    COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}  # by number of channels
+    PAETH_FILTER = 4
+
+    def __init__(
+            self,
+            path: str,
+            width: int,
+            height: int,
+            num_channels: int,
+            compress_level: int = 6):
+        self._fp = open(path, "wb")
+        self._sha256 = sha256()
+        self._size_in_bytes = 0
+        self._width = width
+        self._height = height
+        self._num_channels = num_channels
+        self._num_rows_written = 0
+        self._previous_row = np.zeros(width*num_channels, dtype=np.uint8)
+        self._compressor = zlib.compressobj(compress_level)
+        self._write(self.SIGNATURE)
+        self._write_chunk(b"IHDR", struct.pack(
+            ">IIBBBBB",
+            width, height, 8, self.COLOR_TYPES[num_channels], 0, 0, 0))
+        return
+
+    def _write(self, data: bytes):
+        self._fp.write(data)
+        self._sha256.update(data)
+        self._size_in_bytes += len(data)
+        return
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        self._write(struct.pack(">I", len(data)))
+        self._write(chunk_type + data)
+        self._write(struct.pack(">I", zlib.crc32(chunk_type + data)))
+        return
+
+    def write_rows(self, rows: ndarray):
+        """Append (num_rows, width, num_channels) uint8 pixels."""
+        assert rows.shape[1:] == (self._width, self._num_channels)
+        assert self._num_rows_written + len(rows) <= self._height
+        # filter a few rows at a time to bound the int16 temporaries
+        num_rows_per_block = max(1, (1 << 20) // rows[0].size)
+        for start in range(0, len(rows), num_rows_per_block):
+            self._write_filtered_rows(rows[start:start + num_rows_per_block])
+        return
+
+    def _write_filtered_rows(self, rows: ndarray):
+        raw = np.ascontiguousarray(rows, dtype=np.uint8).reshape(
+            len(rows), -1).astype(np.int16)
+        up = np.vstack([self._previous_row[None], raw[:-1]])
+        left = np.zeros_like(raw)
+        left[:, self._num_channels:] = raw[:, :-self._num_channels]
+        up_left = np.zeros_like(raw)
+        up_left[:, self._num_channels:] = up[:, :-self._num_channels]
+
+        estimate = left + up - up_left
+        distance_left = np.abs(estimate - left)
+        distance_up = np.abs(estimate - up)
+        distance_up_left = np.abs(estimate - up_left)
+        prediction = np.where(
+            (distance_left <= distance_up)
+            & (distance_left <= distance_up_left),
+            left,
+            np.where(distance_up <= distance_up_left, up, up_left))
+
+        filtered = np.empty((len(raw), raw.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = self.PAETH_FILTER
+        filtered[:, 1:] = (raw - prediction) & 0xFF
+        compressed = self._compressor.compress(filtered.tobytes())
+        if len(compressed) > 0:
+            self._write_chunk(b"IDAT", compressed)
+
+        self._previous_row = raw[-1].astype(np.uint8)
+        self._num_rows_written += len(rows)
+        return
+
+    def close(self) -> Tuple[int, str]:
+        """Finish the file and return its size in bytes and sha256."""
+        assert self._num_rows_written == self._height, (
+            f"{self._num_rows_written} of {self._height} rows were written")
+        self._write_chunk(b"IDAT", self._compressor.flush())
+        self._write_chunk(b"IEND", b"")
+        self._fp.close()
+        return self._size_in_bytes, self._sha256.hexdigest()
+
+
+class AsyncFrameWriter:
+    """Encode and write frames on a bounded pool of threads.
+
+    `submit` blocks while `max_pending_frames` frames are queued or being
+    written, so at most that many frame buffers are alive at once. The pixels
+    passed to `submit` must not be modified afterwards. The returned future
+    resolves to the result of `write_frame`. Errors raised while writing are
+    re-raised by `close`.
+    """
+
+    def __init__(
+            self,
+            num_threads: int,
+            max_pending_frames: Optional[int] = None,
+            compress_level: int = 6):
+        assert num_threads >= 1
+        if max_pending_frames is None:
+            max_pending_frames = 2*num_threads
+        assert max_pending_frames >= 1
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_threads, thread_name_prefix="frame-writer")
+        self._pending_frame_slots = BoundedSemaphore(max_pending_frames)
+        self._futures: List[Future] = []
+        self._compress_level = compress_level
+        return
+
+    def submit(self, frame_path: str, pixels: ndarray) -> Future:
+        self._raise_failed_writes()
+        self._pending_frame_slots.acquire()
+        future = self._executor.submit(
+            write_frame, frame_path, pixels, self._compress_level)
+        future.add_done_callback(
+            lambda _: self._pending_frame_slots.release())
+        self._futures.append(future)
+        return future
+
+    def _raise_failed_writes(self):
+        pending_futures = []
+        for future in self._futures:
+            if not future.done():
+                pending_futures.append(future)
+            elif future.exception() is not None:
+                raise future.exception()
+        self._futures = pending_futures
+        return
+
+    def close(self):
+        """Wait for all submitted frames to be written."""
+        self._executor.shutdown(wait=True)
+        self._raise_failed_writes()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return
+
+
+class FFmpegImagePipeWriter:
+    """Pipe encoded frames (e.g., png files) into an ffmpeg subprocess."""
+
+    def __init__(
+            self,
+            path_to_save_animation: str,
+            frames_per_second: float,
+            output_args: Sequence[str]):
+        command = [
+            "ffmpeg",
+            "-loglevel",
+            "fatal",
+            "-y",
+            "-f",
+            "image2pipe",
+            "-framerate",
+            str(frames_per_second),
+            "-i",
+            "-",
+            *output_args,
+            path_to_save_animation
+        ]
+        self._path_to_save_animation = path_to_save_animation
+        self._stderr = TemporaryFile()
+        self._process = Popen(
+            command, stdin=PIPE, stdout=DEVNULL, stderr=self._stderr)
+        self._closed = False
+        return
+
+    def write(self, encoded_frame: bytes):
+        _raise_if_closed(self._closed, self._path_to_save_animation)
+        try:
+            self._process.stdin.write(encoded_frame)
+        except BrokenPipeError as error:
+            self.close()  # raises with the error of ffmpeg if it failed
+            _raise_frames_not_read(self._path_to_save_animation, error)
+        return
+
+    def close(self):
+        """Finish encoding, raises if ffmpeg failed."""
+        if self._closed:
+            return
+        self._closed = True
+        _wait_for_ffmpeg(
+            self._process, self._stderr, self._path_to_save_animation)
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return
+
+
+def _raise_if_closed(closed: bool, path_to_save_animation: str):
+    if closed:
+        raise ValueError(
+            "cannot write frames after closing the writer of"
+            f" {path_to_save_animation}")
+    return
+
+
+def _raise_frames_not_read(
+        path_to_save_animation: str, error: BrokenPipeError):
+    raise RuntimeError(
+        "ffmpeg exited before reading all frames of"
+        f" {path_to_save_animation}") from error
+
+
+def _wait_for_ffmpeg(
+        process: Popen, stderr: IO[bytes], path_to_save_animation: str):
+    """Close the input of ffmpeg and wait for it, raises if it failed.
+
+    Raises:
+        RuntimeError: With the return code of ffmpeg and the tail of its
+            stderr, e.g., if it could not encode the frames or was killed.
+    """
+    try:
+        process.stdin.close()
+    except BrokenPipeError:
+        pass  # ffmpeg exited early
+    returncode = process.wait()
+    stderr.seek(0)
+    stderr_tail = stderr.read()[-FFMPEG_STDERR_TAIL_IN_BYTES:].decode(
+        errors="replace").strip()
+    stderr.close()
+    if returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg exited with code {returncode} while encoding"
+            f" {path_to_save_animation}"
+            + (f": {stderr_tail}" if stderr_tail else ""))
+    return
+
+
+def encode_animation_from_files(
+        frame_paths: Iterable[str],
+        path_to_save_animation: str,
+        frames_per_second: float,
+        output_args: Sequence[str]):
+    """Pipe encoded frame files, in the given order, into ffmpeg."""
+    with FFmpegImagePipeWriter(
+            path_to_save_animation,
+            frames_per_second,
+            output_args) as pipe_writer:
+        for frame_path in frame_paths:
+            with open(frame_path, "rb") as frame_file:
+                pipe_writer.write(frame_file.read())
+    return
+
+
+class StreamingGifWriter:
+    """Write an animated gif one frame at a time.
+
+    Unlike `Image.save(..., append_images=...)`, which keeps every frame of
+    the animation in memory until the file is written, each frame is
+    quantized to its own 256 color palette (stored as a local color table)
+    and written immediately, so only one frame is held in memory at a time.
+    """
+
+    def __init__(
+            self,
+            path_to_save_animation: str,
+            duration_between_frames_in_ms: float,
+            loop: int = 0):
+        self._fp = open(path_to_save_animation, "wb")
+        self._duration_between_frames_in_ms = duration_between_frames_in_ms
+        self._loop = loop
+        self._num_frames = 0
+        return
+
+    def write(self, frame: Image.Image):
+        frame = frame.convert("RGB").quantize(colors=256)
+        if self._num_frames == 0:
+            header, _ = GifImagePlugin.getheader(
+                frame,
+                info={
+                    "loop": self._loop,
+                    "duration": self._duration_between_frames_in_ms})
+            self._fp.write(b"".join(header))
+        for data in GifImagePlugin.getdata(
+                frame,
+                duration=self._duration_between_frames_in_ms,
+                include_color_table=self._num_frames > 0):
+            self._fp.write(data)
+        self._num_frames += 1
+        return
+
+    def close(self):
+        if self._fp.closed:
+            return
+        self._fp.write(b";")  # gif trailer
+        self._fp.close()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return
+
+
+class FFmpegStreamWriter:
+    """Pipe raw frames into an ffmpeg subprocess that encodes an animation.
+
+    The subprocess is started on the first `write`, whose frame determines
+    the size and pixel format (RGB or RGBA) of the whole animation. A frame
+    that ffmpeg cannot consume yet blocks `write`, which bounds memory.
+    """
+    PIXEL_FORMATS = {3: "rgb24", 4: "rgba"}
+
+    def __init__(
+            self,
+            path_to_save_animation: str,
+            frames_per_second: float,
+            output_args: Sequence[str] = ("-filter_complex",
+                                          FFMPEG_GIF_PALETTE_FILTER)):
+        if which("ffmpeg") is None:
+            raise RuntimeError(
+                "Streaming frames requires `ffmpeg`, refer to the README.md"
+                " on installing it.")
+        self._path_to_save_animation = path_to_save_animation
+        self._frames_per_second = frames_per_second
+        self._output_args = list(output_args)
+        self._process: Optional[Popen] = None
+        self._frame_shape = None
+        self._closed = False
+        return
+
+    def _start(self, frame_shape):
+        height, width, num_channels = frame_shape
+        command = [
+            "ffmpeg",
+            "-loglevel",
+            "fatal",
+            "-y",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            self.PIXEL_FORMATS[num_channels],
+            "-s",
+            f"{width}x{height}",
+            "-framerate",
+            str(self._frames_per_second),
+            "-i",
+            "-",
+            *self._output_args,
+            self._path_to_save_animation
+        ]
+        self._stderr = TemporaryFile()
+        self._process = Popen(
+            command, stdin=PIPE, stdout=DEVNULL, stderr=self._stderr)
+        self._frame_shape = frame_shape
+        return
+
+    def write(self, pixels: ndarray):
+        _raise_if_closed(self._closed, self._path_to_save_animation)
+        if self._process is None:
+            self._start(pixels.shape)
+        assert pixels.shape == self._frame_shape, (
+            "all frames of an animation must have the same shape")
+        try:
+            self._process.stdin.write(
+                memoryview(np.ascontiguousarray(pixels, dtype=np.uint8)))
+        except BrokenPipeError as error:
+            self.close()  # raises with the error of ffmpeg if it failed
+            _raise_frames_not_read(self._path_to_save_animation, error)
+        return
+
+    def close(self):
+        """Finish encoding, raises if ffmpeg failed."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._process is not None:  # i.e., a frame was written
+            _wait_for_ffmpeg(
+                self._process, self._stderr, self._path_to_save_animation)
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return
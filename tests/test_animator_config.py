@@ -0,0 +1,49 @@
+import tempfile
+import unittest
+
+from omnisuite_viz.animator_config import OmniSuiteAnimatorConfig
+
+
+class TestOmniSuiteAnimatorConfig(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def make_config(self, **kwargs) -> OmniSuiteAnimatorConfig:
+        return OmniSuiteAnimatorConfig(
+            save_animation=False,
+            output_dir=self.temp_dir.name,
+            num_frames_in_animation=3,
+            **kwargs)
+
+    def test_default_frame_rate(self):
+        config = self.make_config()
+        self.assertEqual(config.frames_per_second, 2)
+        self.assertEqual(config.pil_image_duration_between_frames_in_ms, 500)
+        return
+
+    def test_frame_rate_and_duration_are_derived_from_each_other(self):
+        config = self.make_config(frames_per_second=4)
+        self.assertEqual(config.pil_image_duration_between_frames_in_ms, 250)
+        config = self.make_config(pil_image_duration_between_frames_in_ms=40)
+        self.assertEqual(config.frames_per_second, 25)
+        config = self.make_config(
+            frames_per_second=3,
+            pil_image_duration_between_frames_in_ms=1000 / 3)
+        self.assertEqual(config.frames_per_second, 3)
+        return
+
+    def test_disagreeing_frame_rate_and_duration_raise(self):
+        with self.assertRaises(AssertionError):
+            self.make_config(
+                frames_per_second=4,
+                pil_image_duration_between_frames_in_ms=500)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import mock
+import numpy as np
+import os
+import unittest
+import xarray as xarr
+
+from omnisuite_viz.catalog import DatasetCatalog
+from omnisuite_viz.synthetic import (
+    SyntheticICONConfig, write_synthetic_icon_files)
+
+
+class TestDatasetCatalog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.paths = write_synthetic_icon_files(
+            self.temp_dir.name,
+            SyntheticICONConfig(
+                num_files=3,
+                num_times_per_file=2,
+                num_levels=4,
+                num_latitudes=10,
+                num_longitudes=20,
+                variables=("u", "Z"),
+                restart_time_per_file=True,
+                chunks=(1, 2, 10, 20)))
+        self.catalog_path = join(self.temp_dir.name, "catalog.json.gz")
+        DatasetCatalog.build(self.paths).save(self.catalog_path)
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def test_records_layout_of_files(self):
+        catalog = DatasetCatalog.load(self.catalog_path)
+        self.assertEqual(catalog.paths, self.paths)
+        self.assertEqual(catalog.data_variables, ["u", "Z"])
+        u = catalog.files[1].variables["u"]
+        self.assertEqual(u.dimensions, ("time", "lev", "lat", "lon"))
+        self.assertEqual(u.shape, (2, 4, 10, 20))
+        self.assertEqual(u.chunk_shape, (1, 2, 10, 20))
+        self.assertEqual(u.dtype, "float32")
+        self.assertEqual(catalog.get_modified_paths(), [])
+        os.utime(self.paths[2], ns=(0, 0))
+        self.assertEqual(catalog.get_modified_paths(), [self.paths[2]])
+        return
+
+    def test_parallel_build_matches_serial_build(self):
+        catalog = DatasetCatalog.build(self.paths)
+        self.assertEqual(
+            DatasetCatalog.build(self.paths, num_threads=3), catalog)
+        return
+
+    def test_load_or_build_rebuilds_modified_catalog(self):
+        with mock.patch.object(DatasetCatalog, "build") as build:
+            catalog = DatasetCatalog.load_or_build(
+                self.catalog_path, self.paths)
+            build.assert_not_called()
+        self.assertEqual(catalog.files[2].variables["u"].shape, (2, 4, 10, 20))
+
+        write_synthetic_icon_files(
+            self.temp_dir.name,
+            SyntheticICONConfig(
+                num_files=3,
+                num_times_per_file=3,
+                num_levels=4,
+                num_latitudes=10,
+                num_longitudes=20,
+                variables=("u", "Z"),
+                restart_time_per_file=True,
+                chunks=(1, 2, 10, 20)))
+        os.utime(self.paths[2], ns=(0, 0))
+        catalog = DatasetCatalog.load_or_build(self.catalog_path, self.paths)
+        self.assertEqual(catalog.files[2].variables["u"].shape, (3, 4, 10, 20))
+        self.assertEqual(catalog.get_modified_paths(), [])
+        self.assertEqual(DatasetCatalog.load(self.catalog_path), catalog)
+        return
+
+    def test_dataset_matches_open_mfdataset(self):
+        catalog = DatasetCatalog.load(self.catalog_path)
+        with mock.patch("netCDF4.Dataset") as dataset:
+            catalog_dataset = catalog.to_dataset(["u"])
+            dataset.assert_not_called()
+        self.assertEqual(list(catalog_dataset.data_vars), ["u"])
+
+        with xarr.open_mfdataset(
+                self.paths, concat_dim="time", combine="nested") as expected:
+            for name in ("time", "lev", "lat", "lon"):
+                np.testing.assert_array_equal(
+                    catalog_dataset[name].values, expected[name].values)
+            np.testing.assert_array_equal(
+                catalog_dataset["u"].isel(lev=1).values,
+                expected["u"].isel(lev=1).values)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
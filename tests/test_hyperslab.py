@@ -0,0 +1,101 @@
+from tempfile import TemporaryDirectory
+import pickle
+import numpy as np
+import unittest
+import xarray as xarr
+
+from omnisuite_viz.hyperslab import (
+    FileHandlePool, ReadStatistics, get_bytes_read, read_level_hyperslabs)
+from omnisuite_viz.synthetic import (
+    SyntheticICONConfig, write_synthetic_icon_files)
+
+
+class TestBytesRead(unittest.TestCase):
+    def test_touched_chunks_are_read(self):
+        shape = (4, 10, 20, 30)
+        self.assertEqual(
+            get_bytes_read(
+                (slice(0, 1), 3, slice(None), slice(None)),
+                shape, (1, 10, 20, 30), 4),
+            10*20*30*4)
+        self.assertEqual(
+            get_bytes_read(
+                (slice(1, 3), 3, slice(None), slice(None)),
+                shape, (1, 1, 20, 30), 4),
+            2*20*30*4)
+        # partial chunks at the end of a dimension
+        self.assertEqual(
+            get_bytes_read(
+                (slice(3, 4), 9, slice(None), slice(None)),
+                shape, (3, 4, 20, 30), 4),
+            1*2*20*30*4)
+        return
+
+    def test_contiguous_reads_only_selection(self):
+        self.assertEqual(
+            get_bytes_read(
+                (slice(0, 2), 3, slice(None), slice(None)),
+                (4, 10, 20, 30), None, 8),
+            2*20*30*8)
+        return
+
+
+class TestReadLevelHyperslabs(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def read_level(self, chunks):
+        paths = write_synthetic_icon_files(
+            self.temp_dir.name,
+            SyntheticICONConfig(
+                num_files=3,
+                num_times_per_file=2,
+                num_levels=5,
+                num_latitudes=10,
+                num_longitudes=20,
+                restart_time_per_file=True,
+                chunks=chunks))
+        statistics = ReadStatistics()
+        pool = FileHandlePool(max_open_files=2)
+        level_data = read_level_hyperslabs(
+            paths, "u", 3, statistics=statistics, pool=pool)
+        with xarr.open_mfdataset(
+                paths, concat_dim="time", combine="nested") as mfdataset:
+            np.testing.assert_array_equal(
+                level_data.compute(scheduler="synchronous"),
+                mfdataset["u"].isel(lev=3).values)
+        # each file is opened once for all of its reads
+        self.assertEqual(pool.num_opened, len(paths))
+        self.assertLessEqual(len(pool), 2)
+        return level_data, statistics
+
+    def test_chunks_of_whole_time_steps_are_read(self):
+        level_data, statistics = self.read_level((1, 5, 10, 20))
+        self.assertEqual(level_data.chunks[0], (1,)*6)
+        self.assertEqual(statistics.num_reads, 6)
+        self.assertAlmostEqual(statistics.fraction_used, 1/5)
+        return
+
+    def test_chunks_per_level_read_only_the_level(self):
+        level_data, statistics = self.read_level((2, 1, 10, 20))
+        self.assertEqual(level_data.chunks[0], (2, 2, 2))
+        self.assertEqual(statistics.bytes_read, statistics.bytes_used)
+        return
+
+    def test_statistics_can_be_pickled(self):
+        statistics = ReadStatistics()
+        statistics.add(8, 4)
+        statistics = pickle.loads(pickle.dumps(statistics))
+        statistics.add(8, 4)
+        self.assertEqual(statistics.num_reads, 2)
+        self.assertEqual(statistics.fraction_used, 0.5)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+from importlib.util import find_spec
+from os.path import join
+from tempfile import TemporaryDirectory
+import numpy as np
+import unittest
+import xarray as xarr
+
+from omnisuite_viz.ingest import (
+    LEVEL_START_ATTR, ingest_into_zarr, is_zarr_store, open_zarr_store)
+from omnisuite_viz.synthetic import (
+    SyntheticICONConfig, write_synthetic_icon_files)
+
+
+@unittest.skipIf(find_spec("zarr") is None, "requires zarr")
+class TestIngestIntoZarr(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.paths = write_synthetic_icon_files(
+            self.temp_dir.name,
+            SyntheticICONConfig(
+                num_files=3,
+                num_times_per_file=2,
+                num_levels=6,
+                num_latitudes=10,
+                num_longitudes=20,
+                restart_time_per_file=True,
+                chunks=(2, 6, 10, 20)))
+        self.store_path = join(self.temp_dir.name, "u.zarr")
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def test_store_matches_files(self):
+        ingest_into_zarr(
+            [join(self.temp_dir.name, "GWS_*")],
+            "u",
+            self.store_path,
+            level_start=2,
+            level_stop=4,
+            concat_dim="time")
+        self.assertTrue(is_zarr_store(self.store_path))
+        self.assertFalse(is_zarr_store(self.paths[0]))
+
+        with xarr.open_mfdataset(
+                self.paths, concat_dim="time", combine="nested") as expected:
+            with open_zarr_store(self.store_path) as store:
+                self.assertEqual(list(store.data_vars), ["u"])
+                self.assertEqual(store.attrs[LEVEL_START_ATTR], 2)
+                np.testing.assert_array_equal(
+                    store["u"].values, expected["u"][:, 2:4].values)
+                np.testing.assert_array_equal(
+                    store["lat"].values, expected["lat"].values)
+        return
+
+    def test_store_has_one_time_step_of_one_level_per_chunk(self):
+        ingest_into_zarr(
+            self.paths, "u", self.store_path, concat_dim="time",
+            compression_level=3)
+        import zarr
+        self.assertEqual(
+            zarr.open_group(self.store_path, mode="r")["u"].chunks,
+            (1, 1, 10, 20))
+        with open_zarr_store(self.store_path) as store:
+            self.assertEqual(store["u"].shape, (6, 6, 10, 20))
+            self.assertEqual(store["u"].data.chunksize, (1, 1, 10, 20))
+            self.assertEqual(store["u"].encoding["chunks"], (1, 1, 10, 20))
+            self.assertEqual(
+                store["u"].encoding["compressors"][0].clevel, 3)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+import pickle
+import numpy as np
+import unittest
+import xarray as xarr
+
+from omnisuite_viz.grid import WorldMapNetcdfGrid
+from omnisuite_viz.hyperslab import ReadStatistics
+from omnisuite_viz.lazy_array import FileHandlePool, TimeConcatenatedArray
+from omnisuite_viz.prefetch import PrefetchingFrameSource
+from omnisuite_viz.synthetic import (
+    SyntheticICONConfig, write_synthetic_icon_files)
+
+
+class TestTimeConcatenatedArray(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.paths = write_synthetic_icon_files(
+            self.temp_dir.name,
+            SyntheticICONConfig(
+                num_files=4,
+                num_times_per_file=3,
+                num_levels=4,
+                num_latitudes=10,
+                num_longitudes=20,
+                variables=("u",),
+                restart_time_per_file=True))
+        with xarr.open_mfdataset(
+                self.paths, concat_dim="time", combine="nested") as expected:
+            self.expected = expected["u"].isel(lev=2).values
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def test_indexing_matches_open_mfdataset(self):
+        response = TimeConcatenatedArray(self.paths, "u", level_ix=2)
+        self.assertEqual(response.shape, (12, 10, 20))
+        self.assertEqual(response.dtype, np.float32)
+        for key in [
+                0, 4, -1, slice(None), slice(2, 7), slice(None, None, -1),
+                slice(10, 1, -4), slice(1, 12, 5), slice(5, 5),
+                (3, 4), (slice(2, 8), slice(1, 3), 5), ([0, 11],)]:
+            np.testing.assert_array_equal(
+                response[key], self.expected[key], err_msg=str(key))
+        np.testing.assert_array_equal(np.asarray(response), self.expected)
+        with self.assertRaises(IndexError):
+            response[12]
+        return
+
+    def test_open_files_are_bounded(self):
+        pool = FileHandlePool(max_open_files=2)
+        statistics = ReadStatistics()
+        response = TimeConcatenatedArray(
+            self.paths, "u", level_ix=2, pool=pool, statistics=statistics)
+        frame_source = PrefetchingFrameSource(response, prefetch_depth=2)
+        for frame in range(len(response)):
+            np.testing.assert_array_equal(
+                frame_source[frame], self.expected[frame])
+            self.assertLessEqual(len(pool), 2)
+        frame_source.close()
+        self.assertEqual(statistics.num_reads, len(response))
+        response.close()
+        self.assertEqual(len(pool), 0)
+        return
+
+    def test_concurrent_reads_with_bounded_open_files(self):
+        pool = FileHandlePool(max_open_files=2)
+        response = TimeConcatenatedArray(
+            self.paths, "u", level_ix=2, pool=pool, num_threads=4)
+        with ThreadPoolExecutor(4) as executor:
+            frames = list(executor.map(
+                response.__getitem__, range(len(response))))
+        np.testing.assert_array_equal(np.stack(frames), self.expected)
+        self.assertLessEqual(len(pool), 2)
+        response.close()
+        return
+
+    def test_datasets_in_use_are_not_closed(self):
+        pool = FileHandlePool(max_open_files=1)
+        with pool.open(self.paths[0]) as first_dataset:
+            with pool.open(self.paths[1]) as second_dataset:
+                # above the bound while both are in use
+                self.assertEqual(len(pool), 2)
+                self.assertTrue(first_dataset.isopen())
+            self.assertEqual(len(pool), 1)
+            self.assertFalse(second_dataset.isopen())
+            pool.close()
+            self.assertTrue(first_dataset.isopen())
+        self.assertFalse(first_dataset.isopen())
+        self.assertEqual(len(pool), 0)
+        return
+
+    def test_pickled_array_reopens_files(self):
+        response = TimeConcatenatedArray(self.paths, "u", level_ix=2)
+        response[0]
+        unpickled_response = pickle.loads(pickle.dumps(response))
+        self.assertEqual(len(unpickled_response.pool), 0)
+        np.testing.assert_array_equal(
+            unpickled_response[7], self.expected[7])
+        return
+
+    def test_grid_from_netcdf_files(self):
+        grid = WorldMapNetcdfGrid.from_netcdf_files(
+            self.paths, "u", level_ix=2)
+        self.assertIsInstance(grid.response, TimeConcatenatedArray)
+        self.assertEqual(grid.latitude.shape, (10,))
+        self.assertEqual(grid.longitude.shape, (20,))
+        np.testing.assert_array_equal(grid.response[5], self.expected[5])
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
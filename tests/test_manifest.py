@@ -0,0 +1,80 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from omnisuite_viz.manifest import (
+    FrameManifest, FrameManifestWriter, FrameRecord)
+from omnisuite_viz.writer import write_bytes
+
+
+class TestFrameManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.output_dir = self.temp_dir.name
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def write_frames(self, frames: range, rendered_at: float = 0.):
+        manifest_writer = FrameManifestWriter(
+            join(self.output_dir, FrameManifest.get_file_name(frames)))
+        for frame in frames:
+            file_name = f"frame_{frame}.png"
+            size_in_bytes, sha256 = write_bytes(
+                join(self.output_dir, file_name), f"{frame}".encode())
+            manifest_writer.write(FrameRecord(
+                index=frame,
+                file_name=file_name,
+                size_in_bytes=size_in_bytes,
+                sha256=sha256,
+                render_time_in_seconds=0.,
+                rendered_at=rendered_at))
+        manifest_writer.close()
+        return
+
+    def test_load_merges_frame_ranges_in_order(self):
+        self.write_frames(range(3, 5))
+        self.write_frames(range(0, 3))
+        manifest = FrameManifest.load(self.output_dir)
+        self.assertEqual(len(manifest), 5)
+        self.assertEqual(
+            manifest.get_paths(range(5)),
+            [join(self.output_dir, f"frame_{frame}.png")
+             for frame in range(5)])
+        return
+
+    def test_most_recent_record_wins(self):
+        self.write_frames(range(0, 2), rendered_at=2.)
+        self.write_frames(range(1, 2), rendered_at=1.)
+        manifest = FrameManifest.load(self.output_dir)
+        self.assertEqual(manifest[1].rendered_at, 2.)
+        return
+
+    def test_truncated_lines_are_skipped(self):
+        self.write_frames(range(0, 2))
+        with open(join(self.output_dir, "manifest.2-3.jsonl"), "w") as f:
+            f.write('{"index": 2, "file_na')
+        manifest = FrameManifest.load(self.output_dir)
+        self.assertEqual(manifest.get_missing_frames(range(3)), [2])
+        with self.assertRaises(ValueError):
+            manifest.get_paths(range(3))
+        return
+
+    def test_invalid_frames(self):
+        self.write_frames(range(0, 3))
+        with open(join(self.output_dir, "frame_1.png"), "wb") as f:
+            f.write(b"truncated")
+        with open(join(self.output_dir, "frame_2.png"), "wb") as f:
+            f.write(b"x")  # same size, different content
+        manifest = FrameManifest.load(self.output_dir)
+        self.assertEqual(manifest.get_invalid_frames(range(4)), [1, 3])
+        self.assertEqual(
+            manifest.get_invalid_frames(range(4), verify_checksum=True),
+            [1, 2, 3])
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,36 @@
-from os import listdir
+from importlib.util import find_spec
+import json
+import matplotlib.pyplot as plt
+from os import listdir, remove
+from os.path import join
+from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 from PIL import Image
+from shutil import which
+import numpy as np
+import tempfile
 import unittest
 
 from tests.animator_test_mixin import AnimatorTestMixin
 from omnisuite_viz.grid import WorldMapRectangularGrid
 from omnisuite_viz.animator import OmniSuiteWorldMapAnimator
-from omnisuite_viz.animator_config import OmniSuiteAnimatorConfig
+from omnisuite_viz.animator_config import (
+    OmniSuiteAnimatorConfig, get_shard_frames)
+from omnisuite_viz.manifest import FrameManifest
+from omnisuite_viz.reader import AbstractReader
+from omnisuite_viz.timing import PhaseTimer
+
+
+class RectangularGridReader(AbstractReader):
+    def _read(self):
+        self._grid = WorldMapRectangularGrid()
+        return
+
+    def _postprocess(self):
+        return
+
+    @property
+    def grid(self):
+        return self._grid
 
 
 class TestOmniSuiteWorldMapAnimator(AnimatorTestMixin, unittest.TestCase):
@@ -32,5 +57,310 @@ class TestOmniSuiteWorldMapAnimator(AnimatorTestMixin, unittest.TestCase):
         return
 
 
+class WaveAnimator(OmniSuiteWorldMapAnimator):
+    """Stateless animator where each frame only depends on its index."""
+
+    def _plot_initial_frame(self):
+        self._mesh = self._ax.pcolormesh(
+            self._grid.longitude,
+            self._grid.latitude,
+            self._wave(0),
+            transform=self._config.projection,
+            cmap="coolwarm")
+        return
+
+    def _get_animated_artists(self):
+        return [self._mesh]
+
+    def _get_frame_fingerprint(self, frame: int) -> bytes:
+        return str(frame).encode()
+
+    def _update_frame(self, frame: int):
+        self._mesh.set_array(self._wave(frame).ravel())
+        return
+
+    def _wave(self, frame: int):
+        return np.sin(
+            np.deg2rad(self._grid.longitude_mesh + 30*frame)
+            + np.deg2rad(self._grid.latitude_mesh))
+
+
+class DecoratedWaveAnimator(WaveAnimator):
+    """Wave below gridlines and above the map with a colorbar axes."""
+
+    def _plot_initial_frame(self):
+        super()._plot_initial_frame()
+        self._ax.gridlines(color="black", zorder=2)
+        cax = inset_axes(self._ax, width="35%", height="10%", loc="center")
+        self._fig.colorbar(self._mesh, cax=cax, orientation="horizontal")
+        return
+
+
+class FailingWaveAnimator(WaveAnimator):
+    def _update_frame(self, frame: int):
+        if frame == 2:
+            raise RuntimeError("failed to read the frame")
+        super()._update_frame(frame)
+        return
+
+
+class TestRenderModes(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.num_frames_in_animation = 5
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def make_animator(
+            self,
+            output_dir: str,
+            animator_class: type = WaveAnimator,
+            **config_kwargs):
+        config_kwargs.setdefault("save_animation", False)
+        config = OmniSuiteAnimatorConfig(
+            output_dir=output_dir,
+            num_frames_in_animation=self.num_frames_in_animation,
+            plot_width_in_pixels=256,
+            plot_height_in_pixels=128,
+            **config_kwargs)
+        return animator_class(WorldMapRectangularGrid(), config)
+
+    def render(
+            self,
+            output_dir: str = None,
+            animator_class: type = WaveAnimator,
+            **config_kwargs) -> str:
+        if output_dir is None:
+            output_dir = tempfile.mkdtemp(dir=self.temp_dir.name)
+        self.make_animator(
+            output_dir, animator_class, **config_kwargs).animate()
+        return output_dir
+
+    def assert_frames_equal(
+            self, expected_dir: str, actual_dir: str, atol: int = 0):
+        for frame in range(self.num_frames_in_animation):
+            fname = f"frame_{frame}.png"
+            with Image.open(join(expected_dir, fname)) as expected, \
+                    Image.open(join(actual_dir, fname)) as actual:
+                np.testing.assert_allclose(
+                    np.asarray(expected, dtype=int),
+                    np.asarray(actual, dtype=int),
+                    rtol=0, atol=atol)
+        return
+
+    def test_parallel_matches_serial(self):
+        self.assert_frames_equal(
+            self.render(num_workers=1), self.render(num_workers=2))
+        return
+
+    def test_cached_background_matches_full_redraw(self):
+        self.assert_frames_equal(
+            self.render(), self.render(use_cached_background=True))
+        self.assert_frames_equal(
+            self.render(animator_class=DecoratedWaveAnimator),
+            self.render(
+                animator_class=DecoratedWaveAnimator,
+                use_cached_background=True))
+        return
+
+    def test_async_writer_matches_savefig(self):
+        self.assert_frames_equal(
+            self.render(),
+            self.render(num_writer_threads=2, max_pending_frames=1))
+        return
+
+    @unittest.skipIf(which("ffmpeg") is None, "requires ffmpeg")
+    def test_stream_to_ffmpeg_without_frames(self):
+        output_dir = self.render(
+            save_animation=True, stream_to_ffmpeg=True, save_frames=False)
+        self.assertEqual(listdir(output_dir), ["animation.gif"])
+        with Image.open(join(output_dir, "animation.gif")) as animation:
+            self.assertEqual(animation.n_frames, self.num_frames_in_animation)
+            self.assertEqual(animation.size, (256, 128))
+        return
+
+    @unittest.skipIf(find_spec("distributed") is None, "requires distributed")
+    def test_dask_matches_serial(self):
+        output_dir = self.render(
+            parallel_backend="dask", num_workers=2, frames_per_task=2)
+        self.assert_frames_equal(self.render(), output_dir)
+        self.assertEqual(
+            FrameManifest.load(output_dir).get_invalid_frames(
+                range(self.num_frames_in_animation), verify_checksum=True),
+            [])
+        return
+
+    def test_serial_render_closes_figure_when_a_frame_fails(self):
+        figures = plt.get_fignums()
+        with self.assertRaises(RuntimeError):
+            self.render(animator_class=FailingWaveAnimator)
+        self.assertEqual(plt.get_fignums(), figures)
+        self.render()
+        self.assertEqual(plt.get_fignums(), figures)
+        return
+
+    def test_resume_only_renders_changed_frames(self):
+        output_dir = self.render()
+        first_manifest = FrameManifest.load(output_dir)
+        remove(join(output_dir, "frame_3.png"))  # e.g., a killed run
+
+        self.render(output_dir, resume=True, num_workers=2)
+        resumed_manifest = FrameManifest.load(output_dir)
+        rerendered_frames = [
+            frame for frame in range(self.num_frames_in_animation)
+            if resumed_manifest[frame] != first_manifest[frame]]
+        self.assertEqual(rerendered_frames, [3])
+        self.assert_frames_equal(self.render(), output_dir)
+
+        self.render(
+            output_dir, resume=True, coastlines_kwargs={"linewidth": 1})
+        restyled_manifest = FrameManifest.load(output_dir)
+        for frame in range(self.num_frames_in_animation):
+            self.assertNotEqual(
+                restyled_manifest[frame].frame_key,
+                resumed_manifest[frame].frame_key)
+        return
+
+    def test_resume_rerenders_frames_after_changing_render_modes(self):
+        output_dir = self.render()
+        for config_kwargs in (
+                {"use_cached_background": True},
+                {"num_strips": 2},
+                {"num_strips": 2, "strip_orientation": "vertical"}):
+            manifest = FrameManifest.load(output_dir)
+            self.render(output_dir, resume=True, **config_kwargs)
+            resumed_manifest = FrameManifest.load(output_dir)
+            for frame in range(self.num_frames_in_animation):
+                self.assertNotEqual(
+                    resumed_manifest[frame].frame_key,
+                    manifest[frame].frame_key,
+                    msg=str(config_kwargs))
+        return
+
+    def test_strips_match_full_frame(self):
+        full_frame_dir = self.render()
+        for strip_orientation in ("horizontal", "vertical"):
+            # antialiased edges may differ by rounding at strip boundaries
+            self.assert_frames_equal(
+                full_frame_dir,
+                self.render(num_strips=3, strip_orientation=strip_orientation),
+                atol=2)
+        return
+
+    def test_previews_are_downsampled_frames(self):
+        output_dir = self.render(
+            save_animation=True, preview_resolutions=[(128, 64), (64, 32)])
+        for width, height in [(128, 64), (64, 32)]:
+            preview_dir = join(output_dir, f"{width}x{height}")
+            preview_paths = FrameManifest.load(preview_dir).get_paths(
+                range(self.num_frames_in_animation))
+            for frame, preview_path in enumerate(preview_paths):
+                with Image.open(join(output_dir, f"frame_{frame}.png")) as f, \
+                        Image.open(preview_path) as preview:
+                    np.testing.assert_array_equal(
+                        np.asarray(preview),
+                        np.asarray(f.resize(
+                            (width, height), Image.Resampling.BOX)))
+            with Image.open(join(preview_dir, "animation.gif")) as animation:
+                self.assertEqual(animation.size, (width, height))
+        return
+
+    def test_shards_merge_into_animation(self):
+        output_dir = tempfile.mkdtemp(dir=self.temp_dir.name)
+        for shard in ("0/2", "1/2"):
+            shard_frames = get_shard_frames(
+                shard, self.num_frames_in_animation)
+            self.render(
+                output_dir,
+                frame_start=shard_frames.start,
+                frame_stop=shard_frames.stop)
+            if shard == "0/2":
+                with self.assertRaises(ValueError):  # shard 1 is missing
+                    self.make_animator(
+                        output_dir, save_animation=True).merge_shards()
+
+        self.make_animator(output_dir, save_animation=True).merge_shards()
+        self.assert_frames_equal(self.render(), output_dir)
+        with Image.open(join(output_dir, "animation.gif")) as animation:
+            self.assertEqual(animation.n_frames, self.num_frames_in_animation)
+
+        self.render(  # e.g., a shard rendered with other settings
+            output_dir, frame_start=1, frame_stop=2,
+            coastlines_kwargs={"linewidth": 1})
+        with self.assertRaises(ValueError):
+            self.make_animator(output_dir).merge_shards()
+        return
+
+    def test_shard_frames_cover_all_frames(self):
+        self.assertEqual(
+            [get_shard_frames(f"{i}/3", 7) for i in range(3)],
+            [range(0, 3), range(3, 5), range(5, 7)])
+        self.assertEqual(get_shard_frames("2/3", 2), range(2, 2))
+        return
+
+    def test_timings_of_parallel_workers_are_reported(self):
+        output_dir = tempfile.mkdtemp(dir=self.temp_dir.name)
+        report_path = join(output_dir, "timings.json")
+        animator = self.make_animator(
+            output_dir, num_workers=2, timing_report_path=report_path)
+        animator.animate()
+        phase_to_frames = {}
+        for timing in animator.timer.timings:
+            phase_to_frames.setdefault(timing.phase, []).append(timing.frame)
+        self.assertEqual(
+            sorted(phase_to_frames["save_frame"]),
+            list(range(self.num_frames_in_animation)))
+        self.assertEqual(len(phase_to_frames["plot_initial_frame"]), 2)
+        self.assertEqual(phase_to_frames["animate"], [None])
+        with open(report_path, "r") as f:
+            self.assertEqual(
+                len(json.load(f)["timings"]), len(animator.timer.timings))
+        return
+
+    def test_reader_and_animator_share_timer(self):
+        timer = PhaseTimer()
+        reader = RectangularGridReader(timer)
+        reader.read()
+        reader.postprocess()
+        config = OmniSuiteAnimatorConfig(
+            save_animation=True,
+            output_dir=tempfile.mkdtemp(dir=self.temp_dir.name),
+            num_frames_in_animation=self.num_frames_in_animation,
+            plot_width_in_pixels=256,
+            plot_height_in_pixels=128)
+        animator = WaveAnimator(reader.grid, config, timer=timer)
+        animator.animate()
+        self.assertIs(animator.timer, timer)
+        phases = [timing.phase for timing in timer.timings]
+        for phase in ("read", "postprocess", "save_animation", "animate"):
+            self.assertEqual(phases.count(phase), 1)
+        self.assertLess(phases.index("read"), phases.index("animate"))
+        return
+
+    def test_memory_profile_records_arrays_of_workers(self):
+        animator = self.make_animator(
+            tempfile.mkdtemp(dir=self.temp_dir.name),
+            num_workers=2,
+            profile_memory=True)
+        animator.animate()
+        self.assertTrue(all(
+            timing.peak_rss_in_bytes > 0 for timing in animator.timer.timings))
+        canvas_records = [
+            record for record in animator.timer.arrays
+            if record.name == "figure.canvas"]
+        self.assertEqual(len(canvas_records), 2)  # drawn by 2 workers
+        self.assertEqual(canvas_records[0].shape, [128, 256, 4])
+        return
+
+    def test_split_frames(self):
+        frame_ranges = OmniSuiteWorldMapAnimator._split_frames(range(7), 3)
+        self.assertEqual(
+            frame_ranges, [range(0, 3), range(3, 5), range(5, 7)])
+        return
+
+
 if __name__ == "__main__":
     unittest.main()
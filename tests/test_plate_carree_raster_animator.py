@@ -0,0 +1,135 @@
+from os import getpid, listdir
+from os.path import join
+from matplotlib import colormaps
+from PIL import Image
+import numpy as np
+import threading
+import unittest
+
+from tests.animator_test_mixin import AnimatorTestMixin
+from omnisuite_viz.animator import PlateCarreeRasterAnimator
+from omnisuite_viz.animator_config import NetcdfAnimatorConfig
+from omnisuite_viz.grid import WorldMapNetcdfGrid
+from omnisuite_viz.raster import AxisResampler, ColormapBlender
+
+BLUE_MARBLE_PATH = "assets/world.topo.bathy.200412.3x5400x2700.jpg"
+
+
+class ParentClimAnimator(PlateCarreeRasterAnimator):
+    """Fails if the color limits are computed by a worker process."""
+
+    parent_pid = getpid()
+
+    def _get_clim(self):
+        if self._config.clim is None:
+            assert getpid() == self.parent_pid, "clim computed by a worker"
+        return super()._get_clim()
+
+
+class TestPlateCarreeRasterAnimator(AnimatorTestMixin, unittest.TestCase):
+    def make_concrete_animator(self):
+        latitude = np.linspace(-89.5, 89.5, 180)
+        longitude = np.linspace(0, 359, 360)
+        self.num_frames_in_animation = 3
+        response = np.random.default_rng(0).normal(
+            size=(self.num_frames_in_animation, 180, 360))
+        grid = WorldMapNetcdfGrid(response, latitude, longitude)
+
+        self.output_dir = self.temp_dir.name
+        self.plot_width_in_pixels = 128
+        self.plot_height_in_pixels = 64
+        config = NetcdfAnimatorConfig(
+            save_animation=False,
+            output_dir=self.output_dir,
+            num_frames_in_animation=self.num_frames_in_animation,
+            plot_width_in_pixels=self.plot_width_in_pixels,
+            plot_height_in_pixels=self.plot_height_in_pixels,
+            clim=(-2, 2),
+            raster_interpolation="bilinear",
+            prefetch_depth=2,
+            netcdf_response_var_file_path=BLUE_MARBLE_PATH,
+            blue_marble_path=BLUE_MARBLE_PATH)
+
+        with Image.open(BLUE_MARBLE_PATH) as blue_marble:
+            background_img = np.asarray(blue_marble.reduce(16))
+
+        return PlateCarreeRasterAnimator(grid, config, background_img)
+
+    def assert_animate(self):
+        frame_files = sorted(
+            f for f in listdir(self.output_dir) if "frame" in f)
+        self.assertEqual(len(frame_files), self.num_frames_in_animation)
+        with Image.open(join(self.output_dir, frame_files[0])) as frame:
+            self.assertEqual(
+                frame.size,
+                (self.plot_width_in_pixels, self.plot_height_in_pixels))
+        # the prefetching thread is shut down after rendering
+        self.assertFalse(any(
+            thread.name.startswith("frame-prefetch")
+            for thread in threading.enumerate()))
+        return
+
+    def test_workers_reuse_clim_of_parent(self):
+        animator = self.make_concrete_animator()
+        config = animator._config
+        config.clim = None
+        config.num_workers = 2
+        animator = ParentClimAnimator(
+            animator._grid, config, animator._background_img)
+        animator.animate()
+        self.assert_animate()
+        response = animator._grid.response
+        self.assertEqual(
+            animator._config.clim,
+            (float(np.nanmin(response)), float(np.nanmax(response))))
+        self.assertIsNone(config.clim)
+        self.assertEqual(animator._get_png_compress_level(), 1)
+        return
+
+
+class TestRaster(unittest.TestCase):
+    def test_nearest_resampling_of_descending_axis(self):
+        resampler = AxisResampler(
+            source=np.array([30., 20., 10.]),
+            target=np.array([9., 14., 21., 31.]))
+        np.testing.assert_array_equal(resampler.lower, [2, 2, 1, 0])
+        return
+
+    def test_bilinear_resampling_wraps_periodic_axis(self):
+        resampler = AxisResampler(
+            source=np.array([0., 90., 180., 270.]),
+            target=np.array([-45., 45., 315.]),
+            periodic=True,
+            method="bilinear")
+        values = resampler(np.array([0., 1., 2., 3.]), axis=0)
+        np.testing.assert_allclose(values, [1.5, 0.5, 1.5])
+        return
+
+    def test_nan_is_transparent(self):
+        blender = ColormapBlender("bwr", vmin=0, vmax=1, alpha=1.0)
+        background = np.full((1, 2, 3), 7, dtype=np.uint8)
+        blended = blender.blend(np.array([[np.nan, 1.0]]), background)
+        np.testing.assert_array_equal(blended[0, 0], [7, 7, 7])
+        np.testing.assert_array_equal(blended[0, 1], [255, 0, 0])
+        return
+
+    def test_blend_matches_float_blend(self):
+        rng = np.random.default_rng(0)
+        field = rng.normal(size=(30, 40))
+        field[rng.random(field.shape) < 0.1] = np.nan
+        background = rng.integers(0, 256, (30, 40, 3), dtype=np.uint8)
+        blender = ColormapBlender("viridis", vmin=-2, vmax=2, alpha=0.3)
+
+        rgba = colormaps["viridis"].resampled(256)(
+            np.clip((field + 2) * 64, 0, 255).astype(int))
+        expected = background + (rgba[..., :3]*255 - background) * 0.3
+        expected[np.isnan(field)] = background[np.isnan(field)]
+        out = np.empty_like(background)
+        blended = blender.blend(field, background, out=out)
+        self.assertIs(blended, out)
+        np.testing.assert_allclose(blended, expected, atol=1)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
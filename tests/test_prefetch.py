@@ -0,0 +1,58 @@
+from threading import Lock
+import numpy as np
+import unittest
+
+from omnisuite_viz.prefetch import PrefetchingFrameSource
+
+
+class RecordingResponse:
+    """Array wrapper that records which time slices were read."""
+
+    def __init__(self, array):
+        self.array = array
+        self.read_frames = []
+        self._lock = Lock()
+        return
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, frame):
+        with self._lock:
+            self.read_frames.append(frame)
+        return self.array[frame]
+
+
+class TestPrefetchingFrameSource(unittest.TestCase):
+    def setUp(self):
+        self.response = RecordingResponse(np.arange(24.).reshape(6, 2, 2))
+        return
+
+    def test_slices_match_response(self):
+        frame_source = PrefetchingFrameSource(self.response, prefetch_depth=2)
+        for frame in range(6):
+            np.testing.assert_array_equal(
+                frame_source[frame], self.response.array[frame])
+        frame_source.close()
+        self.assertEqual(sorted(self.response.read_frames), list(range(6)))
+        return
+
+    def test_prefetch_is_bounded_by_stop(self):
+        frame_source = PrefetchingFrameSource(
+            self.response, prefetch_depth=3, stop=3)
+        frame_source[1]
+        frame_source[2]
+        frame_source.close()
+        self.assertEqual(sorted(self.response.read_frames), [1, 2])
+        return
+
+    def test_no_prefetch_reads_on_demand(self):
+        frame_source = PrefetchingFrameSource(self.response)
+        frame_source[4]
+        frame_source[4]
+        self.assertEqual(self.response.read_frames, [4])
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import dask.array
+import numpy as np
+import unittest
+
+from omnisuite_viz.quantile import QuantileSketch, map_reduce_blocks
+
+
+class TestQuantileSketch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = rng.normal(loc=3, scale=10, size=(12, 50, 80))
+        self.quantiles = [0, 0.05, 0.5, 0.95, 1]
+        return
+
+    def assert_within_relative_accuracy(self, sketch: QuantileSketch):
+        expected = np.quantile(self.values, self.quantiles, method="lower")
+        np.testing.assert_array_less(
+            np.abs(sketch.quantiles(self.quantiles) - expected),
+            sketch.relative_accuracy * np.abs(expected) + 1e-12)
+        return
+
+    def test_error_is_bounded_by_relative_accuracy(self):
+        for relative_accuracy in (0.05, 0.01, 0.001):
+            sketch = QuantileSketch(relative_accuracy=relative_accuracy)
+            self.assert_within_relative_accuracy(sketch.add(self.values))
+        return
+
+    def test_merged_sketches_match_single_sketch(self):
+        merged_sketch = QuantileSketch()
+        for values in self.values:
+            merged_sketch.merge(QuantileSketch().add(values))
+        single_sketch = QuantileSketch().add(self.values)
+        self.assertEqual(merged_sketch.count, self.values.size)
+        np.testing.assert_array_equal(
+            merged_sketch.quantiles(self.quantiles),
+            single_sketch.quantiles(self.quantiles))
+        return
+
+    def test_non_finite_values_are_ignored(self):
+        sketch = QuantileSketch().add([np.nan, -np.inf, 0., 2., np.inf])
+        self.assertEqual(sketch.count, 2)
+        self.assertEqual(sketch.quantile(0), 0.)
+        self.assertAlmostEqual(sketch.quantile(1), 2., delta=0.02)
+        return
+
+    def test_number_of_bins_is_bounded(self):
+        sketch = QuantileSketch(max_num_bins=16)
+        sketch.add(np.logspace(-10, 10, 1000))
+        self.assertLessEqual(sketch._positive_store.counts.size, 16)
+        self.assertAlmostEqual(sketch.quantile(1), 1e10, delta=1e8)
+        return
+
+    def test_dask_blocks_match_numpy(self):
+        def sketch_block(block, block_offset):
+            self.assertEqual(block_offset[2], 0)
+            return QuantileSketch().add(block)
+
+        response = dask.array.from_array(self.values, chunks=(3, 25, 80))
+        np.testing.assert_array_equal(
+            map_reduce_blocks(response, sketch_block, split_every=2)
+            .quantiles(self.quantiles),
+            QuantileSketch().add(self.values).quantiles(self.quantiles))
+        return
+
+    def test_empty_sketch_raises(self):
+        with self.assertRaises(ValueError):
+            QuantileSketch().quantile(0.5)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+import dask.array
+import numpy as np
+import os
+import unittest
+import warnings
+from xarray import DataArray
+
+from omnisuite_viz.statistics import (
+    ResponseStatistics, StatisticsSidecar, fingerprint_files)
+
+
+class UnreadableResponse:
+    """Response that fails the test if it is read."""
+    shape = (1,)
+
+    def __getitem__(self, key):
+        raise AssertionError("the response was read")
+
+
+class TestResponseStatistics(unittest.TestCase):
+    def setUp(self):
+        self.response = np.random.default_rng(0).normal(size=(5, 30, 40))
+        self.response[1] = np.nan
+        self.response[2, 0, :] = np.nan
+        return
+
+    def assert_matches_numpy(self, statistics: ResponseStatistics):
+        with warnings.catch_warnings():  # of the frame without values
+            warnings.simplefilter("ignore", RuntimeWarning)
+            np.testing.assert_allclose(
+                statistics.frame_mean,
+                np.nanmean(self.response, axis=(1, 2)))
+            np.testing.assert_allclose(
+                statistics.frame_std, np.nanstd(self.response, axis=(1, 2)))
+            np.testing.assert_array_equal(
+                statistics.frame_min, np.nanmin(self.response, axis=(1, 2)))
+        self.assertAlmostEqual(statistics.mean, np.nanmean(self.response))
+        self.assertAlmostEqual(statistics.std, np.nanstd(self.response))
+        self.assertEqual(statistics.max, np.nanmax(self.response))
+        self.assertEqual(
+            statistics.count, np.isfinite(self.response).sum())
+        return
+
+    def test_statistics_of_numpy_response(self):
+        self.assert_matches_numpy(ResponseStatistics.compute(self.response))
+        return
+
+    def test_statistics_of_dask_blocks(self):
+        response = DataArray(
+            dask.array.from_array(self.response, chunks=(2, 15, 25)))
+        self.assert_matches_numpy(ResponseStatistics.compute(response))
+        return
+
+
+class TestStatisticsSidecar(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.input_path = join(self.temp_dir.name, "input.nc")
+        with open(self.input_path, "wb") as f:
+            f.write(b"data")
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def test_stored_statistics_are_reused(self):
+        fingerprint = fingerprint_files([self.input_path], variable="u")
+        response = np.arange(12.).reshape(3, 2, 2)
+        statistics = StatisticsSidecar(
+            self.temp_dir.name, fingerprint).load_or_compute(response)
+
+        reused_statistics = StatisticsSidecar(
+            self.temp_dir.name, fingerprint).load_or_compute(
+                UnreadableResponse())
+        self.assertEqual(reused_statistics.frame_max, statistics.frame_max)
+        self.assertEqual(
+            reused_statistics.quantiles([0.1, 0.9]),
+            statistics.quantiles([0.1, 0.9]))
+        return
+
+    def test_fingerprint_changes_with_files_and_selection(self):
+        fingerprint = fingerprint_files(
+            [join(self.temp_dir.name, "*.nc")], variable="u", level_ix=0)
+        self.assertEqual(
+            fingerprint,
+            fingerprint_files([self.input_path], variable="u", level_ix=0))
+        self.assertNotEqual(
+            fingerprint,
+            fingerprint_files([self.input_path], variable="u", level_ix=1))
+        os.utime(self.input_path, ns=(0, 0))
+        self.assertNotEqual(
+            fingerprint,
+            fingerprint_files([self.input_path], variable="u", level_ix=0))
+        return
+
+    def test_fingerprint_of_zarr_store_changes_with_metadata(self):
+        store_path = join(self.temp_dir.name, "store.zarr")
+        chunk_dir_path = join(store_path, "u", "c", "0")
+        os.makedirs(chunk_dir_path)
+        for path in (
+                join(store_path, "zarr.json"),
+                join(store_path, "u", "zarr.json"),
+                join(chunk_dir_path, "0")):
+            with open(path, "wb") as f:
+                f.write(b"{}")
+        fingerprint = fingerprint_files([store_path], variable="u")
+        os.utime(join(chunk_dir_path, "0"), ns=(0, 0))
+        self.assertEqual(
+            fingerprint, fingerprint_files([store_path], variable="u"))
+        os.utime(join(store_path, "u", "zarr.json"), ns=(0, 0))
+        self.assertNotEqual(
+            fingerprint, fingerprint_files([store_path], variable="u"))
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
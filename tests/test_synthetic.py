@@ -0,0 +1,87 @@
+from glob import glob
+from os.path import basename, join
+from tempfile import TemporaryDirectory
+import netCDF4
+import numpy as np
+import unittest
+import xarray as xarr
+
+from omnisuite_viz.synthetic import (
+    SyntheticICONConfig, write_synthetic_icon_files)
+
+
+class TestSyntheticICONFiles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.config = SyntheticICONConfig(
+            prefix="BAL",
+            num_files=3,
+            num_times_per_file=2,
+            num_levels=4,
+            num_latitudes=10,
+            num_longitudes=20,
+            variables=("u", "v"),
+            restart_time_per_file=True,
+            chunks=(1, 1, 10, 20),
+            compression_level=4)
+        self.paths = write_synthetic_icon_files(
+            self.temp_dir.name, self.config)
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def test_files_match_glob_of_icon_outputs(self):
+        self.assertEqual(
+            [basename(path) for path in self.paths],
+            ["BAL_202212010000060.nc",
+             "BAL_202212010000061.nc",
+             "BAL_202212010000062.nc"])
+        self.assertEqual(
+            sorted(glob(join(self.temp_dir.name, "BAL_202212*006*"))),
+            self.paths)
+        return
+
+    def test_files_are_chunked_and_compressed(self):
+        with netCDF4.Dataset(self.paths[0]) as dataset:
+            self.assertEqual(dataset["u"].chunking(), [1, 1, 10, 20])
+            self.assertTrue(dataset["u"].filters()["zlib"])
+            self.assertEqual(dataset["u"].filters()["complevel"], 4)
+        return
+
+    def test_read_like_multifile_reader(self):
+        mfdataset = xarr.open_mfdataset(
+            self.paths,
+            drop_variables=["v"],
+            concat_dim="time",
+            combine="nested")
+        self.assertEqual(list(mfdataset.data_vars), ["u"])
+        response = mfdataset["u"].isel({"lev": 2})
+        self.assertEqual(response.shape, (6, 10, 20))
+        self.assertEqual(mfdataset["lat"].shape, (10,))
+        self.assertEqual(mfdataset["lon"].shape, (20,))
+
+        # the time labels restart in every file like the ICON outputs
+        time = mfdataset["time"].values
+        np.testing.assert_array_equal(time[:2], time[2:4])
+
+        with netCDF4.Dataset(self.paths[1]) as dataset:
+            np.testing.assert_array_equal(
+                response[3].values, dataset["u"][1, 2])
+        mfdataset.close()
+        return
+
+    def test_time_continues_across_files(self):
+        config = SyntheticICONConfig(num_files=2, num_times_per_file=2)
+        paths = write_synthetic_icon_files(
+            join(self.temp_dir.name, "continued"), config)
+        with xarr.open_mfdataset(paths) as mfdataset:
+            time = mfdataset["time"].values
+        np.testing.assert_array_equal(
+            np.diff(time), np.full(3, np.timedelta64(6, "h")))
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
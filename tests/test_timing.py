@@ -0,0 +1,109 @@
+import csv
+import json
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+
+from omnisuite_viz.timing import PhaseTimer, find_arrays
+
+
+class TestPhaseTimer(unittest.TestCase):
+    def setUp(self):
+        self.timer = PhaseTimer()
+        with self.timer.phase("animate"):
+            for frame in range(3):
+                with self.timer.phase("update_frame", frame):
+                    sum(range(10000))
+        return
+
+    def test_summary_aggregates_phases_in_order(self):
+        summary = self.timer.summarize()
+        self.assertEqual(
+            [row["phase"] for row in summary], ["update_frame", "animate"])
+        update_frame = summary[0]
+        self.assertEqual(update_frame["count"], 3)
+        self.assertAlmostEqual(
+            update_frame["total_wall_time_in_seconds"],
+            self.timer.get_total_wall_time("update_frame"))
+        self.assertLessEqual(
+            update_frame["total_wall_time_in_seconds"],
+            self.timer.get_total_wall_time("animate"))
+        self.assertIn("update_frame", self.timer.format_summary())
+        return
+
+    def test_phase_is_recorded_if_it_raises(self):
+        with self.assertRaises(RuntimeError):
+            with self.timer.phase("read"):
+                raise RuntimeError
+        self.assertEqual(self.timer.timings[-1].phase, "read")
+        return
+
+    def test_reports(self):
+        with TemporaryDirectory() as temp_dir:
+            json_path = join(temp_dir, "timings.json")
+            self.timer.write_report(json_path)
+            with open(json_path, "r") as f:
+                report = json.load(f)
+            self.assertEqual(len(report["timings"]), 4)
+            self.assertEqual(report["timings"][1]["frame"], 1)
+            self.assertEqual(report["summary"], self.timer.summarize())
+
+            csv_path = join(temp_dir, "timings.csv")
+            self.timer.write_report(csv_path)
+            with open(csv_path, "r", newline="") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(
+                [row["phase"] for row in rows],
+                [timing.phase for timing in self.timer.timings])
+        return
+
+
+
+class TestMemoryProfiling(unittest.TestCase):
+    def test_peak_of_a_phase_covers_nested_phases(self):
+        timer = PhaseTimer(profile_memory=True)
+        size_in_bytes = 200*2**20
+        with timer.phase("animate"):
+            with timer.phase("update_frame", 0):
+                np.ones(size_in_bytes // 8).sum()
+            with timer.phase("update_frame", 1):
+                pass
+        update_frame_0, update_frame_1, animate = timer.timings
+        self.assertGreater(
+            update_frame_0.peak_rss_in_bytes - update_frame_1.rss_in_bytes,
+            0.9*size_in_bytes)
+        self.assertGreaterEqual(
+            animate.peak_rss_in_bytes, update_frame_0.peak_rss_in_bytes)
+        self.assertIn("peak rss", timer.format_summary())
+        return
+
+    def test_traced_allocations(self):
+        timer = PhaseTimer(trace_allocations=True, num_top_allocations=3)
+        with timer.phase("read"):
+            response = np.empty((100, 2**15))
+        self.assertGreaterEqual(
+            timer.timings[0].peak_traced_in_bytes, response.nbytes)
+        self.assertIn(__file__, timer.timings[0].top_allocations[0])
+        return
+
+    def test_largest_arrays_are_recorded_once(self):
+        class Owner:
+            def __init__(self):
+                self.response = np.zeros((10, 20))
+                self.same_response = self.response
+                self.pixels = np.zeros(5, dtype=np.uint8)
+                self.name = "not an array"
+
+        timer = PhaseTimer(profile_memory=True)
+        timer.record_arrays("plot_initial_frame", find_arrays("a", Owner()))
+        self.assertEqual(
+            [(record.name, record.nbytes) for record in timer.arrays],
+            [("a.response", 1600), ("a.pixels", 5)])
+        return
+
+
+
+if __name__ == "__main__":
+    unittest.main()
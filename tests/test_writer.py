@@ -0,0 +1,199 @@
+from os.path import exists, join
+from PIL import Image
+from shutil import which
+from subprocess import Popen
+import numpy as np
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from omnisuite_viz.manifest import compute_sha256
+from omnisuite_viz.writer import (
+    AsyncFrameWriter, FFmpegImagePipeWriter, FFmpegStreamWriter,
+    StreamingGifWriter, StreamingPngWriter, ffmpeg_output_args)
+
+
+class TestStreamingGifWriter(unittest.TestCase):
+    def test_write_gif(self):
+        rng = np.random.default_rng(0)
+        frames = [
+            Image.fromarray(rng.integers(0, 255, (32, 64, 4), dtype=np.uint8))
+            for _ in range(3)]
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            gif_path = join(temp_dir_name, "animation.gif")
+            with StreamingGifWriter(gif_path, 250, loop=0) as gif_writer:
+                for frame in frames:
+                    gif_writer.write(frame)
+
+            with Image.open(gif_path) as gif:
+                self.assertEqual(gif.n_frames, len(frames))
+                self.assertEqual(gif.size, (64, 32))
+                self.assertEqual(gif.info["loop"], 0)
+                self.assertEqual(gif.info["duration"], 250)
+                gif.seek(2)
+                np.testing.assert_allclose(
+                    np.asarray(gif.convert("RGB"), dtype=float).mean(),
+                    np.asarray(frames[2].convert("RGB"), dtype=float).mean(),
+                    rtol=0.05)
+        return
+
+
+class TestStreamingPngWriter(unittest.TestCase):
+    def test_bands_of_rows_match_image(self):
+        rng = np.random.default_rng(0)
+        for num_channels in (3, 4):
+            pixels = rng.integers(
+                0, 255, (50, 40, num_channels), dtype=np.uint8)
+            pixels[10:30] = np.arange(40)[:, None]  # compressible rows
+            with tempfile.TemporaryDirectory() as temp_dir_name:
+                png_path = join(temp_dir_name, "frame_0.png")
+                png_writer = StreamingPngWriter(png_path, 40, 50, num_channels)
+                for start in range(0, 50, 15):
+                    png_writer.write_rows(pixels[start:start + 15])
+                size_in_bytes, sha256 = png_writer.close()
+
+                self.assertEqual(sha256, compute_sha256(png_path))
+                with Image.open(png_path) as png:
+                    np.testing.assert_array_equal(np.asarray(png), pixels)
+        return
+
+
+class TestAsyncFrameWriter(unittest.TestCase):
+    def test_write_error_is_raised(self):
+        pixels = np.zeros((4, 4, 3), dtype=np.uint8)
+        writer = AsyncFrameWriter(num_threads=1)
+        writer.submit("/nonexistent/frame_0.png", pixels)
+        with self.assertRaises(FileNotFoundError):
+            writer.close()
+        return
+
+
+@unittest.skipIf(which("ffmpeg") is None, "requires ffmpeg")
+class TestFFmpegOutputArgs(unittest.TestCase):
+    def get_arg(self, output_args, name):
+        return output_args[output_args.index(name) + 1]
+
+    def test_default_quality_per_format(self):
+        self.assertEqual(
+            self.get_arg(ffmpeg_output_args("mp4"), "-crf"), "23")
+        self.assertEqual(
+            self.get_arg(ffmpeg_output_args("webm"), "-crf"), "31")
+        self.assertEqual(
+            self.get_arg(ffmpeg_output_args("webp"), "-quality"), "75")
+        self.assertNotIn("-threads", ffmpeg_output_args("mp4"))
+        return
+
+    def test_quality_threads_and_loop(self):
+        self.assertEqual(
+            self.get_arg(ffmpeg_output_args("mp4", quality=18), "-crf"), "18")
+        self.assertEqual(
+            self.get_arg(ffmpeg_output_args("webm", quality=40), "-crf"),
+            "40")
+        self.assertEqual(
+            self.get_arg(
+                ffmpeg_output_args("webp", quality=90), "-quality"), "90")
+        for animation_format in ("gif", "mp4", "webm", "webp"):
+            self.assertEqual(
+                self.get_arg(
+                    ffmpeg_output_args(animation_format, num_threads=4),
+                    "-threads"),
+                "4")
+        for animation_format in ("gif", "webp"):
+            self.assertEqual(
+                self.get_arg(
+                    ffmpeg_output_args(animation_format, loop=3), "-loop"),
+                "3")
+        self.assertNotIn("-crf", ffmpeg_output_args("gif", quality=18))
+        return
+
+    def test_unknown_format_raises(self):
+        with self.assertRaises(ValueError):
+            ffmpeg_output_args("avi")
+        return
+
+
+class TestFFmpegStreamWriter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.frames = np.random.default_rng(0).integers(
+            0, 256, size=(3, 32, 64, 3), dtype=np.uint8)
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def test_stream_frames(self):
+        path = join(self.temp_dir.name, "animation.gif")
+        with FFmpegStreamWriter(path, 2, ffmpeg_output_args("gif")) as writer:
+            for frame in self.frames:
+                writer.write(frame)
+        self.assertTrue(exists(path))
+        with Image.open(path) as animation:
+            self.assertEqual(animation.n_frames, len(self.frames))
+            self.assertEqual(animation.size, (64, 32))
+        return
+
+    def test_killed_ffmpeg_raises(self):
+        path = join(self.temp_dir.name, "animation.mp4")
+        writer = FFmpegStreamWriter(path, 2, ffmpeg_output_args("mp4"))
+        writer.write(self.frames[0])
+        writer._process.kill()
+        writer._process.wait()
+        with self.assertRaisesRegex(RuntimeError, "exited with code -9"):
+            for frame in self.frames[1:]:
+                writer.write(frame)
+        writer.close()  # the error is only raised once
+        return
+
+
+def start_exiting_process(command, **kwargs):
+    """Stands in for ffmpeg, exits successfully without reading its input.
+    """
+    return Popen([sys.executable, "-c", "pass"], **kwargs)
+
+
+@mock.patch("omnisuite_viz.writer.which", return_value="ffmpeg")
+@mock.patch("omnisuite_viz.writer.Popen", side_effect=start_exiting_process)
+class TestFFmpegWriterErrors(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = join(self.temp_dir.name, "animation.mp4")
+        # larger than the buffers of the pipe
+        self.frame = np.zeros((1024, 1024, 3), dtype=np.uint8)
+        return
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        return
+
+    def test_write_after_close_raises(self, *mocks):
+        writer = FFmpegImagePipeWriter(self.path, 2, [])
+        writer.close()
+        with self.assertRaisesRegex(ValueError, "after closing"):
+            writer.write(b"frame")
+
+        writer = FFmpegStreamWriter(self.path, 2)
+        writer.close()
+        with self.assertRaisesRegex(ValueError, "after closing"):
+            writer.write(self.frame)
+        return
+
+    def test_unread_frames_raise_if_ffmpeg_succeeded(self, *mocks):
+        writer = FFmpegImagePipeWriter(self.path, 2, [])
+        writer._process.wait()
+        with self.assertRaisesRegex(RuntimeError, "before reading all"):
+            writer.write(self.frame.tobytes())
+
+        writer = FFmpegStreamWriter(self.path, 2)
+        with self.assertRaisesRegex(RuntimeError, "before reading all"):
+            for _ in range(8):  # until the pipe to the exited process breaks
+                writer.write(self.frame)
+        with self.assertRaisesRegex(ValueError, "after closing"):
+            writer.write(self.frame)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()